@@ -0,0 +1,101 @@
+"""
+Shared GenAI Client - Connection pooling for all AegisAI agents
+One google.genai.Client per API key (and injected HTTP client), reference-counted
+across agent instances
+"""
+
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import httpx
+from google import genai
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# Keep-alive pool shared by every agent using the same client
+_POOL_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+_HTTP_OPTIONS = types.HttpOptions(
+    client_args={"limits": _POOL_LIMITS},
+    async_client_args={"limits": _POOL_LIMITS},
+)
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+_ClientKey = Tuple[str, Optional[httpx.AsyncClient]]
+_clients: Dict[_ClientKey, genai.Client] = {}
+_refcounts: Dict[_ClientKey, int] = {}
+_lock = threading.Lock()
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Creates an async HTTP client that can be injected into every agent.
+
+    The caller owns the client and must close it with aclose(); agents never
+    close an injected client.
+
+    Returns:
+        httpx.AsyncClient: Keep-alive client (HTTP/2 when h2 is installed).
+    """
+    return httpx.AsyncClient(
+        http2=_HTTP2,
+        limits=_POOL_LIMITS,
+        timeout=httpx.Timeout(30.0)
+    )
+
+
+def get_client(api_key: str, http_client: Optional[httpx.AsyncClient] = None) -> genai.Client:
+    """Returns the shared GenAI client for an API key, creating it on first use.
+
+    Every call takes a reference that must be returned with release_client().
+
+    Args:
+        api_key: Gemini API key.
+        http_client: Optional injected async HTTP client to send requests through.
+
+    Returns:
+        genai.Client: Client whose HTTP connection pool is shared by all agents.
+    """
+    key = (api_key, http_client)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            http_options = _HTTP_OPTIONS
+            if http_client is not None:
+                http_options = types.HttpOptions(
+                    client_args={"limits": _POOL_LIMITS},
+                    httpx_async_client=http_client,
+                )
+            client = genai.Client(api_key=api_key, http_options=http_options)
+            _clients[key] = client
+            logger.debug("Created shared GenAI client")
+        _refcounts[key] = _refcounts.get(key, 0) + 1
+        return client
+
+
+def release_client(api_key: str, http_client: Optional[httpx.AsyncClient] = None) -> bool:
+    """Drops one reference to the shared client for an API key.
+
+    Args:
+        api_key: Gemini API key passed to get_client().
+        http_client: HTTP client passed to get_client(), if any.
+
+    Returns:
+        bool: True if this was the last reference, in which case the client has
+            been evicted and the caller is responsible for closing it.
+    """
+    key = (api_key, http_client)
+    with _lock:
+        remaining = _refcounts.get(key, 0) - 1
+        if remaining > 0:
+            _refcounts[key] = remaining
+            return False
+        _refcounts.pop(key, None)
+        _clients.pop(key, None)
+        return True
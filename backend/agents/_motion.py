@@ -0,0 +1,48 @@
+"""
+Motion Gate - Cheap local change detection ahead of Gemini calls
+Compares small grayscale thumbnails so static scenes can reuse the last analysis
+"""
+
+import cv2
+import numpy as np
+
+# Thumbnail size (width, height) used for motion comparison
+MOTION_THUMB_SIZE = (160, 90)
+
+# Tile grid (columns, rows) the thumbnail difference is averaged over; each
+# tile covers 10x10 thumbnail pixels (80x80 on a 720p frame)
+MOTION_GRID = (16, 9)
+
+
+def motion_thumbnail(frame: np.ndarray) -> np.ndarray:
+    """Reduces a frame to a small grayscale thumbnail for motion comparison.
+
+    Args:
+        frame: OpenCV frame (BGR or single-channel).
+
+    Returns:
+        np.ndarray: uint8 grayscale thumbnail of MOTION_THUMB_SIZE.
+    """
+    small = cv2.resize(frame, MOTION_THUMB_SIZE, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return small
+
+
+def frame_delta(a: np.ndarray, b: np.ndarray) -> float:
+    """Returns the largest per-tile mean absolute difference between two thumbnails.
+
+    Averaging within tiles rather than over the whole thumbnail keeps a small,
+    localized change (a distant intruder) from being diluted by the unchanged
+    rest of the scene, while sensor noise still averages out.
+
+    Args:
+        a: Thumbnail from motion_thumbnail().
+        b: Thumbnail from motion_thumbnail().
+
+    Returns:
+        float: Mean difference of the most changed tile on a 0-255 scale
+            (0 means identical).
+    """
+    diff = cv2.absdiff(a, b).astype(np.float32)
+    return float(cv2.resize(diff, MOTION_GRID, interpolation=cv2.INTER_AREA).max())
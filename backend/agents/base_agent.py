@@ -3,14 +3,20 @@ Base Agent - Foundation for all AegisAI agents
 Enhanced with robust error handling and performance tracking
 """
 
-import json
+import asyncio
 import logging
+import re
 import time
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
-from google import genai
+from typing import Dict, Any, List, Optional
+import httpx
+import orjson
+from agents._client import get_client, release_client
 from config.settings import settings
 
+# Matches an optional ```json ... ``` markdown fence around the model output
+_FENCE_RE = re.compile(r"\A```(?:json)?\s*(.*?)\s*(?:```)?\Z", re.S)
+
 
 class BaseAgent(ABC):
     """Abstract base class for all AegisAI agents.
@@ -31,6 +37,7 @@ class BaseAgent(ABC):
         self, 
         model_name: Optional[str] = None, 
         api_key: Optional[str] = None, 
+        http_client: Optional[httpx.AsyncClient] = None,
         **kwargs
     ):
         """Initializes the agent with the Google GenAI Client.
@@ -38,11 +45,17 @@ class BaseAgent(ABC):
         Args:
             model_name: Gemini model to use. Defaults to settings.GEMINI_MODEL.
             api_key: Gemini API key. Defaults to settings.GEMINI_API_KEY.
+            http_client: Optional shared async HTTP client for Gemini requests.
+                Owned by the caller, which must close it after the agents.
             **kwargs: Additional optional parameters stored as instance attributes.
         """
         self.model_name = model_name or settings.GEMINI_MODEL
         self.api_key = api_key or settings.GEMINI_API_KEY
-        self.logger = logging.getLogger(self.__class__.__name__)
+        self.http_client = http_client
+        # Settings are fixed for the process lifetime; keep hot values on the instance
+        self._temperature = settings.TEMPERATURE
+        self._cls_name = type(self).__name__
+        self.logger = logging.getLogger(self._cls_name)
 
         # Store any additional kwargs as instance attributes
         for key, value in kwargs.items():
@@ -56,10 +69,22 @@ class BaseAgent(ABC):
         self.total_errors = 0
         self.avg_response_time = 0.0
 
+    @classmethod
+    async def create(cls, **kwargs) -> "BaseAgent":
+        """Builds an agent in a worker thread so client setup doesn't block the event loop.
+
+        Args:
+            **kwargs: Passed through to the constructor.
+
+        Returns:
+            BaseAgent: The initialized agent.
+        """
+        return await asyncio.to_thread(cls, **kwargs)
+
     def _initialize_client(self):
-        """Initializes the GenAI client with standard error handling."""
+        """Attaches the shared, connection-pooled GenAI client for this API key."""
         try:
-            self.client = genai.Client(api_key=self.api_key)
+            self.client = get_client(self.api_key, self.http_client)
             self.logger.info(f"✅ Initialized GenAI client for {self.model_name}")
         except Exception as e:
             self.logger.error(f"❌ Client initialization failed: {e}")
@@ -77,7 +102,7 @@ class BaseAgent(ABC):
             success_rate = ((self.total_calls - self.total_errors) / self.total_calls) * 100
         
         return {
-            "agent": self.__class__.__name__,
+            "agent": self._cls_name,
             "model": self.model_name,
             "total_calls": self.total_calls,
             "total_errors": self.total_errors,
@@ -108,33 +133,63 @@ class BaseAgent(ABC):
         try:
             result = await self.process(*args, **kwargs)
             
-            # Update performance metrics
+            # Update performance metrics (incremental mean, no running-sum drift)
             elapsed = time.time() - start_time
-            self.avg_response_time = (
-                (self.avg_response_time * (self.total_calls - 1) + elapsed)
-                / self.total_calls
-            )
+            self.avg_response_time += (elapsed - self.avg_response_time) / self.total_calls
             
-            self.logger.debug(f"✅ {self.__class__.__name__} processed in {elapsed:.2f}s")
+            self.logger.debug(f"✅ {self._cls_name} processed in {elapsed:.2f}s")
             return result
             
         except Exception as e:
             self.total_errors += 1
             self.logger.error(
-                f"❌ Processing error in {self.__class__.__name__}: {e}",
+                f"❌ Processing error in {self._cls_name}: {e}",
                 exc_info=True
             )
             
-            # Try to use subclass-specific fallback methods
-            if hasattr(self, '_create_fallback_plan'):
-                incident = kwargs.get('incident') or (args[0] if args else {})
-                return self._create_fallback_plan(incident)
-            
-            if hasattr(self, '_default_result'):
-                return self._default_result(str(e))
-            
-            # If no fallback available, return None
-            return None
+            # Subclass-specific fallback (None unless overridden)
+            return self._fallback_result(e, args, kwargs)
+
+    def _fallback_result(self, error: Exception, args: tuple, kwargs: Dict[str, Any]) -> Any:
+        """Returns the result used when process() raises.
+
+        Subclasses override this to supply a safe default for their pipeline stage.
+
+        Args:
+            error: The exception raised by process().
+            args: Positional arguments passed to _safe_process().
+            kwargs: Keyword arguments passed to _safe_process().
+
+        Returns:
+            None by default, meaning no fallback is available.
+        """
+        return None
+
+    async def _process_concurrently(
+        self,
+        call_kwargs: List[Dict[str, Any]],
+        max_concurrency: Optional[int] = None
+    ) -> List[Any]:
+        """Fans out several _safe_process() calls with a bounded concurrency.
+
+        Network waits of independent calls overlap, while an asyncio.Semaphore
+        keeps the number of in-flight Gemini requests within quota.
+
+        Args:
+            call_kwargs: Keyword arguments for each _safe_process() call.
+            max_concurrency: Maximum in-flight calls. Defaults to
+                settings.MAX_CONCURRENT_ANALYSES.
+
+        Returns:
+            List[Any]: Results in the same order as call_kwargs.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or settings.MAX_CONCURRENT_ANALYSES)
+
+        async def bounded(kwargs: Dict[str, Any]) -> Any:
+            async with semaphore:
+                return await self._safe_process(**kwargs)
+
+        return await asyncio.gather(*(bounded(kwargs) for kwargs in call_kwargs))
 
     def _parse_json_response(self, response_text: Optional[str]) -> Optional[Dict[str, Any]]:
         """Parses JSON from Gemini, handling Markdown blocks and NoneTypes.
@@ -160,24 +215,16 @@ class BaseAgent(ABC):
             text = response_text.strip()
             
             # Remove markdown code blocks if present
-            if text.startswith("```"):
-                # Split by ``` and take the middle part
-                parts = text.split("```")
-                if len(parts) >= 2:
-                    text = parts[1]
-                    # Remove language identifier (e.g., "json")
-                    if text.startswith("json"):
-                        text = text[4:]
-            
-            # Clean up any remaining backticks and whitespace
-            text = text.strip("` \n\r\t")
+            match = _FENCE_RE.match(text)
+            if match:
+                text = match.group(1)
             
             # Parse JSON
-            parsed = json.loads(text)
+            parsed = orjson.loads(text)
             self.logger.debug(f"✅ Successfully parsed JSON response")
             return parsed
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             self.logger.error(f"❌ JSON parse error: {e}")
             self.logger.debug(f"Raw response text: {response_text[:200]}...")
             return None
@@ -186,25 +233,30 @@ class BaseAgent(ABC):
             return None
             
     async def close(self):
-        """Closes the GenAI client session to release resources.
+        """Releases this agent's reference to the shared GenAI client.
         
-        This prevents 'unawaited coroutine' warnings by explicitly 
-        shutting down the internal HTTP session.
+        The client is shared by every agent using the same API key, so the
+        underlying HTTP sessions are only shut down when the last agent closes.
+        This prevents 'unawaited coroutine' warnings without breaking agents
+        that are still running.
         
         Should be called when the agent is no longer needed.
         """
         if self.client:
+            client, self.client = self.client, None
             try:
-                # Close async client session
-                await self.client.aio.close()
-                self.logger.info(f"🔒 GenAI client for {self.model_name} closed.")
+                if release_client(self.api_key, self.http_client):
+                    # Last user of the shared client - close its HTTP sessions
+                    await client.aio.aclose()
+                    client.close()
+                    self.logger.info(f"🔒 GenAI client for {self.model_name} closed.")
             except Exception as e:
                 self.logger.error(f"❌ Error during client shutdown: {e}")
                 
     def __repr__(self) -> str:
         """String representation for debugging."""
         return (
-            f"{self.__class__.__name__}("
+            f"{self._cls_name}("
             f"model={self.model_name}, "
             f"calls={self.total_calls}, "
             f"errors={self.total_errors})"
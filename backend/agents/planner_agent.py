@@ -3,10 +3,12 @@ Planner Agent - Tactical Response Planning
 Enhanced with robust validation and frontend integration
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from google.genai.types import GenerateContentConfig, Content, Part
 from agents.base_agent import BaseAgent
-from config.settings import settings, PLANNER_AGENT_PROMPT
+from config.settings import settings, render_planner_prompt, render_planner_batch_prompt
+
+_from_text = Part.from_text
 
 
 class PlannerAgent(BaseAgent):
@@ -20,7 +22,7 @@ class PlannerAgent(BaseAgent):
     """
 
     # Valid actions that can be executed by the system
-    VALID_ACTIONS = {
+    VALID_ACTIONS = frozenset({
         'save_evidence',
         'send_alert', 
         'log_incident',
@@ -32,7 +34,48 @@ class PlannerAgent(BaseAgent):
         'notify_staff',
         'record_video',
         'capture_snapshot'
+    })
+
+    VALID_PRIORITIES = frozenset(('immediate', 'high', 'medium', 'low'))
+
+    _HIGH_SEVERITIES = frozenset(('high', 'critical'))
+    _PHYSICAL_THREATS = frozenset(('intrusion', 'theft', 'violence', 'vandalism'))
+
+    # Static fallback step skeletons (key order matches generated plans)
+    _FALLBACK_SAVE_EVIDENCE = {
+        "step": None, "action": "save_evidence", "priority": None, "parameters": None,
+        "reasoning": "Preserve forensic evidence for investigation"
+    }
+    _FALLBACK_SEND_ALERT = {
+        "step": None, "action": "send_alert", "priority": None, "parameters": None,
+        "reasoning": "Immediate notification required for high-severity threat"
+    }
+    _FALLBACK_LOG_INCIDENT = {
+        "step": None, "action": "log_incident", "priority": None, "parameters": None,
+        "reasoning": "Document incident in security log for audit trail"
     }
+    _FALLBACK_ESCALATE = {
+        "step": None, "action": "escalate", "priority": None, "parameters": None,
+        "reasoning": "Critical threat requires immediate human intervention"
+    }
+    _FALLBACK_MONITOR = {
+        "step": None, "action": "monitor", "priority": None, "parameters": None,
+        "reasoning": "Continue monitoring for threat escalation or resolution"
+    }
+
+    # Raw LLM action string -> normalized action name (bounded, shared by instances)
+    _NORM_CACHE: Dict[str, str] = {}
+    _NORM_CACHE_MAX = 256
+
+    def __init__(self, **kwargs):
+        """Initializes the PlannerAgent, its prompt formatters and generation config."""
+        super().__init__(**kwargs)
+        self._format = render_planner_prompt
+        self._format_batch = render_planner_batch_prompt
+        self._gen_config = GenerateContentConfig(
+            temperature=self._temperature,
+            response_mime_type="application/json"
+        )
 
     async def process(self, incident: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Generates a list of actionable response steps.
@@ -49,7 +92,7 @@ class PlannerAgent(BaseAgent):
         """
         try:
             # Format the prompt with incident details
-            query = PLANNER_AGENT_PROMPT.format(
+            query = self._format(
                 incident_type=incident.get("type", "unknown"),
                 severity=incident.get("severity", "low"),
                 reasoning=incident.get("reasoning", "No reasoning provided"),
@@ -57,13 +100,10 @@ class PlannerAgent(BaseAgent):
             )
 
             # Call Gemini to generate plan
-            response = self.client.models.generate_content(
+            response = await self.client.aio.models.generate_content(
                 model=self.model_name,
-                contents=[Content(role="user", parts=[Part.from_text(text=query)])],
-                config=GenerateContentConfig(
-                    temperature=settings.TEMPERATURE,
-                    response_mime_type="application/json"
-                ),
+                contents=[Content(role="user", parts=[_from_text(text=query)])],
+                config=self._gen_config,
             )
 
             # Parse and validate response
@@ -81,6 +121,81 @@ class PlannerAgent(BaseAgent):
             self.logger.error(f"Plan generation failed: {e}")
             return self._create_fallback_plan(incident)
 
+    async def process_many(
+        self,
+        incidents: List[Dict[str, Any]],
+        max_concurrency: Optional[int] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Generates plans for several incidents with concurrent Gemini requests.
+
+        Args:
+            incidents: Threat metadata dictionaries from the VisionAgent.
+            max_concurrency: Maximum in-flight requests. Defaults to
+                settings.MAX_CONCURRENT_ANALYSES.
+
+        Returns:
+            List[List[Dict]]: One plan per incident, in input order.
+        """
+        call_kwargs = [{"incident": incident} for incident in incidents]
+        return await self._process_concurrently(call_kwargs, max_concurrency)
+
+    async def process_batch(
+        self,
+        incidents: List[Dict[str, Any]],
+        batch_size: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """Generates response plans for several incidents, packing them into few prompts.
+
+        Up to ``batch_size`` incidents share one Gemini request; the model returns
+        a JSON array of plans in the same order as the incidents.
+
+        Args:
+            incidents: Threat metadata dictionaries from the VisionAgent.
+            batch_size: Maximum number of incidents packed into a single prompt.
+
+        Returns:
+            List[List[Dict]]: One validated plan per incident, in input order.
+                Incidents without a usable plan in the response get a fallback plan.
+        """
+        plans: List[List[Dict[str, Any]]] = []
+        batch_size = max(1, batch_size)
+
+        for start in range(0, len(incidents), batch_size):
+            chunk = incidents[start:start + batch_size]
+
+            try:
+                incident_blocks = "\n".join(
+                    f"Incident {k}: Type: {incident.get('type', 'unknown')} | "
+                    f"Severity: {incident.get('severity', 'low')} | "
+                    f"Reasoning: {incident.get('reasoning', 'No reasoning provided')} | "
+                    f"Confidence: {incident.get('confidence', 0)}%"
+                    for k, incident in enumerate(chunk, 1)
+                )
+                query = self._format_batch(count=len(chunk), incidents=incident_blocks)
+
+                response = await self.client.aio.models.generate_content(
+                    model=self.model_name,
+                    contents=[Content(role="user", parts=[_from_text(text=query)])],
+                    config=self._gen_config,
+                )
+                parsed = self._parse_json_response(response.text)
+                if not isinstance(parsed, list):
+                    self.logger.warning("Batch plan parsing failed, using fallback plans")
+                    parsed = []
+            except Exception as e:
+                self.logger.error(f"Batch plan generation failed: {e}")
+                parsed = []
+
+            for index, incident in enumerate(chunk):
+                plan = parsed[index] if index < len(parsed) else None
+                if isinstance(plan, list) and plan:
+                    plans.append(self._validate_plan(plan))
+                else:
+                    plans.append(self._create_fallback_plan(incident))
+
+        self.logger.info(f"✅ Generated {len(plans)} plans in batch mode")
+        return plans
+
     def _validate_plan(self, plan: List[Dict]) -> List[Dict]:
         """Ensures all actions are within the approved security protocol.
         
@@ -93,20 +208,20 @@ class PlannerAgent(BaseAgent):
         validated = []
         
         for i, step in enumerate(plan):
-            action = step.get("action", "log_incident")
-            
             # Normalize action name (remove spaces, lowercase)
-            action = action.lower().replace(" ", "_")
+            action = self._normalize_action(step.get("action", "log_incident"))
             
             # Replace invalid actions with safe default
             if action not in self.VALID_ACTIONS:
                 self.logger.warning(f"Invalid action '{action}' replaced with 'log_incident'")
                 action = "log_incident"
             
-            # Normalize priority
-            priority = step.get("priority", "medium").lower()
-            if priority not in ["immediate", "high", "medium", "low"]:
-                priority = "medium"
+            # Normalize priority (already-valid values skip the string transform)
+            priority = step.get("priority", "medium")
+            if priority not in self.VALID_PRIORITIES:
+                priority = priority.lower()
+                if priority not in self.VALID_PRIORITIES:
+                    priority = "medium"
             
             # Ensure parameters is a dict
             parameters = step.get("parameters", {})
@@ -124,6 +239,28 @@ class PlannerAgent(BaseAgent):
         self.logger.debug(f"Validated {len(validated)} actions: {[s['action'] for s in validated]}")
         return validated
 
+    @classmethod
+    def _normalize_action(cls, raw: str) -> str:
+        """Normalizes a raw action name, memoizing repeated inputs.
+        
+        Args:
+            raw: Action string as returned by the model
+            
+        Returns:
+            str: Lowercased action name with spaces replaced by underscores
+        """
+        action = cls._NORM_CACHE.get(raw)
+        if action is None:
+            action = raw.lower().replace(" ", "_")
+            if len(cls._NORM_CACHE) < cls._NORM_CACHE_MAX:
+                cls._NORM_CACHE[raw] = action
+        return action
+
+    def _fallback_result(self, error: Exception, args: tuple, kwargs: Dict[str, Any]) -> List[Dict]:
+        """Returns a fallback plan for the incident when process() raises."""
+        incident = kwargs.get('incident') or (args[0] if args else {})
+        return self._create_fallback_plan(incident)
+
     def _create_fallback_plan(self, incident: Dict) -> List[Dict]:
         """Provides a safe default response if the LLM fails.
         
@@ -140,79 +277,52 @@ class PlannerAgent(BaseAgent):
         severity = str(incident.get("severity", "low")).lower()
         incident_type = incident.get("type", "unknown")
         confidence = incident.get("confidence", 0)
+        high = severity in self._HIGH_SEVERITIES
         
         self.logger.info(f"Creating fallback plan for {severity} severity incident")
         
-        plan = []
-        step_num = 1
-        
         # Step 1: Always preserve evidence first
-        plan.append({
-            "step": step_num,
-            "action": "save_evidence",
-            "priority": "immediate" if severity in ["high", "critical"] else "high",
-            "parameters": {
-                "incident_type": incident_type,
-                "confidence": confidence
-            },
-            "reasoning": "Preserve forensic evidence for investigation"
-        })
-        step_num += 1
+        steps = [(
+            self._FALLBACK_SAVE_EVIDENCE,
+            "immediate" if high else "high",
+            {"incident_type": incident_type, "confidence": confidence}
+        )]
         
         # Step 2: High/Critical incidents need immediate alerts
-        if severity in ["high", "critical"]:
-            plan.append({
-                "step": step_num,
-                "action": "send_alert",
-                "priority": "immediate",
-                "parameters": {
-                    "severity": severity,
-                    "incident_type": incident_type
-                },
-                "reasoning": "Immediate notification required for high-severity threat"
-            })
-            step_num += 1
+        if high:
+            steps.append((
+                self._FALLBACK_SEND_ALERT,
+                "immediate",
+                {"severity": severity, "incident_type": incident_type}
+            ))
         
         # Step 3: Always log the incident
-        plan.append({
-            "step": step_num,
-            "action": "log_incident",
-            "priority": "high" if severity in ["high", "critical"] else "medium",
-            "parameters": {
-                "severity": severity,
-                "incident_type": incident_type,
-                "confidence": confidence
-            },
-            "reasoning": "Document incident in security log for audit trail"
-        })
-        step_num += 1
+        steps.append((
+            self._FALLBACK_LOG_INCIDENT,
+            "high" if high else "medium",
+            {"severity": severity, "incident_type": incident_type, "confidence": confidence}
+        ))
         
         # Step 4: Critical incidents may need escalation
         if severity == "critical":
-            plan.append({
-                "step": step_num,
-                "action": "escalate",
-                "priority": "immediate",
-                "parameters": {
-                    "target": "security_team",
-                    "incident_type": incident_type
-                },
-                "reasoning": "Critical threat requires immediate human intervention"
-            })
-            step_num += 1
+            steps.append((
+                self._FALLBACK_ESCALATE,
+                "immediate",
+                {"target": "security_team", "incident_type": incident_type}
+            ))
         
         # Step 5: Physical threats need monitoring
-        if incident_type in ["intrusion", "theft", "violence", "vandalism"]:
-            plan.append({
-                "step": step_num,
-                "action": "monitor",
-                "priority": "high",
-                "parameters": {
-                    "duration": 300,  # 5 minutes
-                    "incident_type": incident_type
-                },
-                "reasoning": "Continue monitoring for threat escalation or resolution"
-            })
+        if incident_type in self._PHYSICAL_THREATS:
+            steps.append((
+                self._FALLBACK_MONITOR,
+                "high",
+                {"duration": 300, "incident_type": incident_type}  # 5 minutes
+            ))
+        
+        plan = [
+            {**template, "step": n, "priority": priority, "parameters": params}
+            for n, (template, priority, params) in enumerate(steps, 1)
+        ]
         
         self.logger.info(f"✅ Fallback plan created with {len(plan)} steps")
         return plan
@@ -3,15 +3,58 @@ Vision Agent - Security Frame Analysis
 Enhanced with robust error handling and frontend integration
 """
 
-import base64
+import asyncio
+import copy
+import hashlib
+import re
 import numpy as np
-from collections import deque
-from typing import Dict, Any, Optional
-from google.genai import types
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Dict, Any, List, Optional
 from google.genai.types import GenerateContentConfig, Content, Part
+from agents._motion import frame_delta, motion_thumbnail
 from agents.base_agent import BaseAgent
 from config.settings import settings, VISION_AGENT_PROMPT
 
+# SIMD base64 decoder (AVX2/SSSE3 on x86, NEON on ARM); stdlib API-compatible fallback
+try:
+    import pybase64 as b64
+except ImportError:  # pragma: no cover
+    import base64 as b64
+
+# Pre-bound request part factories for the per-frame hot path
+_from_text = Part.from_text
+_from_bytes = Part.from_bytes
+
+# Early fields picked out of a partially streamed JSON response
+_TYPE_FIELD_RE = re.compile(r'"type"\s*:\s*"([^"]*)"')
+_SEVERITY_FIELD_RE = re.compile(r'"severity"\s*:\s*"([^"]*)"')
+
+_VALID_SEVERITIES = frozenset(("low", "medium", "high", "critical"))
+
+
+def _coerce_confidence(value: Any) -> int:
+    """Clamps a confidence score to 0-100, treating unparseable values as 0."""
+    try:
+        return max(0, min(100, int(value)))
+    except (ValueError, TypeError):
+        return 0
+
+
+def _coerce_severity(value: Any) -> str:
+    """Lowercases a severity level, falling back to 'low' if unknown."""
+    severity = str(value).lower()
+    return severity if severity in _VALID_SEVERITIES else "low"
+
+
+def _coerce_list(value: Any) -> list:
+    """Keeps list values and replaces anything else with an empty list."""
+    return value if isinstance(value, list) else []
+
+
+def _passthrough(value: Any) -> Any:
+    """Returns the value unchanged."""
+    return value
+
 
 class VisionAgent(BaseAgent):
     """Performs real-time security analysis on video frames using Gemini.
@@ -26,17 +69,72 @@ class VisionAgent(BaseAgent):
     - Better logging for debugging
     """
 
+    # Encoded uploads larger than this (in bytes) are downscaled before sending
+    RESIZE_BYTES_THRESHOLD = 192 * 1024
+
+    # Number of fingerprint -> analysis entries kept for repeated scenes
+    RESULT_CACHE_SIZE = 256
+
+    # Response template; every field FastAPI expects is present
+    _DEFAULTS = {
+        "incident": False,
+        "type": "unknown",
+        "severity": "low",
+        "confidence": 0,
+        "reasoning": "No explanation provided",
+        "subjects": [],
+        "recommended_actions": []
+    }
+
+    # Field -> coercion applied to values present in the Gemini response
+    _COERCERS = {
+        "incident": bool,
+        "type": _passthrough,
+        "severity": _coerce_severity,
+        "confidence": _coerce_confidence,
+        "reasoning": _passthrough,
+        "subjects": _coerce_list,
+        "recommended_actions": _coerce_list
+    }
+
     def __init__(self, **kwargs):
         """Initializes the VisionAgent with a 10-frame sliding window history."""
         super().__init__(**kwargs)
         self.max_history = 10
+        # Ring buffer of (frame_num, type, severity, confidence) tuples
         self.frame_history = deque(maxlen=self.max_history)
+        self._context_cache: Optional[str] = None
+
+        self._sys_prompt = VISION_AGENT_PROMPT
+        self._conf_threshold = settings.CONFIDENCE_THRESHOLD
+        self._motion_threshold = settings.MOTION_THRESHOLD
+        self._max_side = settings.VISION_MAX_SIDE
+        self._jpeg_quality = settings.JPEG_QUALITY
+
+        # Generation config is identical for every call, so build it once. The
+        # system prompt is passed as ready-made Content so the SDK doesn't
+        # rebuild it from the ~1.5 kB string on every request
+        self._gen_config = GenerateContentConfig(
+            system_instruction=Content(role="user", parts=[_from_text(text=self._sys_prompt)]),
+            temperature=self._temperature,
+            response_mime_type="application/json"
+        )
+
+        # LRU of successful analyses keyed by frame fingerprint
+        self._result_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        self.cache_hits = 0
+
+        # Motion gate: thumbnail and result of the last analyzed camera frame
+        self._last_thumb: Optional[np.ndarray] = None
+        self._last_result: Optional[Dict[str, Any]] = None
+        self.motion_skips = 0
 
     async def process(
         self, 
         frame: np.ndarray = None, 
         base64_image: str = None, 
-        frame_number: int = 0
+        frame_number: int = 0,
+        image_bytes: bytes = None
     ) -> Dict[str, Any]:
         """Analyzes visual input for security threats and returns a structured report.
 
@@ -44,6 +142,7 @@ class VisionAgent(BaseAgent):
             frame: Optional numpy array (OpenCV format) of the video frame.
             base64_image: Optional base64 encoded string of the image.
             frame_number: Current frame index used for temporal tracking.
+            image_bytes: Optional already-decoded image file (e.g. JPEG) bytes.
 
         Returns:
             Dict[str, Any]: Structured analysis containing incident status, 
@@ -51,36 +150,37 @@ class VisionAgent(BaseAgent):
                 ALWAYS returns all required fields even on error.
         """
         try:
-            # Prepare image bytes
+            # Reuse the analysis of an identical scene instead of calling Gemini
+            fingerprint = self._fingerprint(frame, base64_image, image_bytes)
+            cached = self._cached_result(fingerprint, frame_number)
+            if cached is None:
+                cached = self._motion_gate(frame, frame_number)
+            if cached is not None:
+                return cached
+
+            # Prepare image bytes off the event loop (JPEG encode / base64 decode)
             try:
-                image_bytes = self._prepare_image_bytes(frame, base64_image)
+                image_bytes = await asyncio.to_thread(
+                    self._prepare_image_bytes, frame, base64_image, image_bytes
+                )
             except Exception as img_error:
                 self.logger.error(f"Image preparation failed: {img_error}")
                 return self._default_result(f"Image Error: {str(img_error)}")
             
-            # Build temporal context
-            context = self._build_context()
-            
-            # Create user prompt
-            user_prompt = "Analyze the input based on the security protocol."
-            if context:
-                user_prompt += f"\n\nTEMPORAL CONTEXT:\n{context}"
+            # Create user prompt with temporal context
+            user_prompt = self._build_user_prompt()
     
             # Call Gemini API with comprehensive error handling
             try:
                 response = await self.client.aio.models.generate_content(
                     model=self.model_name,
                     contents=[
-                        types.Content(role="user", parts=[
-                            types.Part.from_text(text=user_prompt),
-                            types.Part.from_bytes(data=image_bytes, mime_type="image/jpeg")
+                        Content(role="user", parts=[
+                            _from_text(text=user_prompt),
+                            _from_bytes(data=image_bytes, mime_type="image/jpeg")
                         ])
                     ],
-                    config=GenerateContentConfig(
-                        system_instruction=VISION_AGENT_PROMPT,
-                        temperature=settings.TEMPERATURE,
-                        response_mime_type="application/json"
-                    ),
+                    config=self._gen_config,
                 )
                 
                 # Parse response
@@ -93,41 +193,276 @@ class VisionAgent(BaseAgent):
                 # Validate and return
                 validated = self._validate_result(result)
                 self._update_history(frame_number, validated)
+                self._remember(fingerprint, frame, validated)
                 return validated
                 
             except Exception as api_error:
                 # Catch specific Gemini API errors
-                error_msg = str(api_error)
-                
-                # Extract error code if present
-                if "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg:
-                    self.logger.error("Gemini API quota exceeded")
-                    return self._default_result("API quota exceeded - try gemini-1.5-flash model")
-                elif "503" in error_msg or "UNAVAILABLE" in error_msg:
-                    self.logger.error("Gemini API overloaded")
-                    return self._default_result("API temporarily unavailable - retrying...")
-                elif "401" in error_msg or "UNAUTHENTICATED" in error_msg:
-                    self.logger.error("Gemini API authentication failed")
-                    return self._default_result("API authentication error - check API key")
-                else:
-                    self.logger.error(f"Vision API Error: {error_msg}")
-                    return self._default_result(f"API Error: {error_msg}")
+                return self._default_result(self._api_error_reason(api_error))
         
         except Exception as e:
             # Catch-all for unexpected errors
             self.logger.error(f"Unexpected error in vision processing: {e}", exc_info=True)
             return self._default_result(f"Processing Error: {str(e)}")
 
+    async def process_stream(
+        self,
+        frame: np.ndarray = None,
+        base64_image: str = None,
+        frame_number: int = 0,
+        image_bytes: bytes = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Streams a frame analysis, yielding an early partial result.
+
+        Uses generate_content_stream so consumers can react to the threat type
+        and severity before the full JSON (reasoning, subjects, ...) has arrived.
+
+        Args:
+            frame: Optional numpy array (OpenCV format) of the video frame.
+            base64_image: Optional base64 encoded string of the image.
+            frame_number: Current frame index used for temporal tracking.
+            image_bytes: Optional already-decoded image file (e.g. JPEG) bytes.
+
+        Yields:
+            Dict[str, Any]: First, once both fields have streamed in, a partial
+                result {"partial": True, "type": ..., "severity": ...}. Last, the
+                complete validated result, identical in shape to process(). On
+                errors or cache hits only the final result is yielded.
+        """
+        fingerprint = self._fingerprint(frame, base64_image, image_bytes)
+        cached = self._cached_result(fingerprint, frame_number)
+        if cached is None:
+            cached = self._motion_gate(frame, frame_number)
+        if cached is not None:
+            yield cached
+            return
+
+        try:
+            image_bytes = await asyncio.to_thread(
+                self._prepare_image_bytes, frame, base64_image, image_bytes
+            )
+        except Exception as img_error:
+            self.logger.error(f"Image preparation failed: {img_error}")
+            yield self._default_result(f"Image Error: {str(img_error)}")
+            return
+
+        text = ""
+        partial_sent = False
+        try:
+            stream = await self.client.aio.models.generate_content_stream(
+                model=self.model_name,
+                contents=[
+                    Content(role="user", parts=[
+                        _from_text(text=self._build_user_prompt()),
+                        _from_bytes(data=image_bytes, mime_type="image/jpeg")
+                    ])
+                ],
+                config=self._gen_config,
+            )
+            async for chunk in stream:
+                text += chunk.text or ""
+                if partial_sent:
+                    continue
+
+                type_match = _TYPE_FIELD_RE.search(text)
+                severity_match = _SEVERITY_FIELD_RE.search(text)
+                if type_match and severity_match:
+                    partial_sent = True
+                    severity = severity_match.group(1).lower()
+                    if severity not in _VALID_SEVERITIES:
+                        severity = "low"
+                    yield {"partial": True, "type": type_match.group(1), "severity": severity}
+        except Exception as api_error:
+            yield self._default_result(self._api_error_reason(api_error))
+            return
+
+        result = self._parse_json_response(text)
+        if not result:
+            self.logger.warning("JSON parsing returned None, using default")
+            yield self._default_result("JSON parsing failed")
+            return
+
+        validated = self._validate_result(result)
+        self._update_history(frame_number, validated)
+        self._remember(fingerprint, frame, validated)
+        yield validated
+
+    async def process_many(
+        self,
+        frames: List[Any],
+        start_frame: int = 0,
+        max_concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Analyzes several frames with concurrent, independent Gemini requests.
+
+        Unlike process_batch(), every frame gets its own request; the requests
+        are overlapped with a bounded asyncio.gather fan-out. Temporal history is
+        updated in completion order rather than frame order.
+
+        Args:
+            frames: Sequence of OpenCV frames (numpy arrays) or base64 strings.
+            start_frame: Frame index of the first element, used for temporal tracking.
+            max_concurrency: Maximum in-flight requests. Defaults to
+                settings.MAX_CONCURRENT_ANALYSES.
+
+        Returns:
+            List[Dict[str, Any]]: One result per input frame, in input order.
+        """
+        call_kwargs = [
+            {"base64_image": item, "frame_number": start_frame + offset}
+            if isinstance(item, str)
+            else {"frame": item, "frame_number": start_frame + offset}
+            for offset, item in enumerate(frames)
+        ]
+        return await self._process_concurrently(call_kwargs, max_concurrency)
+
+    async def process_batch(
+        self,
+        frames: List[Any],
+        start_frame: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Analyzes several frames with a single multi-image Gemini request.
+
+        Every image part is preceded by a "Frame k:" label and the model is asked
+        for a JSON array holding one assessment per frame, so the prompt and
+        system instruction overhead is paid once for the whole batch.
+
+        Args:
+            frames: Sequence of OpenCV frames (numpy arrays) or base64 strings.
+            start_frame: Frame index of the first element, used for temporal tracking.
+
+        Returns:
+            List[Dict[str, Any]]: One validated result per input frame, in input order.
+                Frames that could not be prepared or were missing from the model
+                output get a default result.
+        """
+        if not frames:
+            return []
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(frames)
+        prepared = []
+
+        # Prepare image bytes in worker threads, isolating bad frames from the batch
+        encoded = await asyncio.gather(
+            *(
+                asyncio.to_thread(self._prepare_image_bytes, None, item)
+                if isinstance(item, str)
+                else asyncio.to_thread(self._prepare_image_bytes, item, None)
+                for item in frames
+            ),
+            return_exceptions=True
+        )
+        for offset, image_bytes in enumerate(encoded):
+            if isinstance(image_bytes, Exception):
+                self.logger.error(f"Image preparation failed for batch item {offset}: {image_bytes}")
+                results[offset] = self._default_result(f"Image Error: {str(image_bytes)}")
+            else:
+                prepared.append((offset, image_bytes))
+
+        if prepared:
+            context = self._build_context()
+            user_prompt = (
+                f"Analyze each of the {len(prepared)} labelled frames below independently "
+                f"based on the security protocol. Return a JSON array with exactly "
+                f"{len(prepared)} objects, one per frame, in the order given."
+            )
+            if context:
+                user_prompt += f"\n\nTEMPORAL CONTEXT:\n{context}"
+
+            parts = [_from_text(text=user_prompt)]
+            for offset, image_bytes in prepared:
+                parts.append(_from_text(text=f"Frame {start_frame + offset}:"))
+                parts.append(_from_bytes(data=image_bytes, mime_type="image/jpeg"))
+
+            try:
+                response = await self.client.aio.models.generate_content(
+                    model=self.model_name,
+                    contents=[Content(role="user", parts=parts)],
+                    config=self._gen_config,
+                )
+                parsed = self._parse_json_response(response.text)
+                if not isinstance(parsed, list):
+                    self.logger.warning("Batch response was not a JSON array, using defaults")
+                    parsed = []
+                error_reason = "Frame missing from batch response"
+            except Exception as api_error:
+                parsed = []
+                error_reason = self._api_error_reason(api_error)
+
+            # Split the array back into per-frame results
+            for index, (offset, _) in enumerate(prepared):
+                item = parsed[index] if index < len(parsed) else None
+                if isinstance(item, dict):
+                    validated = self._validate_result(item)
+                    self._update_history(start_frame + offset, validated)
+                    results[offset] = validated
+                else:
+                    results[offset] = self._default_result(error_reason)
+
+        return results
+
+    def _api_error_reason(self, api_error: Exception) -> str:
+        """Maps a Gemini API exception to a user-facing reason string.
+
+        Args:
+            api_error: Exception raised by the GenAI client.
+
+        Returns:
+            str: Short explanation suitable for the result's reasoning field.
+        """
+        error_msg = str(api_error)
+
+        # Extract error code if present
+        if "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg:
+            self.logger.error("Gemini API quota exceeded")
+            return "API quota exceeded - try gemini-1.5-flash model"
+        elif "503" in error_msg or "UNAVAILABLE" in error_msg:
+            self.logger.error("Gemini API overloaded")
+            return "API temporarily unavailable - retrying..."
+        elif "401" in error_msg or "UNAUTHENTICATED" in error_msg:
+            self.logger.error("Gemini API authentication failed")
+            return "API authentication error - check API key"
+        else:
+            self.logger.error(f"Vision API Error: {error_msg}")
+            return f"API Error: {error_msg}"
+
+    @staticmethod
+    def decode_base64_image(base64_str: str) -> bytes:
+        """Decodes a base64 image, tolerating a data URI prefix and missing padding.
+
+        Args:
+            base64_str: Base64 string (with or without data URI prefix).
+
+        Returns:
+            bytes: Decoded image file bytes.
+
+        Raises:
+            ValueError: If the string cannot be decoded.
+        """
+        # Remove data URI prefix if present
+        if "," in base64_str:
+            base64_str = base64_str.split(",")[-1]
+
+        try:
+            # Pad to a multiple of 4 in one expression ("" when already aligned)
+            return b64.b64decode(base64_str + "==="[:-len(base64_str) & 3], validate=False)
+        except Exception as e:
+            raise ValueError(f"Base64 decode failed: {e}")
+
     def _prepare_image_bytes(
         self, 
         frame: Optional[np.ndarray], 
-        base64_str: Optional[str]
+        base64_str: Optional[str],
+        image_bytes: Optional[bytes] = None
     ) -> bytes:
-        """Normalizes image input into bytes, handling OpenCV frames and Base64 strings.
+        """Normalizes image input into bytes, handling OpenCV frames, Base64 strings and raw bytes.
+
+        Runs CPU-bound codec work, so async callers invoke it via asyncio.to_thread.
 
         Args:
             frame: Raw image array.
             base64_str: Base64 string (with or without data URI prefix).
+            image_bytes: Already-decoded image file bytes.
 
         Returns:
             bytes: JPEG encoded image data.
@@ -136,38 +471,228 @@ class VisionAgent(BaseAgent):
             ValueError: If no valid image source provided or encoding fails.
         """
         if frame is not None:
-            import cv2
-            success, buffer = cv2.imencode(".jpg", frame)
-            if not success:
-                raise ValueError("Could not encode frame to JPEG")
-            return buffer.tobytes()
+            return self._encode_jpeg(self._downscale(frame))
         
-        if base64_str:
-            # Remove data URI prefix if present
-            if "," in base64_str:
-                base64_str = base64_str.split(",")[-1]
+        if not image_bytes and base64_str:
+            image_bytes = self.decode_base64_image(base64_str)
+
+        if image_bytes:
+            # Only large uploads are worth a decode/resize/re-encode round-trip
+            if len(image_bytes) > self.RESIZE_BYTES_THRESHOLD:
+                import cv2
+                decoded = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+                if decoded is not None and max(decoded.shape[:2]) > self._max_side:
+                    return self._encode_jpeg(self._downscale(decoded))
+            return image_bytes
             
-            # Ensure proper padding for the base64 decoder
-            missing_padding = len(base64_str) % 4
-            if missing_padding:
-                base64_str += "=" * (4 - missing_padding)
-                
+        raise ValueError("No valid image source provided (frame, base64_image or image_bytes required)")
+
+    def _downscale(self, frame: np.ndarray) -> np.ndarray:
+        """Shrinks a frame so its longest side fits settings.VISION_MAX_SIDE.
+
+        Gemini bills image tokens by area, so frames larger than the model's
+        effective resolution only add upload time and cost.
+
+        Args:
+            frame: Raw image array.
+
+        Returns:
+            np.ndarray: The resized frame, or the original if already small enough.
+        """
+        h, w = frame.shape[:2]
+        scale = self._max_side / max(h, w)
+        if scale >= 1:
+            return frame
+
+        import cv2
+        return cv2.resize(
+            frame,
+            (max(1, int(w * scale)), max(1, int(h * scale))),
+            interpolation=cv2.INTER_AREA
+        )
+
+    def _encode_jpeg(self, frame: np.ndarray) -> bytes:
+        """Encodes a frame as JPEG using settings.JPEG_QUALITY.
+
+        Args:
+            frame: Raw image array.
+
+        Returns:
+            bytes: JPEG encoded image data.
+
+        Raises:
+            ValueError: If OpenCV fails to encode the frame.
+        """
+        import cv2
+        success, buffer = cv2.imencode(
+            ".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self._jpeg_quality]
+        )
+        if not success:
+            raise ValueError("Could not encode frame to JPEG")
+        return buffer.tobytes()
+
+    def _fingerprint(
+        self,
+        frame: Optional[np.ndarray],
+        base64_str: Optional[str],
+        image_bytes: Optional[bytes] = None
+    ) -> Optional[bytes]:
+        """Computes a fingerprint used to recognise repeated frames.
+
+        Frames are hashed byte-for-byte, so only an exact repeat (a frozen or
+        duplicated camera frame) is answered from the cache; a small change such
+        as a distant intruder always gets a new key. Near-identical frames are
+        left to the motion gate. Uploads are hashed as-is.
+
+        Args:
+            frame: Raw image array.
+            base64_str: Base64 string (with or without data URI prefix).
+            image_bytes: Already-decoded image file bytes.
+
+        Returns:
+            Optional[bytes]: 8-byte digest, or None if the input can't be fingerprinted.
+        """
+        try:
+            if frame is not None:
+                digest = hashlib.blake2b(str(frame.shape).encode(), digest_size=8)
+                digest.update(np.ascontiguousarray(frame).data)
+                return digest.digest()
+            if image_bytes:
+                return hashlib.blake2b(image_bytes, digest_size=8).digest()
+            if base64_str:
+                return hashlib.blake2b(base64_str.encode(), digest_size=8).digest()
+        except Exception as e:
+            self.logger.debug(f"Frame fingerprint failed: {e}")
+        return None
+
+    def _cached_result(
+        self,
+        fingerprint: Optional[bytes],
+        frame_number: int
+    ) -> Optional[Dict[str, Any]]:
+        """Returns a copy of a cached analysis for a repeated scene, if any.
+
+        Args:
+            fingerprint: Frame fingerprint from _fingerprint(), or None.
+            frame_number: Current frame index, recorded in the history on a hit.
+
+        Returns:
+            Optional[Dict[str, Any]]: Copy of the cached result, or None on a miss.
+        """
+        cached = self._result_cache.get(fingerprint) if fingerprint else None
+        if cached is None:
+            return None
+
+        self._result_cache.move_to_end(fingerprint)
+        self.cache_hits += 1
+        self._update_history(frame_number, cached)
+        return copy.deepcopy(cached)
+
+    def _motion_gate(
+        self,
+        frame: Optional[np.ndarray],
+        frame_number: int
+    ) -> Optional[Dict[str, Any]]:
+        """Reuses the last analysis when a camera frame shows no significant motion.
+
+        The frame is compared against the last frame that was actually analyzed,
+        so slow changes accumulate until they cross settings.MOTION_THRESHOLD.
+
+        Args:
+            frame: Raw image array, or None for base64 input (never gated).
+            frame_number: Current frame index, recorded in the history on a skip.
+
+        Returns:
+            Optional[Dict[str, Any]]: Copy of the last result, or None if the
+                frame must be sent to Gemini.
+        """
+        if frame is None or self._last_thumb is None or self._last_result is None:
+            return None
+
+        try:
+            delta = frame_delta(self._last_thumb, motion_thumbnail(frame))
+        except Exception as e:
+            self.logger.debug(f"Motion gate failed: {e}")
+            return None
+
+        if delta >= self._motion_threshold:
+            return None
+
+        self.motion_skips += 1
+        self._update_history(frame_number, self._last_result)
+        return copy.deepcopy(self._last_result)
+
+    def _remember(
+        self,
+        fingerprint: Optional[bytes],
+        frame: Optional[np.ndarray],
+        result: Dict[str, Any]
+    ):
+        """Records a successful analysis for the result cache and motion gate.
+
+        Args:
+            fingerprint: Frame fingerprint from _fingerprint(), or None.
+            frame: Raw image array, or None for base64 input.
+            result: Validated analysis result.
+        """
+        if fingerprint:
+            self._cache_result(fingerprint, result)
+        if frame is not None:
             try:
-                return base64.b64decode(base64_str)
+                self._last_thumb = motion_thumbnail(frame)
+                self._last_result = copy.deepcopy(result)
             except Exception as e:
-                raise ValueError(f"Base64 decode failed: {e}")
-            
-        raise ValueError("No valid image source provided (frame or base64_image required)")
+                self.logger.debug(f"Motion thumbnail failed: {e}")
+
+    def _cache_result(self, fingerprint: bytes, result: Dict[str, Any]):
+        """Stores a successful analysis, evicting the least recently used entry.
+
+        Args:
+            fingerprint: Frame fingerprint from _fingerprint().
+            result: Validated analysis result.
+        """
+        self._result_cache[fingerprint] = copy.deepcopy(result)
+        self._result_cache.move_to_end(fingerprint)
+        if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Returns agent metrics including skipped Gemini calls.
+
+        Returns:
+            Dict[str, Any]: Base agent metrics plus cache_hits and motion_skips.
+        """
+        stats = super().get_stats()
+        stats["cache_hits"] = self.cache_hits
+        stats["motion_skips"] = self.motion_skips
+        return stats
 
     def _build_context(self) -> str:
         """Returns the newline-separated history of recent detections.
         
+        The string is formatted lazily and cached until the history changes.
+        
         Returns:
             str: Formatted string of recent frame analysis history.
         """
-        if not self.frame_history:
-            return ""
-        return "\n".join(self.frame_history)
+        if self._context_cache is None:
+            self._context_cache = "\n".join(
+                f"Frame {frame_num}: {incident_type} ({severity}, {confidence}% conf)"
+                for frame_num, incident_type, severity, confidence in self.frame_history
+            )
+        return self._context_cache
+
+    def _build_user_prompt(self) -> str:
+        """Returns the per-frame user prompt, including temporal context if any.
+        
+        Returns:
+            str: Prompt text sent alongside the image.
+        """
+        user_prompt = "Analyze the input based on the security protocol."
+        context = self._build_context()
+        if context:
+            user_prompt += f"\n\nTEMPORAL CONTEXT:\n{context}"
+        return user_prompt
 
     def _update_history(self, frame_num: int, result: Dict):
         """Adds the current detection to the sliding window history.
@@ -176,12 +701,13 @@ class VisionAgent(BaseAgent):
             frame_num: Current frame number
             result: Analysis result dictionary
         """
-        incident_type = result.get('type', 'normal')
-        severity = result.get('severity', 'low')
-        confidence = result.get('confidence', 0)
-        
-        summary = f"Frame {frame_num}: {incident_type} ({severity}, {confidence}% conf)"
-        self.frame_history.append(summary)
+        self.frame_history.append((
+            frame_num,
+            result.get('type', 'normal'),
+            result.get('severity', 'low'),
+            result.get('confidence', 0)
+        ))
+        self._context_cache = None
 
     def _validate_result(self, result: Dict) -> Dict:
         """Clamps confidence scores and ensures all required fields are present.
@@ -195,42 +721,21 @@ class VisionAgent(BaseAgent):
         Returns:
             Dict: Validated result with all required fields
         """
-        # Clamp confidence to 0-100 range
-        raw_conf = result.get("confidence", 0)
-        try:
-            confidence = max(0, min(100, int(raw_conf)))
-        except (ValueError, TypeError):
-            confidence = 0
-        
-        # Determine incident status based on confidence threshold
-        is_incident = result.get("incident", False)
-        if confidence < settings.CONFIDENCE_THRESHOLD:
-            is_incident = False
-
-        # Normalize severity
-        severity = str(result.get("severity", "low")).lower()
-        if severity not in ["low", "medium", "high", "critical"]:
-            severity = "low"
-
-        # Ensure subjects is a list
-        subjects = result.get("subjects", [])
-        if not isinstance(subjects, list):
-            subjects = []
-        
-        # Ensure recommended_actions is a list
-        recommended_actions = result.get("recommended_actions", [])
-        if not isinstance(recommended_actions, list):
-            recommended_actions = []
+        # Fresh lists so callers never mutate the shared template
+        out = {**self._DEFAULTS, "subjects": [], "recommended_actions": []}
+        for key, coerce in self._COERCERS.items():
+            if key in result:
+                out[key] = coerce(result[key])
 
-        return {
-            "incident": bool(is_incident),
-            "type": result.get("type", "unknown"),
-            "severity": severity,
-            "confidence": confidence,
-            "reasoning": result.get("reasoning", "No explanation provided"),
-            "subjects": subjects,
-            "recommended_actions": recommended_actions
-        }
+        # Low-confidence detections are never reported as incidents
+        if out["confidence"] < self._conf_threshold:
+            out["incident"] = False
+
+        return out
+
+    def _fallback_result(self, error: Exception, args: tuple, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Returns a default non-incident result when process() raises."""
+        return self._default_result(str(error))
 
     def _default_result(self, error_msg: str) -> Dict[str, Any]:
         """Returns a safe, non-incident result in case of processing errors.
@@ -3,16 +3,83 @@ Email Service Route - Gmail SMTP Integration
 Add this to your routes.py file
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple, Union
 import aiosmtplib
+import asyncio
+import base64
+import hashlib
+import math
+import time
+import uuid
+import email.policy
+from collections import OrderedDict
+from email.header import Header
 from email.message import EmailMessage
+from email.utils import formataddr
 import logging
 
 logger = logging.getLogger(__name__)
 
-email_router = APIRouter(prefix="/email", tags=["email"])
+# Set here as well as on /api so these routes keep orjson wherever
+# the router is mounted
+email_router = APIRouter(
+    prefix="/email",
+    tags=["email"],
+    default_response_class=ORJSONResponse
+)
+
+# Authenticated SMTP sessions are kept warm this long (seconds) between sends
+SMTP_IDLE_TTL = 100.0
+# Most sessions kept open at once; callers choose the SMTP account, so the
+# pool is an LRU and the least recently used session is closed past the cap
+SMTP_POOL_MAX = 32
+
+# (host, port, user, password digest) -> (connection, per-connection lock, last used)
+_SMTPKey = Tuple[str, int, str, str]
+_SMTPEntry = Tuple[aiosmtplib.SMTP, asyncio.Lock, float]
+_smtp_pool: "OrderedDict[_SMTPKey, _SMTPEntry]" = OrderedDict()
+# Guards _smtp_pool/_smtp_connecting only; never held across network I/O
+_smtp_pool_lock = asyncio.Lock()
+# Connects in progress, so concurrent sends for one account share a single login
+_smtp_connecting: Dict[_SMTPKey, asyncio.Future] = {}
+
+# Upper bound on concurrent outbound submissions (stays under provider rate limits)
+SMTP_MAX_CONCURRENT_SENDS = 16
+_send_semaphore = asyncio.Semaphore(SMTP_MAX_CONCURRENT_SENDS)
+
+# Per-account token bucket: sustained sends per second and burst size
+SEND_RATE_PER_SECOND = 0.5
+SEND_BURST = 10
+SEND_BUCKETS_MAX = 1024
+
+# (host, user) -> (tokens, last refill)
+_send_buckets: Dict[Tuple[str, str], Tuple[float, float]] = {}
+
+# Serialized message bodies (everything but the To: header) keyed by
+# (from, subject, html digest); FIFO-evicted past MIME_CACHE_SIZE entries
+MIME_CACHE_SIZE = 256
+_mime_cache: Dict[Tuple[str, str, bytes], bytes] = {}
+_SMTP_POLICY = email.policy.SMTP
+_PLAIN_FALLBACK = "Please view this email in HTML mode"
+
+# A message is either pre-serialized bytes or, for non-ASCII recipients, an EmailMessage
+_OutgoingMail = Union[bytes, EmailMessage]
+
+# Request limits: RFC 5322 line length for the subject; HTML bodies stay far
+# below provider message caps so oversized mail never reaches the DATA phase
+EMAIL_SUBJECT_MAX_LENGTH = 998
+EMAIL_HTML_MAX_LENGTH = 1_000_000
+
+# Results of /email/test probes are reused for this long (seconds); the
+# endpoint is unauthenticated, so the cache is also capped (LRU)
+SMTP_VALIDATION_TTL = 300.0
+SMTP_VALIDATION_CACHE_SIZE = 256
+
+# Same key as the pool -> (probe response, checked at)
+_smtp_validation_cache: "OrderedDict[_SMTPKey, Tuple[Dict[str, Any], float]]" = OrderedDict()
 
 
 class SMTPConfig(BaseModel):
@@ -25,15 +92,316 @@ class SMTPConfig(BaseModel):
 class EmailRequest(BaseModel):
     to: EmailStr
     from_: EmailStr = Field(alias="from")
-    subject: str
-    html: str
+    subject: str = Field(max_length=EMAIL_SUBJECT_MAX_LENGTH)
+    html: str = Field(max_length=EMAIL_HTML_MAX_LENGTH)
     smtpConfig: SMTPConfig
 
 
+def _compose(from_: str, subject: str, html: str, to: Optional[str] = None) -> EmailMessage:
+    """Builds the HTML email with a plain-text fallback part."""
+    message = EmailMessage()
+    message["From"] = from_
+    if to is not None:
+        message["To"] = to
+    message["Subject"] = subject
+    message.set_content(_PLAIN_FALLBACK)
+    message.add_alternative(html, subtype="html")
+    return message
+
+
+def _encode_subject(subject: str) -> bytes:
+    """Returns the Subject: value as-is when it is plain ASCII, RFC 2047-encoded otherwise."""
+    if subject.isascii() and subject.isprintable() and len(subject) <= 900:
+        return subject.encode()
+    return Header(subject, "utf-8").encode().replace("\n", "\r\n").encode()
+
+
+def _render_body(from_: str, subject: str, html: str) -> bytes:
+    """Serializes everything but the To: header straight to wire bytes.
+
+    Skips EmailMessage, whose header assignment re-parses and normalizes every
+    header on every send. The HTML part is base64-encoded, so arbitrary markup
+    never needs line-length or dot-stuffing care.
+
+    Args:
+        from_: ASCII sender address.
+        subject: Subject line.
+        html: HTML body.
+
+    Returns:
+        bytes: CRLF-terminated headers and multipart/alternative body.
+    """
+    boundary = f"=_aegis_{uuid.uuid4().hex}"
+    html_b64 = base64.encodebytes(html.encode()).replace(b"\n", b"\r\n")
+    return b"".join((
+        b"From: ", formataddr((None, from_)).encode(), b"\r\n",
+        b"Subject: ", _encode_subject(subject), b"\r\n",
+        b"MIME-Version: 1.0\r\n",
+        f'Content-Type: multipart/alternative; boundary="{boundary}"\r\n\r\n'.encode(),
+        f"--{boundary}\r\n".encode(),
+        b'Content-Type: text/plain; charset="utf-8"\r\n',
+        b"Content-Transfer-Encoding: 7bit\r\n\r\n",
+        _PLAIN_FALLBACK.encode(), b"\r\n",
+        f"--{boundary}\r\n".encode(),
+        b'Content-Type: text/html; charset="utf-8"\r\n',
+        b"Content-Transfer-Encoding: base64\r\n\r\n",
+        html_b64,
+        f"--{boundary}--\r\n".encode(),
+    ))
+
+
+def _build_message(from_: str, to: str, subject: str, html: str) -> _OutgoingMail:
+    """Returns the wire form of an email, reusing the MIME body for repeated templates.
+
+    Only the To: header differs between recipients of the same notification, so
+    the rest of the message is serialized once and cached.
+
+    Args:
+        from_: Sender address.
+        to: Recipient address.
+        subject: Subject line.
+        html: HTML body.
+
+    Returns:
+        _OutgoingMail: CRLF-terminated message bytes, or an EmailMessage for
+            non-ASCII addresses (left to aiosmtplib's SMTPUTF8 handling).
+    """
+    if not (to.isascii() and from_.isascii()):
+        return _compose(from_, subject, html, to=to)
+
+    key = (from_, subject, hashlib.blake2b(html.encode(), digest_size=16).digest())
+    body = _mime_cache.get(key)
+    if body is None:
+        body = _render_body(from_, subject, html)
+        if len(_mime_cache) >= MIME_CACHE_SIZE:
+            del _mime_cache[next(iter(_mime_cache))]
+        _mime_cache[key] = body
+    return b"To: " + to.encode() + b"\r\n" + body
+
+
+def _smtp_key(cfg: SMTPConfig) -> _SMTPKey:
+    """Builds the pool key for an SMTP config without keeping the plaintext password."""
+    digest = hashlib.blake2b(cfg.pass_.encode(), digest_size=16).hexdigest()
+    return (cfg.host, cfg.port, cfg.user, digest)
+
+
+async def _close_quietly(conn: aiosmtplib.SMTP):
+    """Ends an SMTP session, ignoring errors from already-dead sockets."""
+    try:
+        await conn.quit()
+    except Exception:
+        conn.close()
+
+
+async def _get_smtp(cfg: SMTPConfig) -> Tuple[_SMTPKey, aiosmtplib.SMTP, asyncio.Lock]:
+    """Returns a warm, authenticated SMTP session for a config.
+
+    Sessions idle longer than SMTP_IDLE_TTL are replaced with a fresh
+    connection (TCP + STARTTLS + AUTH); opening one past SMTP_POOL_MAX closes
+    the least recently used session. The pool lock only covers the lookup
+    and the pool update, so a slow server never holds up other accounts;
+    concurrent callers for the same account wait on one shared connect.
+
+    Args:
+        cfg: SMTP server and credentials.
+
+    Returns:
+        Tuple[_SMTPKey, aiosmtplib.SMTP, asyncio.Lock]: Pool key, connection, and
+            the lock that must be held while using the connection.
+    """
+    key = _smtp_key(cfg)
+    stale = None
+    async with _smtp_pool_lock:
+        entry = _smtp_pool.get(key)
+        if entry is not None:
+            conn, lock, last_used = entry
+            if conn.is_connected and time.monotonic() - last_used <= SMTP_IDLE_TTL:
+                _smtp_pool.move_to_end(key)
+                return key, conn, lock
+            del _smtp_pool[key]
+            stale = entry
+
+        pending = _smtp_connecting.get(key)
+        owner = pending is None
+        if owner:
+            pending = _smtp_connecting[key] = asyncio.get_running_loop().create_future()
+
+    if stale is not None:
+        # Waits only for a send still running on this account's old session
+        async with stale[1]:
+            await _close_quietly(stale[0])
+
+    if not owner:
+        conn, lock = await asyncio.shield(pending)
+        return key, conn, lock
+
+    conn = aiosmtplib.SMTP(
+        hostname=cfg.host,
+        port=cfg.port,
+        username=cfg.user,
+        password=cfg.pass_,
+        start_tls=True,
+        timeout=30
+    )
+    try:
+        await conn.connect()
+    except BaseException as e:
+        conn.close()
+        async with _smtp_pool_lock:
+            _smtp_connecting.pop(key, None)
+        if isinstance(e, asyncio.CancelledError):
+            e = ConnectionError("SMTP connect was cancelled")
+        pending.set_exception(e)
+        pending.exception()  # Waiters re-raise it; don't warn if there are none
+        raise
+
+    lock = asyncio.Lock()
+    async with _smtp_pool_lock:
+        _smtp_pool[key] = (conn, lock, time.monotonic())
+        _smtp_pool.move_to_end(key)
+        _smtp_connecting.pop(key, None)
+        evicted = [
+            _smtp_pool.popitem(last=False)[1]
+            for _ in range(len(_smtp_pool) - SMTP_POOL_MAX)
+        ]
+    pending.set_result((conn, lock))
+
+    for old_conn, old_lock, _ in evicted:
+        # Waits only for a send still running on the evicted session
+        async with old_lock:
+            await _close_quietly(old_conn)
+    return key, conn, lock
+
+
+async def _evict_smtp(key: _SMTPKey, conn: aiosmtplib.SMTP):
+    """Drops a broken connection from the pool if it is still the pooled one."""
+    async with _smtp_pool_lock:
+        entry = _smtp_pool.get(key)
+        if entry is not None and entry[0] is conn:
+            del _smtp_pool[key]
+    conn.close()
+
+
+async def _send_pooled(message: _OutgoingMail, sender: str, recipient: str, cfg: SMTPConfig):
+    """Sends a message over a pooled SMTP session.
+
+    A session dropped by the server while idle is reconnected once.
+
+    Args:
+        message: Output of _build_message().
+        sender: Envelope sender address.
+        recipient: Envelope recipient address.
+        cfg: SMTP server and credentials.
+    """
+    for attempt in range(2):
+        key, conn, lock = await _get_smtp(cfg)
+        try:
+            async with lock:
+                if isinstance(message, bytes):
+                    await conn.sendmail(sender, [recipient], message)
+                else:
+                    await conn.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            await _evict_smtp(key, conn)
+            if attempt:
+                raise
+            continue
+        except Exception:
+            await _evict_smtp(key, conn)
+            raise
+
+        if _smtp_pool.get(key, (None,))[0] is conn:
+            _smtp_pool[key] = (conn, lock, time.monotonic())
+            _smtp_pool.move_to_end(key)
+        return
+
+
+async def _deliver(message: _OutgoingMail, sender: str, recipient: str, cfg: SMTPConfig):
+    """Background task that submits a queued message.
+
+    The HTTP caller has already been answered, so failures are only logged.
+
+    Args:
+        message: Output of _build_message().
+        sender: Envelope sender address.
+        recipient: Envelope recipient address.
+        cfg: SMTP server and credentials.
+    """
+    async with _send_semaphore:
+        try:
+            await _send_pooled(message, sender, recipient, cfg)
+        except aiosmtplib.SMTPAuthenticationError as e:
+            logger.error("SMTP Authentication failed for %s: %s", recipient, e)
+            return
+        except Exception:
+            logger.exception("Failed to send email to %s", recipient)
+            return
+
+    logger.info("Email sent successfully to %s", recipient)
+
+
+def _take_send_token(cfg: SMTPConfig) -> float:
+    """Takes one token from the sending account's bucket.
+
+    Args:
+        cfg: SMTP server and credentials of the sending account.
+
+    Returns:
+        float: 0 if the send may proceed, otherwise seconds until a token is available.
+    """
+    now = time.monotonic()
+    key = (cfg.host, cfg.user)
+    tokens, last = _send_buckets.get(key, (SEND_BURST, now))
+    tokens = min(SEND_BURST, tokens + (now - last) * SEND_RATE_PER_SECOND)
+    if tokens < 1:
+        _send_buckets[key] = (tokens, now)
+        return (1 - tokens) / SEND_RATE_PER_SECOND
+
+    if key not in _send_buckets and len(_send_buckets) >= SEND_BUCKETS_MAX:
+        # Buckets idle long enough to have refilled carry no state; drop them
+        refill_time = SEND_BURST / SEND_RATE_PER_SECOND
+        for stale in [k for k, (_, t) in _send_buckets.items() if now - t >= refill_time]:
+            del _send_buckets[stale]
+    _send_buckets[key] = (tokens - 1, now)
+    return 0.0
+
+
+async def close_idle_smtp_connections(max_idle: float = SMTP_IDLE_TTL) -> int:
+    """Closes pooled SMTP sessions idle for longer than max_idle seconds.
+
+    Args:
+        max_idle: Idle time in seconds; 0 closes every pooled session.
+
+    Returns:
+        int: Number of sessions closed.
+    """
+    now = time.monotonic()
+    async with _smtp_pool_lock:
+        stale = [key for key, (_, _, last_used) in _smtp_pool.items() if now - last_used >= max_idle]
+        entries = [_smtp_pool.pop(key) for key in stale]
+
+    for conn, lock, _ in entries:
+        async with lock:
+            await _close_quietly(conn)
+    return len(entries)
+
+
+async def reap_idle_smtp_connections(interval: float = SMTP_IDLE_TTL / 2):
+    """Background loop that closes idle pooled SMTP sessions until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        closed = await close_idle_smtp_connections()
+        if closed:
+            logger.debug("Closed %d idle SMTP connection(s)", closed)
+
+
 @email_router.post("/send")
-async def send_email(request: EmailRequest):
+async def send_email(request: EmailRequest, background_tasks: BackgroundTasks):
     """
-    Send email via Gmail SMTP
+    Queue an email for delivery via Gmail SMTP
+    
+    The message is sent in the background after the response is returned;
+    delivery failures are logged server-side.
     
     Requires Gmail App Password:
     1. Enable 2-Step Verification in Google Account
@@ -41,85 +409,86 @@ async def send_email(request: EmailRequest):
     3. Generate password for "Mail" app
     4. Use the 16-character password here
     """
-    
-    try:
-        # Create email message
-        message = EmailMessage()
-        message["From"] = request.from_
-        message["To"] = request.to
-        message["Subject"] = request.subject
-        message.set_content("Please view this email in HTML mode")
-        message.add_alternative(request.html, subtype="html")
-        
-        # Send via Gmail SMTP
-        await aiosmtplib.send(
-            message,
-            hostname=request.smtpConfig.host,
-            port=request.smtpConfig.port,
-            username=request.smtpConfig.user,
-            password=request.smtpConfig.pass_,
-            start_tls=True,
-            timeout=30
-        )
-        
-        logger.info(f"Email sent successfully to {request.to}")
-        
-        return {
-            "success": True,
-            "message": "Email sent successfully",
-            "to": request.to
-        }
-        
-    except aiosmtplib.SMTPAuthenticationError as e:
-        logger.error(f"SMTP Authentication failed: {e}")
-        raise HTTPException(
-            status_code=401,
-            detail="SMTP authentication failed. Check your Gmail App Password."
-        )
-        
-    except aiosmtplib.SMTPException as e:
-        logger.error(f"SMTP error: {e}")
+    retry_after = _take_send_token(request.smtpConfig)
+    if retry_after:
         raise HTTPException(
-            status_code=500,
-            detail=f"Failed to send email: {str(e)}"
+            status_code=429,
+            detail="Email rate limit exceeded for this account",
+            headers={"Retry-After": str(math.ceil(retry_after))}
         )
+
+    try:
+        # Create email message (body reused for repeated notifications)
+        message = _build_message(request.from_, request.to, request.subject, request.html)
         
     except Exception as e:
-        logger.error(f"Unexpected error sending email: {e}")
+        logger.error("Could not build email to %s: %s", request.to, e)
         raise HTTPException(
-            status_code=500,
-            detail=f"Unexpected error: {str(e)}"
+            status_code=400,
+            detail=f"Invalid email: {str(e)}"
         )
+    
+    # Send via Gmail SMTP once the response is out
+    background_tasks.add_task(_deliver, message, request.from_, request.to, request.smtpConfig)
+    
+    return {
+        "success": True,
+        "queued": True,
+        "message": "Email queued for delivery",
+        "to": request.to
+    }
 
 
 @email_router.post("/test")
-async def test_email_config(smtp_config: SMTPConfig):
-    """Test SMTP configuration"""
-    
+async def test_email_config(smtp_config: SMTPConfig, refresh: bool = False):
+    """Test SMTP configuration
+
+    Successful logins and rejected credentials are cached for
+    SMTP_VALIDATION_TTL seconds so repeated checks don't hit the provider.
+    Pass refresh=true to force a new probe.
+    """
+    key = _smtp_key(smtp_config)
+    cached = _smtp_validation_cache.get(key)
+    if cached is not None and not refresh and time.monotonic() - cached[1] < SMTP_VALIDATION_TTL:
+        _smtp_validation_cache.move_to_end(key)
+        return cached[0]
+
     try:
-        # Simple SMTP connection test
+        # Connecting performs STARTTLS and LOGIN with the supplied credentials
         async with aiosmtplib.SMTP(
             hostname=smtp_config.host,
             port=smtp_config.port,
+            username=smtp_config.user,
+            password=smtp_config.pass_,
+            start_tls=True,
             timeout=10
-        ) as smtp:
-            await smtp.connect()
-            await smtp.starttls()
-            await smtp.login(smtp_config.user, smtp_config.pass_)
+        ):
+            pass
             
-        return {
+        result = {
             "success": True,
             "message": "SMTP configuration is valid"
         }
         
     except aiosmtplib.SMTPAuthenticationError:
-        return {
+        result = {
             "success": False,
             "message": "Authentication failed. Check your Gmail App Password."
         }
         
     except Exception as e:
+        # Network/server errors are transient, so they are not cached
         return {
             "success": False,
             "message": f"Configuration test failed: {str(e)}"
         }
+
+    now = time.monotonic()
+    for expired in [k for k, (_, checked_at) in _smtp_validation_cache.items()
+                    if now - checked_at >= SMTP_VALIDATION_TTL]:
+        del _smtp_validation_cache[expired]
+    _smtp_validation_cache[key] = (result, now)
+    _smtp_validation_cache.move_to_end(key)
+    while len(_smtp_validation_cache) > SMTP_VALIDATION_CACHE_SIZE:
+        _smtp_validation_cache.popitem(last=False)
+    return result
@@ -9,30 +9,77 @@ This module implements RESTful endpoints for the dual-agent intelligence core,
 providing intent-based threat analysis and automated response coordination.
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional, List
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse, Response
+from typing import Any, Dict, Optional, List, Tuple
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
+import asyncio
 import logging
+import time
+from collections import OrderedDict
 
 from services.database_service import db_service
+from services.analysis_queue import analysis_queue
 from agents.vision_agent import VisionAgent
 from agents.planner_agent import PlannerAgent
 from api.email_routes import email_router
+from utils.static_response import StaticJSON
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
-# Initialize router
-router = APIRouter(prefix="/api", tags=["NeuroAegis Cortex API"])
+# Initialize router (orjson serializes the JSON-heavy incident/stats payloads)
+router = APIRouter(
+    prefix="/api",
+    tags=["NeuroAegis Cortex API"],
+    default_response_class=ORJSONResponse
+)
 router.include_router(email_router)
 
-# Initialize dual-agent architecture (singleton pattern)
+# Dual-agent architecture (singleton pattern), built by the app lifespan
 # These agents form the core intelligence layers:
 # - Vision Agent: Sensory Intelligence Layer (perception & intent inference)
 # - Planner Agent: Tactical Intelligence Layer (response planning)
-vision_agent = VisionAgent()
-planner_agent = PlannerAgent()
+def _app_agent(request: Request, name: str, agent_cls):
+    """Returns the app-wide agent stored on app.state, creating it on first use.
+
+    The lifespan normally creates both agents at startup; the lazy path covers
+    apps run without it (e.g. a TestClient used outside a `with` block).
+    """
+    agent = getattr(request.app.state, name, None)
+    if agent is None:
+        agent = agent_cls()
+        setattr(request.app.state, name, agent)
+    return agent
+
+
+def get_vision_agent(request: Request) -> VisionAgent:
+    """Dependency providing the shared VisionAgent."""
+    return _app_agent(request, "vision_agent", VisionAgent)
+
+
+def get_planner_agent(request: Request) -> PlannerAgent:
+    """Dependency providing the shared PlannerAgent."""
+    return _app_agent(request, "planner_agent", PlannerAgent)
+
+
+# Allowed filter/status values (hash lookup instead of a regex per request)
+_SEVERITIES = frozenset({"low", "medium", "high", "critical"})
+_STATUSES = frozenset({"active", "resolved", "escalated", "dismissed"})
+
+# Health probes reuse the last database check; failures expire sooner so
+# recovery is picked up quickly
+HEALTH_CACHE_TTL = 5.0
+HEALTH_FAILURE_TTL = 1.0
+_health_cache: Dict[str, Tuple[str, float]] = {}  # component -> (status, expires at)
+
+# Recently fetched incidents: id -> (incident, expires at, db incident_version).
+# Any incident write through db_service bumps the version, which invalidates
+# every entry, whichever module made the write
+INCIDENT_CACHE_SIZE = 1024
+INCIDENT_CACHE_TTL = 30.0
+_incident_cache: "OrderedDict[int, Tuple[Dict[str, Any], float, int]]" = OrderedDict()
 
 
 # ============================================================================
@@ -47,11 +94,27 @@ class AnalyzeRequest(BaseModel):
     Transmits event-relevant frames (not continuous streams) to preserve
     privacy and minimize bandwidth. Only selected frames are analyzed.
     """
-    image: str = Field(
+    image: bytes = Field(
         ...,
-        description="Base64-encoded image frame for intent-based analysis"
+        description="Base64-encoded image frame for intent-based analysis",
+        json_schema_extra={"format": "base64"}
     )
 
+    @field_validator("image", mode="before")
+    @classmethod
+    def decode_image(cls, v):
+        """Decodes the base64 payload once, at the edge, into raw image bytes.
+
+        Undecodable payloads are rejected with 422 (the error body never
+        echoes the payload back; see the handler in main.py).
+        """
+        if isinstance(v, str):
+            try:
+                return VisionAgent.decode_base64_image(v)
+            except ValueError:
+                raise ValueError("invalid base64 image") from None
+        return v
+
 
 class AnalyzeResponse(BaseModel):
     """
@@ -106,6 +169,10 @@ class IncidentResponse(BaseModel):
     created_at: str
 
 
+# Fields serialized by /incidents, which bypasses IncidentResponse validation
+_INCIDENT_FIELDS = tuple(IncidentResponse.model_fields)
+
+
 class StatsResponse(BaseModel):
     """
     System-wide statistics for operational monitoring
@@ -152,6 +219,79 @@ async def root():
     }
 
 
+async def _fetch_incident(incident_id: int) -> Optional[Dict[str, Any]]:
+    """Returns an incident, serving repeated fetches from the LRU cache.
+
+    Args:
+        incident_id: Incident primary key.
+
+    Returns:
+        Optional[Dict[str, Any]]: Incident record, or None if it doesn't exist.
+    """
+    version = db_service.incident_version
+    entry = _incident_cache.get(incident_id)
+    if entry is not None:
+        if entry[2] == version and time.monotonic() < entry[1]:
+            _incident_cache.move_to_end(incident_id)
+            return entry[0]
+        del _incident_cache[incident_id]
+
+    # The version is read before the query, so a write that lands while it
+    # runs leaves this entry already stale
+    incident = await asyncio.to_thread(db_service.get_incident_by_id, incident_id)
+    if incident:
+        _incident_cache[incident_id] = (incident, time.monotonic() + INCIDENT_CACHE_TTL, version)
+        if len(_incident_cache) > INCIDENT_CACHE_SIZE:
+            _incident_cache.popitem(last=False)
+    return incident
+
+
+# Response timestamps are reused within this window (seconds)
+TIMESTAMP_GRANULARITY = 0.5
+_now_cache = ["", 0.0]  # [iso string, epoch seconds it was computed at]
+
+
+def _now_iso() -> str:
+    """Returns the current local time in ISO 8601, reformatted at most every 0.5 s."""
+    t = time.time()
+    if t - _now_cache[1] >= TIMESTAMP_GRANULARITY:
+        _now_cache[0] = datetime.fromtimestamp(t).isoformat()
+        _now_cache[1] = t
+    return _now_cache[0]
+
+
+def _require_choice(name: str, value: Optional[str], allowed: frozenset):
+    """Rejects a query value outside its allowed set with a 422."""
+    if value is not None and value not in allowed:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Invalid {name} '{value}'. Expected one of: {', '.join(sorted(allowed))}"
+        )
+
+
+async def _database_health() -> str:
+    """Returns the database component status, probing at most once per TTL.
+
+    The probe runs in a worker thread so a slow query never stalls the event loop.
+
+    Returns:
+        str: "operational" or "degraded: <error>".
+    """
+    cached = _health_cache.get("db")
+    if cached is not None and time.monotonic() < cached[1]:
+        return cached[0]
+
+    try:
+        await asyncio.to_thread(db_service.get_statistics)
+        status, ttl = "operational", HEALTH_CACHE_TTL
+    except Exception as e:
+        logger.error("Database health check failed: %s", e)
+        status, ttl = f"degraded: {str(e)}", HEALTH_FAILURE_TTL
+
+    _health_cache["db"] = (status, time.monotonic() + ttl)
+    return status
+
+
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """
@@ -164,35 +304,38 @@ async def health_check():
     
     Returns structured health assessment for monitoring systems.
     """
+    # Validate database connectivity (cached for a few seconds); the other
+    # components are in-process and operational whenever this code runs
+    database_status = await _database_health()
+    degraded = database_status != "operational"
+
     components = {
         "vision_agent_sensory_layer": "operational",
         "planner_agent_tactical_layer": "operational",
-        "database_persistence": "operational",
+        "database_persistence": database_status,
         "dual_agent_architecture": "operational"
     }
     
-    # Validate database connectivity
-    try:
-        db_service.get_statistics()
-    except Exception as e:
-        logger.error(f"Database health check failed: {e}")
-        components["database_persistence"] = f"degraded: {str(e)}"
-    
     # Determine overall status
-    status = "healthy" if all(
-        "operational" in v for v in components.values()
-    ) else "degraded"
+    status = "degraded" if degraded else "healthy"
     
     return {
         "status": status,
         "components": components,
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": _now_iso(),
         "version": "1.0.0"
     }
 
 
 @router.post("/analyze", response_model=AnalyzeResponse)
-async def analyze_frame(request: AnalyzeRequest):
+async def analyze_frame(
+    request: AnalyzeRequest,
+    wait: bool = Query(
+        True,
+        description="Wait for the analysis; false returns 202 with a task_id to poll"
+    ),
+    vision_agent: VisionAgent = Depends(get_vision_agent)
+):
     """
     Analyze video frame for behavioral intent
     
@@ -221,16 +364,35 @@ async def analyze_frame(request: AnalyzeRequest):
     Only event-relevant frames are transmitted, not continuous streams.
     Video remains local; only encrypted selected frames are processed.
     
+    ASYNC MODE:
+    With wait=false the frame is queued for a background worker and the
+    endpoint answers 202 {"task_id", "status": "pending"} immediately;
+    fetch the assessment from GET /api/analyze/{task_id}. When
+    ANALYZE_QUEUE_SIZE frames are already waiting it answers 503 with
+    Retry-After instead.
+    
     Returns:
-        Structured threat assessment with natural language reasoning
+        Structured threat assessment with natural language reasoning;
+        422 if the image is not valid base64
     """
+    if not wait:
+        try:
+            task_id = analysis_queue.submit(vision_agent, image_bytes=request.image, frame_number=0)
+        except asyncio.QueueFull:
+            raise HTTPException(
+                status_code=503,
+                detail="Analysis queue is full; retry shortly or use wait=true",
+                headers={"Retry-After": "1"}
+            )
+        return ORJSONResponse(status_code=202, content={"task_id": task_id, "status": "pending"})
+
     try:
         # SENSORY INTELLIGENCE LAYER
         # Vision Agent processes frame with temporal context awareness
         logger.info("🔍 Vision Agent: Analyzing frame for behavioral intent...")
         
         result = await vision_agent.process(
-            base64_image=request.image,
+            image_bytes=request.image,
             frame_number=0
         )
         
@@ -242,28 +404,74 @@ async def analyze_frame(request: AnalyzeRequest):
             )
         
         logger.info(
-            f"✅ Vision Agent: Incident={result.get('incident')}, "
-            f"Type={result.get('type')}, "
-            f"Severity={result.get('severity')}, "
-            f"Confidence={result.get('confidence')}%"
+            "✅ Vision Agent: Incident=%s, Type=%s, Severity=%s, Confidence=%s%%",
+            result.get('incident'), result.get('type'),
+            result.get('severity'), result.get('confidence')
         )
         
         return result
         
     except Exception as e:
-        logger.error(f"Analysis pipeline error: {str(e)}", exc_info=True)
-        
-        # Return structured error maintaining API contract
-        # This ensures deterministic behavior even on failure
-        return {
-            "incident": False,
-            "type": "error",
-            "severity": "low",
-            "confidence": 0,
-            "reasoning": f"Analysis pipeline error in Vision Agent (Sensory Intelligence Layer): {str(e)}",
-            "subjects": [],
-            "recommended_actions": []
-        }
+        logger.error("Analysis pipeline error: %s", e, exc_info=True)
+        return _analysis_error(e)
+
+
+@router.get("/analyze/{task_id}", response_model=AnalyzeResponse)
+async def get_analysis_result(
+    task_id: str,
+    timeout: float = Query(
+        0,
+        ge=0,
+        le=30,
+        description="Seconds to wait for a pending analysis before answering 202"
+    )
+):
+    """
+    Retrieve the result of an analysis queued with POST /api/analyze?wait=false
+    
+    Returns the structured threat assessment once available, 202 while the
+    frame is still queued or being analyzed, and 404 for unknown or expired
+    task ids.
+    """
+    future = analysis_queue.get(task_id)
+    if future is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Analysis task {task_id} not found"
+        )
+
+    if not future.done() and timeout:
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            pass
+        except Exception:
+            pass  # Reported below from the finished future
+
+    if not future.done():
+        return ORJSONResponse(status_code=202, content={"task_id": task_id, "status": "pending"})
+
+    try:
+        return future.result()
+    except Exception as e:
+        logger.error("Queued analysis %s failed: %s", task_id, e)
+        return _analysis_error(e)
+
+
+def _analysis_error(error: Exception) -> dict:
+    """Structured error result maintaining the AnalyzeResponse contract.
+
+    This ensures deterministic behavior even on failure.
+    """
+    return {
+        "incident": False,
+        "type": "error",
+        "severity": "low",
+        "confidence": 0,
+        "reasoning": f"Analysis pipeline error in Vision Agent (Sensory Intelligence Layer): {str(error)}",
+        "subjects": [],
+        "recommended_actions": []
+    }
 
 
 @router.get("/incidents", response_model=List[IncidentResponse])
@@ -276,13 +484,11 @@ async def get_incidents(
     ),
     severity: Optional[str] = Query(
         None,
-        pattern="^(low|medium|high|critical)$",
-        description="Filter by severity level"
+        description="Filter by severity level: low|medium|high|critical"
     ),
     status: Optional[str] = Query(
         None,
-        pattern="^(active|resolved|escalated|dismissed)$",
-        description="Filter by incident status"
+        description="Filter by incident status: active|resolved|escalated|dismissed"
     )
 ):
     """
@@ -300,19 +506,29 @@ async def get_incidents(
     - System performance evaluation
     - Incident investigation
     """
+    _require_choice("severity", severity, _SEVERITIES)
+    _require_choice("status", status, _STATUSES)
+
     try:
-        return db_service.get_recent_incidents(
+        body = await asyncio.to_thread(
+            db_service.get_recent_incidents_json,
             limit=limit,
             severity=severity,
-            status=status
+            status=status,
+            fields=_INCIDENT_FIELDS
         )
     except Exception as e:
-        logger.error(f"Failed to retrieve incidents: {e}")
+        logger.error("Failed to retrieve incidents: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to retrieve incidents from persistence layer: {str(e)}"
         )
 
+    # Rows come from our own schema, so skip per-record model validation (up to
+    # 500 per call); SQLite already serialized just the documented fields,
+    # with nullable columns filled in to match IncidentResponse
+    return Response(content=body, media_type="application/json")
+
 
 @router.get("/incidents/{incident_id}", response_model=IncidentResponse)
 async def get_incident(incident_id: int):
@@ -326,7 +542,7 @@ async def get_incident(incident_id: int):
     - Evidence file path
     - Execution status
     """
-    incident = db_service.get_incident_by_id(incident_id)
+    incident = await _fetch_incident(incident_id)
     
     if not incident:
         raise HTTPException(
@@ -355,13 +571,13 @@ async def get_statistics():
     - Capacity planning
     """
     try:
-        stats = db_service.get_statistics()
+        stats = await asyncio.to_thread(db_service.get_statistics)
         return {
             **stats,
             "system_status": "operational"
         }
     except Exception as e:
-        logger.error(f"Failed to retrieve statistics: {e}")
+        logger.error("Failed to retrieve statistics: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to retrieve statistics: {str(e)}"
@@ -373,8 +589,7 @@ async def update_incident_status(
     incident_id: int,
     status: str = Query(
         ...,
-        pattern="^(active|resolved|escalated|dismissed)$",
-        description="New incident status"
+        description="New incident status: active|resolved|escalated|dismissed"
     )
 ):
     """
@@ -390,7 +605,9 @@ async def update_incident_status(
     This endpoint supports the system's principle of deterministic automation
     with human oversight capability.
     """
-    success = db_service.update_incident_status(incident_id, status)
+    _require_choice("status", status, _STATUSES)
+
+    success = await asyncio.to_thread(db_service.update_incident_status, incident_id, status)
     
     if not success:
         raise HTTPException(
@@ -398,13 +615,13 @@ async def update_incident_status(
             detail=f"Incident {incident_id} not found"
         )
     
-    logger.info(f"✅ Incident {incident_id} status updated to: {status}")
+    logger.info("✅ Incident %s status updated to: %s", incident_id, status)
     
     return {
         "success": True,
         "incident_id": incident_id,
         "status": status,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": _now_iso()
     }
 
 
@@ -428,18 +645,18 @@ async def cleanup_old_incidents(
     Longer retention (90-365 days) recommended for high/critical incidents
     """
     try:
-        deleted_count = db_service.cleanup_old_incidents(days)
+        deleted_count = await asyncio.to_thread(db_service.cleanup_old_incidents, days)
         
-        logger.info(f"🧹 Cleaned up {deleted_count} incidents older than {days} days")
+        logger.info("🧹 Cleaned up %s incidents older than %s days", deleted_count, days)
         
         return {
             "success": True,
             "deleted_count": deleted_count,
             "retention_days": days,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _now_iso()
         }
     except Exception as e:
-        logger.error(f"Cleanup failed: {e}")
+        logger.error("Cleanup failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Cleanup operation failed: {str(e)}"
@@ -450,8 +667,20 @@ async def cleanup_old_incidents(
 # Agent Intelligence Endpoints - Performance Monitoring
 # ============================================================================
 
+# Static part of /agents/stats
+_AGENT_BENEFITS = (
+    "Scalability - Independent evolution of components",
+    "Explainability - Clear reasoning trails",
+    "Deterministic automation - Predictable decisions",
+    "Human oversight - Transparent AI decision-making"
+)
+
+
 @router.get("/agents/stats")
-async def get_agent_stats():
+async def get_agent_stats(
+    vision_agent: VisionAgent = Depends(get_vision_agent),
+    planner_agent: PlannerAgent = Depends(get_planner_agent)
+):
     """
     Get performance statistics for dual-agent intelligence core
     
@@ -480,18 +709,70 @@ async def get_agent_stats():
             "planner_agent_tactical_layer": planner_agent.get_stats()
         },
         "architecture_type": "dual_agent_separation",
-        "benefits": [
-            "Scalability - Independent evolution of components",
-            "Explainability - Clear reasoning trails",
-            "Deterministic automation - Predictable decisions",
-            "Human oversight - Transparent AI decision-making"
+        "benefits": _AGENT_BENEFITS,
+        "timestamp": _now_iso()
+    }
+
+
+# Static payloads are serialized once at import and served as raw bytes with
+# an ETag, so repeat clients get a bodiless 304
+_ARCHITECTURE_INFO = {
+    "architecture": "Dual-Agent Intelligence System",
+    "principle": "Explicit separation of perception and decision-making",
+    
+    "vision_agent": {
+        "layer": "Sensory Intelligence Layer",
+        "responsibility": "Extract behavioral meaning from visual data",
+        "guiding_questions": [
+            "What is happening?",
+            "How is it evolving?",
+            "What intent does this behavior suggest?"
+        ],
+        "capabilities": [
+            "Temporal sequence analysis (40-second window)",
+            "Intent inference from behavioral patterns",
+            "Natural language reasoning with chain-of-thought",
+            "Confidence scoring for human review"
+        ],
+        "model": "Google Gemini 3 (Pro/Flash)",
+        "context_window": "2 million tokens"
+    },
+    
+    "planner_agent": {
+        "layer": "Tactical Intelligence Layer",
+        "responsibility": "Transform threat assessments into actionable responses",
+        "guiding_questions": [
+            "Given this inferred intent and risk level, what action should be taken?",
+            "What is the appropriate escalation path?",
+            "Which responses should execute immediately vs. eventually?"
+        ],
+        "capabilities": [
+            "Threat severity classification",
+            "Contextual prioritization",
+            "Response composition (validated action set)",
+            "Priority-based execution ordering"
         ],
-        "timestamp": datetime.now().isoformat()
+        "validated_actions": 11
+    },
+    
+    "benefits": {
+        "explainability": "Natural language reasoning at every stage",
+        "modularity": "Components evolve independently",
+        "determinism": "Predictable, auditable decisions",
+        "human_oversight": "Transparent AI with override capability"
+    },
+    
+    "white_paper": {
+        "author": "Timothee RINGUYENEZA",
+        "discipline": "Computer Science & Applied Artificial Intelligence",
+        "paradigm": "Intent-based autonomous security intelligence"
     }
+}
+_ARCHITECTURE_INFO_JSON = StaticJSON(_ARCHITECTURE_INFO)
 
 
 @router.get("/agents/architecture")
-async def get_architecture_info():
+async def get_architecture_info(request: Request):
     """
     Get dual-agent architecture information
     
@@ -502,66 +783,70 @@ async def get_architecture_info():
     This endpoint provides documentation-as-code for understanding
     the system's design principles and reasoning model.
     """
-    return {
-        "architecture": "Dual-Agent Intelligence System",
-        "principle": "Explicit separation of perception and decision-making",
-        
-        "vision_agent": {
-            "layer": "Sensory Intelligence Layer",
-            "responsibility": "Extract behavioral meaning from visual data",
-            "guiding_questions": [
-                "What is happening?",
-                "How is it evolving?",
-                "What intent does this behavior suggest?"
-            ],
-            "capabilities": [
-                "Temporal sequence analysis (40-second window)",
-                "Intent inference from behavioral patterns",
-                "Natural language reasoning with chain-of-thought",
-                "Confidence scoring for human review"
-            ],
-            "model": "Google Gemini 3 (Pro/Flash)",
-            "context_window": "2 million tokens"
-        },
-        
-        "planner_agent": {
-            "layer": "Tactical Intelligence Layer",
-            "responsibility": "Transform threat assessments into actionable responses",
-            "guiding_questions": [
-                "Given this inferred intent and risk level, what action should be taken?",
-                "What is the appropriate escalation path?",
-                "Which responses should execute immediately vs. eventually?"
-            ],
-            "capabilities": [
-                "Threat severity classification",
-                "Contextual prioritization",
-                "Response composition (validated action set)",
-                "Priority-based execution ordering"
-            ],
-            "validated_actions": 11
-        },
-        
-        "benefits": {
-            "explainability": "Natural language reasoning at every stage",
-            "modularity": "Components evolve independently",
-            "determinism": "Predictable, auditable decisions",
-            "human_oversight": "Transparent AI with override capability"
-        },
-        
-        "white_paper": {
-            "author": "Timothee RINGUYENEZA",
-            "discipline": "Computer Science & Applied Artificial Intelligence",
-            "paradigm": "Intent-based autonomous security intelligence"
-        }
-    }
+    return _ARCHITECTURE_INFO_JSON.response(request)
 
 
 # ============================================================================
 # System Information Endpoints
 # ============================================================================
 
+# Static, pre-serialized like _ARCHITECTURE_INFO
+_SYSTEM_INFO = {
+    "system": {
+        "name": "NeuroAegis Cortex",
+        "tagline": "Intent-Based Autonomous Security Intelligence",
+        "version": "1.0.0",
+        "author": "Timothee RINGUYENEZA",
+        "discipline": "Computer Science & Applied Artificial Intelligence"
+    },
+    
+    "architecture": {
+        "type": "Dual-Agent Intelligence System",
+        "layers": {
+            "sensory": "Vision Agent (perception & intent inference)",
+            "tactical": "Planner Agent (response planning)"
+        },
+        "separation_benefits": [
+            "Scalability",
+            "Explainability",
+            "Deterministic automation",
+            "Human oversight"
+        ]
+    },
+    
+    "technology_stack": {
+        "backend": "FastAPI (asynchronous, high-throughput)",
+        "frontend": "React with TypeScript (type-safe, real-time)",
+        "containerization": "Docker (platform independence)",
+        "persistence": "SQLite (lightweight, single-file)",
+        "ai_core": "Google Gemini 3 (Pro/Flash)"
+    },
+    
+    "performance": {
+        "latency_flash": "~1.2s per frame",
+        "latency_pro": "~4.9s per frame",
+        "cost_per_frame": "$0.001",
+        "cost_reduction": "90% vs continuous streaming"
+    },
+    
+    "privacy": {
+        "architecture": "Privacy-first design",
+        "video_storage": "Local only, never transmitted",
+        "transmission": "Event-relevant frames only (encrypted)",
+        "compliance": "GDPR Article 22 (explainable AI)"
+    },
+    
+    "roadmap": {
+        "phase_1": "IoT integration (MQTT, Home Assistant)",
+        "phase_2": "Predictive threat modeling, multi-camera correlation",
+        "phase_3": "Edge-native deployment (Jetson, Raspberry Pi)"
+    }
+}
+_SYSTEM_INFO_JSON = StaticJSON(_SYSTEM_INFO)
+
+
 @router.get("/system/info")
-async def get_system_info():
+async def get_system_info(request: Request):
     """
     Get comprehensive system information
     
@@ -572,105 +857,60 @@ async def get_system_info():
     - Privacy guarantees
     - Deployment information
     """
-    return {
-        "system": {
-            "name": "NeuroAegis Cortex",
-            "tagline": "Intent-Based Autonomous Security Intelligence",
-            "version": "1.0.0",
-            "author": "Timothee RINGUYENEZA",
-            "discipline": "Computer Science & Applied Artificial Intelligence"
-        },
-        
-        "architecture": {
-            "type": "Dual-Agent Intelligence System",
-            "layers": {
-                "sensory": "Vision Agent (perception & intent inference)",
-                "tactical": "Planner Agent (response planning)"
-            },
-            "separation_benefits": [
-                "Scalability",
-                "Explainability",
-                "Deterministic automation",
-                "Human oversight"
-            ]
-        },
-        
-        "technology_stack": {
-            "backend": "FastAPI (asynchronous, high-throughput)",
-            "frontend": "React with TypeScript (type-safe, real-time)",
-            "containerization": "Docker (platform independence)",
-            "persistence": "SQLite (lightweight, single-file)",
-            "ai_core": "Google Gemini 3 (Pro/Flash)"
-        },
-        
-        "performance": {
-            "latency_flash": "~1.2s per frame",
-            "latency_pro": "~4.9s per frame",
-            "cost_per_frame": "$0.001",
-            "cost_reduction": "90% vs continuous streaming"
-        },
-        
-        "privacy": {
-            "architecture": "Privacy-first design",
-            "video_storage": "Local only, never transmitted",
-            "transmission": "Event-relevant frames only (encrypted)",
-            "compliance": "GDPR Article 22 (explainable AI)"
-        },
-        
-        "roadmap": {
-            "phase_1": "IoT integration (MQTT, Home Assistant)",
-            "phase_2": "Predictive threat modeling, multi-camera correlation",
-            "phase_3": "Edge-native deployment (Jetson, Raspberry Pi)"
-        }
-    }
+    return _SYSTEM_INFO_JSON.response(request)
 
 
 # ============================================================================
 # Meta Information
 # ============================================================================
 
+# Static, pre-serialized like _ARCHITECTURE_INFO
+_WHITE_PAPER_INFO = {
+    "title": "NeuroAegis Cortex: Intent-Based Autonomous Security Intelligence",
+    "author": "Timothee RINGUYENEZA",
+    "discipline": "Computer Science & Applied Artificial Intelligence",
+    
+    "abstract": (
+        "The modern physical security ecosystem suffers not from a lack of "
+        "sensing infrastructure, but from a fundamental failure of interpretation. "
+        "NeuroAegis Cortex introduces a paradigm shift from motion-centric "
+        "surveillance to intent-based autonomous security intelligence."
+    ),
+    
+    "problem_statement": {
+        "false_alarm_epidemic": "90%+ false positive rates in traditional systems",
+        "contextual_blindness": "Cannot distinguish routine from hostile behavior",
+        "operator_saturation": "Alert fatigue leads to systematic desensitization"
+    },
+    
+    "solution": {
+        "paradigm": "Reasoning problem rather than sensing problem",
+        "evaluation": [
+            "WHAT appears within a scene",
+            "HOW behavior unfolds over time",
+            "WHAT underlying intent can be inferred"
+        ]
+    },
+    
+    "innovations": [
+        "Dual-agent architecture (explicit separation of concerns)",
+        "Temporal reasoning (2M token context window)",
+        "Intent-based analysis (not motion detection)",
+        "Native structured output (deterministic processing)",
+        "Privacy-first design (local-first, minimal transmission)"
+    ],
+    
+    "documentation": "/docs/white-paper.pdf"
+}
+_WHITE_PAPER_INFO_JSON = StaticJSON(_WHITE_PAPER_INFO)
+
+
 @router.get("/meta/white-paper")
-async def get_white_paper_info():
+async def get_white_paper_info(request: Request):
     """
     Get white paper information and conceptual foundations
     
     Provides links to research documentation and explains the
     theoretical foundations of intent-based security intelligence.
     """
-    return {
-        "title": "NeuroAegis Cortex: Intent-Based Autonomous Security Intelligence",
-        "author": "Timothee RINGUYENEZA",
-        "discipline": "Computer Science & Applied Artificial Intelligence",
-        
-        "abstract": (
-            "The modern physical security ecosystem suffers not from a lack of "
-            "sensing infrastructure, but from a fundamental failure of interpretation. "
-            "NeuroAegis Cortex introduces a paradigm shift from motion-centric "
-            "surveillance to intent-based autonomous security intelligence."
-        ),
-        
-        "problem_statement": {
-            "false_alarm_epidemic": "90%+ false positive rates in traditional systems",
-            "contextual_blindness": "Cannot distinguish routine from hostile behavior",
-            "operator_saturation": "Alert fatigue leads to systematic desensitization"
-        },
-        
-        "solution": {
-            "paradigm": "Reasoning problem rather than sensing problem",
-            "evaluation": [
-                "WHAT appears within a scene",
-                "HOW behavior unfolds over time",
-                "WHAT underlying intent can be inferred"
-            ]
-        },
-        
-        "innovations": [
-            "Dual-agent architecture (explicit separation of concerns)",
-            "Temporal reasoning (2M token context window)",
-            "Intent-based analysis (not motion detection)",
-            "Native structured output (deterministic processing)",
-            "Privacy-first design (local-first, minimal transmission)"
-        ],
-        
-        "documentation": "/docs/white-paper.pdf"
-    }
+    return _WHITE_PAPER_INFO_JSON.response(request)
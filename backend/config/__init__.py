@@ -1,5 +1,5 @@
 """Configuration management"""
 
-from .settings import settings, VISION_AGENT_PROMPT, PLANNER_AGENT_PROMPT
+from .settings import settings, get_settings, VISION_AGENT_PROMPT, PLANNER_AGENT_PROMPT, PLANNER_BATCH_PROMPT
 
-__all__ = ["settings", "VISION_AGENT_PROMPT", "PLANNER_AGENT_PROMPT"]
+__all__ = ["settings", "get_settings", "VISION_AGENT_PROMPT", "PLANNER_AGENT_PROMPT", "PLANNER_BATCH_PROMPT"]
@@ -3,72 +3,85 @@ AegisAI Backend Configuration
 Centralized settings management with environment variable support
 """
 
+import json
 import os
+import string
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, List, Optional, Set
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import field_validator
 
 
 class Settings(BaseSettings):
     """Application settings with environment variable support"""
 
     # API Configuration
-    GEMINI_API_KEY: str = Field(..., json_schema_extra={"env_names": ["GEMINI_API_KEY"]})
-    API_HOST: str = Field("0.0.0.0", json_schema_extra={"env_names": ["API_HOST"]})
-    API_PORT: int = Field(8000, json_schema_extra={"env_names": ["API_PORT"]})
+    GEMINI_API_KEY: str
+    API_HOST: str = "0.0.0.0"
+    API_PORT: int = 8000
+    RELOAD: bool = False
+    # In-process caches and the /api/analyze task queue are per worker
+    UVICORN_WORKERS: int = 1
+    ACCESS_LOG: bool = False
 
     # Video Processing
-    VIDEO_SOURCE: int = Field(0, json_schema_extra={"env_names": ["VIDEO_SOURCE"]})
-    FRAME_SAMPLE_RATE: int = Field(2, json_schema_extra={"env_names": ["FRAME_SAMPLE_RATE"]})
-    VIDEO_RESOLUTION_WIDTH: int = Field(1280, json_schema_extra={"env_names": ["VIDEO_RESOLUTION_WIDTH"]})
-    VIDEO_RESOLUTION_HEIGHT: int = Field(720, json_schema_extra={"env_names": ["VIDEO_RESOLUTION_HEIGHT"]})
+    VIDEO_SOURCE: int = 0
+    FRAME_SAMPLE_RATE: int = 2
+    VIDEO_RESOLUTION_WIDTH: int = 1280
+    VIDEO_RESOLUTION_HEIGHT: int = 720
+    JPEG_QUALITY: int = 80
+    VISION_MAX_SIDE: int = 768
 
     # Storage
-    EVIDENCE_DIR: Path = Field(Path("evidence"), json_schema_extra={"env_names": ["EVIDENCE_DIR"]})
-    DB_PATH: Path = Field(Path("aegis.db"), json_schema_extra={"env_names": ["DB_PATH"]})
-    MAX_EVIDENCE_AGE_DAYS: int = Field(30, json_schema_extra={"env_names": ["MAX_EVIDENCE_AGE_DAYS"]})
+    EVIDENCE_DIR: Path = Path("evidence")
+    DB_PATH: Path = Path("aegis.db")
+    MAX_EVIDENCE_AGE_DAYS: int = 30
 
     # AI Model Configuration
-    GEMINI_MODEL: str = Field("gemini-3-pro-preview", json_schema_extra={"env_names": ["GEMINI_MODEL"]})
-    TEMPERATURE: float = Field(0.4, json_schema_extra={"env_names": ["TEMPERATURE"]})
-    MAX_OUTPUT_TOKENS: int = Field(300, json_schema_extra={"env_names": ["MAX_OUTPUT_TOKENS"]})
+    GEMINI_MODEL: str = "gemini-3-pro-preview"
+    TEMPERATURE: float = 0.4
+    MAX_OUTPUT_TOKENS: int = 300
 
     # Analysis Thresholds
-    CONFIDENCE_THRESHOLD: int = Field(70, json_schema_extra={"env_names": ["CONFIDENCE_THRESHOLD"]})
-    HIGH_SEVERITY_THRESHOLD: int = Field(85, json_schema_extra={"env_names": ["HIGH_SEVERITY_THRESHOLD"]})
+    CONFIDENCE_THRESHOLD: int = 70
+    HIGH_SEVERITY_THRESHOLD: int = 85
+    MOTION_THRESHOLD: float = 2.0
 
     # Action Execution
-    ENABLE_EMAIL_ALERTS: bool = Field(False, json_schema_extra={"env_names": ["ENABLE_EMAIL_ALERTS"]})
-    ENABLE_SMS_ALERTS: bool = Field(False, json_schema_extra={"env_names": ["ENABLE_SMS_ALERTS"]})
-    ENABLE_IOT_ACTIONS: bool = Field(False, json_schema_extra={"env_names": ["ENABLE_IOT_ACTIONS"]})
+    ENABLE_EMAIL_ALERTS: bool = False
+    ENABLE_SMS_ALERTS: bool = False
+    ENABLE_IOT_ACTIONS: bool = False
 
     # Email Configuration (Optional)
-    SMTP_HOST: Optional[str] = Field(None, json_schema_extra={"env_names": ["SMTP_HOST"]})
-    SMTP_PORT: Optional[int] = Field(None, json_schema_extra={"env_names": ["SMTP_PORT"]})
-    SMTP_USER: Optional[str] = Field(None, json_schema_extra={"env_names": ["SMTP_USER"]})
-    SMTP_PASSWORD: Optional[str] = Field(None, json_schema_extra={"env_names": ["SMTP_PASSWORD"]})
-    ALERT_EMAIL: Optional[str] = Field(None, json_schema_extra={"env_names": ["ALERT_EMAIL"]})
+    SMTP_HOST: Optional[str] = None
+    SMTP_PORT: Optional[int] = None
+    SMTP_USER: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    ALERT_EMAIL: Optional[str] = None
 
     # Twilio Configuration (Optional)
-    TWILIO_ACCOUNT_SID: Optional[str] = Field(None, json_schema_extra={"env_names": ["TWILIO_ACCOUNT_SID"]})
-    TWILIO_AUTH_TOKEN: Optional[str] = Field(None, json_schema_extra={"env_names": ["TWILIO_AUTH_TOKEN"]})
-    TWILIO_PHONE: Optional[str] = Field(None, json_schema_extra={"env_names": ["TWILIO_PHONE"]})
-    ALERT_PHONE: Optional[str] = Field(None, json_schema_extra={"env_names": ["ALERT_PHONE"]})
+    TWILIO_ACCOUNT_SID: Optional[str] = None
+    TWILIO_AUTH_TOKEN: Optional[str] = None
+    TWILIO_PHONE: Optional[str] = None
+    ALERT_PHONE: Optional[str] = None
 
     # CORS Configuration
-    CORS_ORIGINS: list = Field(
-        ["http://localhost:3000", "http://localhost:5173"],
-        json_schema_extra={"env_names": ["CORS_ORIGINS"]}
-    )
+    CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:5173"]
 
     # Logging
-    LOG_LEVEL: str = Field("INFO", json_schema_extra={"env_names": ["LOG_LEVEL"]})
-    LOG_FILE: Optional[Path] = Field(None, json_schema_extra={"env_names": ["LOG_FILE"]})
+    LOG_LEVEL: str = "INFO"
+    LOG_FILE: Optional[Path] = None
 
     # Performance
-    MAX_CONCURRENT_ANALYSES: int = Field(3, json_schema_extra={"env_names": ["MAX_CONCURRENT_ANALYSES"]})
-    WEBSOCKET_HEARTBEAT_INTERVAL: int = Field(30, json_schema_extra={"env_names": ["WEBSOCKET_HEARTBEAT_INTERVAL"]})
+    MAX_CONCURRENT_ANALYSES: int = 3
+    ANALYZE_WORKERS: int = 8
+    ANALYZE_QUEUE_SIZE: int = 64
+    ACTION_WORKERS: int = 4
+    ACTION_QUEUE_SIZE: int = 256
+    ACTION_HISTORY_CAP: int = 1000
+    ACTION_TIMEOUT: float = 10.0
+    WEBSOCKET_HEARTBEAT_INTERVAL: int = 30
 
     model_config = {
         "env_file": ".env",
@@ -77,16 +90,50 @@ class Settings(BaseSettings):
         "extra": "ignore"
     }
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        # Ensure directories exist
-        self.EVIDENCE_DIR.mkdir(exist_ok=True, parents=True)
-        if self.LOG_FILE:
-            self.LOG_FILE.parent.mkdir(exist_ok=True, parents=True)
+    @field_validator("CORS_ORIGINS", mode="before")
+    @classmethod
+    def parse_cors_origins(cls, v):
+        """Accepts a JSON list or a single origin given as a string."""
+        if isinstance(v, str):
+            return json.loads(v) if v.lstrip().startswith("[") else [v]
+        return v
+
+
+# Directories already known to exist in this process
+_ENSURED_DIRS: Set[Path] = set()
+
+
+def ensure_dir(path: Path, force: bool = False) -> Path:
+    """Creates a directory (and parents) once per process.
+
+    Later calls for the same path are a set lookup instead of a mkdir syscall.
+
+    Args:
+        path: Directory to create.
+        force: Issue the mkdir even if the path was seen before, e.g. after a
+            write into it failed because it was removed.
+
+    Returns:
+        Path: The same path, for chaining.
+    """
+    if force or path not in _ENSURED_DIRS:
+        path.mkdir(parents=True, exist_ok=True)
+        _ENSURED_DIRS.add(path)
+    return path
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Returns the process-wide settings, reading the environment and .env once.
+
+    Directories are not created here: the app lifespan creates EVIDENCE_DIR
+    and setup_logging() creates the LOG_FILE directory.
+    """
+    return Settings()
 
 
 # Singleton instance
-settings = Settings()
+settings = get_settings()
 
 
 # ====================================================================
@@ -147,3 +194,61 @@ PRIORITIZATION:
 4. Document thoroughly (medium)
 
 Be specific and actionable. Focus on automated responses."""
+
+PLANNER_BATCH_PROMPT = """You are a security response planner. Create executable action plans.
+
+You will receive {count} independent incidents. Plan a response for EACH one.
+
+INCIDENTS:
+{incidents}
+
+RESPOND with ONLY a valid JSON array containing exactly {count} plans, one per incident,
+in the order given. Each plan is itself a JSON array of steps:
+[
+  [
+    {{
+      "step": 1,
+      "action": "save_evidence|send_alert|log_incident|lock_door|sound_alarm|contact_authorities",
+      "priority": "immediate|high|medium|low",
+      "parameters": {{}},
+      "reasoning": "why this action is needed"
+    }}
+  ]
+]
+
+PRIORITIZATION:
+1. Evidence preservation (immediate)
+2. Alert relevant parties (high)
+3. Prevent escalation (high)
+4. Document thoroughly (medium)
+
+Be specific and actionable. Focus on automated responses."""
+
+
+def compile_prompt(template: str) -> Callable[..., str]:
+    """Pre-parses a str.format template so rendering is a single join.
+
+    Args:
+        template: Prompt with {name} placeholders and {{ }} escapes.
+
+    Returns:
+        Callable[..., str]: Renderer taking the placeholders as keyword
+            arguments; equivalent to template.format(**values).
+    """
+    pieces = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if spec or conversion:
+            raise ValueError(f"Unsupported format spec in prompt field {field!r}")
+        pieces.append((literal, field))
+
+    def render(**values: Any) -> str:
+        return "".join([
+            literal if field is None else literal + str(values[field])
+            for literal, field in pieces
+        ])
+
+    return render
+
+
+render_planner_prompt = compile_prompt(PLANNER_AGENT_PROMPT)
+render_planner_batch_prompt = compile_prompt(PLANNER_BATCH_PROMPT)
@@ -3,18 +3,28 @@ AegisAI Backend Server - Updated CORS Configuration
 Main entry point for the FastAPI application
 """
 
+import asyncio
 import logging
 from pathlib import Path
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
+import orjson
 
 from config.settings import settings
 from api.routes import router as api_router
-from api.email_routes import email_router
+from agents._client import create_http_client
+from agents.vision_agent import VisionAgent
+from agents.planner_agent import PlannerAgent
+from api.email_routes import close_idle_smtp_connections, reap_idle_smtp_connections
 from services.database_service import db_service
+from services.analysis_queue import analysis_queue
+from services.action_executor import action_executor
+from utils.compression import NegotiatedGZipMiddleware
 from utils.logger import setup_logging
+from utils.static_response import StaticJSON
 
 # ----------------------------
 # Setup Logging
@@ -22,6 +32,24 @@ from utils.logger import setup_logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Startup banner (%-formatted lazily by logging)
+_SEP = "=" * 60
+_STARTUP_BANNER = "\n".join([
+    _SEP,
+    "🛡️  AegisAI Backend Starting",
+    _SEP,
+    "💾 Database: %s",
+    "📹 Video Source: %s",
+    "⏱️  Frame Rate: Every %ss",
+    "🤖 Model: %s",
+    "🌐 CORS Origins: %s",
+    _SEP,
+    "✅ AegisAI Backend Ready",
+    "🔗 API: http://%s:%s",
+    "📖 Docs: http://%s:%s/docs",
+    _SEP,
+])
+
 # ----------------------------
 # Lifespan Handler (startup & shutdown)
 # ----------------------------
@@ -32,26 +60,34 @@ async def lifespan(app: FastAPI):
     # ----------------------------
     # Startup logic
     # ----------------------------
-    logger.info("=" * 60)
-    logger.info("🛡️  AegisAI Backend Starting")
-    logger.info("=" * 60)
-
     # Ensure evidence directory exists
     settings.EVIDENCE_DIR.mkdir(exist_ok=True, parents=True)
 
-    # Database initialization
-    logger.info(f"💾 Database: {settings.DB_PATH}")
+    # Startup banner, emitted as a single log record
+    logger.info(
+        _STARTUP_BANNER,
+        settings.DB_PATH, settings.VIDEO_SOURCE, settings.FRAME_SAMPLE_RATE,
+        settings.GEMINI_MODEL, settings.CORS_ORIGINS,
+        settings.API_HOST, settings.API_PORT, settings.API_HOST, settings.API_PORT
+    )
+
+    # One keep-alive HTTP client for every Gemini call made by the agents
+    app.state.http = create_http_client()
+
+    # Build both agents concurrently (client setup runs in worker threads)
+    app.state.vision_agent, app.state.planner_agent = await asyncio.gather(
+        VisionAgent.create(http_client=app.state.http),
+        PlannerAgent.create(http_client=app.state.http)
+    )
+
+    # Workers for /api/analyze?wait=false
+    analysis_queue.start()
 
-    # Log configuration
-    logger.info(f"📹 Video Source: {settings.VIDEO_SOURCE}")
-    logger.info(f"⏱️  Frame Rate: Every {settings.FRAME_SAMPLE_RATE}s")
-    logger.info(f"🤖 Model: {settings.GEMINI_MODEL}")
-    logger.info(f"🌐 CORS Origins: {settings.CORS_ORIGINS}")
-    logger.info("=" * 60)
-    logger.info("✅ AegisAI Backend Ready")
-    logger.info(f"🔗 API: http://{settings.API_HOST}:{settings.API_PORT}")
-    logger.info(f"📖 Docs: http://{settings.API_HOST}:{settings.API_PORT}/docs")
-    logger.info("=" * 60)
+    # Workers that execute dispatched response plans
+    action_executor.start()
+
+    # Close pooled SMTP sessions once they go idle
+    smtp_reaper = asyncio.create_task(reap_idle_smtp_connections())
 
     yield  # Application runs here
 
@@ -60,10 +96,21 @@ async def lifespan(app: FastAPI):
     # ----------------------------
     logger.info("🛑 AegisAI Backend Shutting Down")
 
+    smtp_reaper.cancel()
+    await analysis_queue.stop()
+    await close_idle_smtp_connections(max_idle=0)
+    agents = (app.state.vision_agent, app.state.planner_agent)
+    del app.state.vision_agent, app.state.planner_agent
+    await asyncio.gather(*(agent.close() for agent in agents))
+    await app.state.http.aclose()
+    await action_executor.close()
+
     # Cleanup old incidents if configured
     if settings.MAX_EVIDENCE_AGE_DAYS:
         deleted = db_service.cleanup_old_incidents(settings.MAX_EVIDENCE_AGE_DAYS)
-        logger.info(f"🧹 Cleaned up {deleted} old incidents")
+        logger.info("🧹 Cleaned up %d old incidents", deleted)
+
+    db_service.close()
 
     logger.info("👋 Goodbye!")
 
@@ -77,23 +124,17 @@ app = FastAPI(
     version="2.5.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
 # ----------------------------
 # CORS Middleware - CRITICAL FIX
 # ----------------------------
-# Parse CORS origins from settings
+# Parsed into a list by Settings
 cors_origins = settings.CORS_ORIGINS
-if isinstance(cors_origins, str):
-    # If it's a string representation of a list, parse it
-    import json
-    try:
-        cors_origins = json.loads(cors_origins)
-    except:
-        cors_origins = [cors_origins]
 
-logger.info(f"🔓 Configuring CORS for origins: {cors_origins}")
+logger.info("🔓 Configuring CORS for origins: %s", cors_origins)
 
 app.add_middleware(
     CORSMiddleware,
@@ -105,57 +146,77 @@ app.add_middleware(
     max_age=3600,        # Cache preflight for 1 hour
 )
 
+# ----------------------------
+# Response Compression
+# ----------------------------
+# Incident lists and analysis reasoning are natural-language heavy; a low
+# compression level keeps CPU negligible on the /api/analyze hot path.
+# Accept-Encoding q-values are honoured (gzip;q=0 gets an identity body)
+app.add_middleware(NegotiatedGZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # ----------------------------
 # Exception Handler
 # ----------------------------
+# Exception details are only exposed when debugging; otherwise the body is constant
+_DEBUG_ERRORS = settings.LOG_LEVEL.upper() == "DEBUG"
+_INTERNAL_ERROR_BODY = orjson.dumps({"error": "Internal server error", "detail": None})
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request, exc):
+    """422 without the offending input
+
+    FastAPI's default body echoes each invalid value back, which for
+    /api/analyze is the whole multi-MB base64 frame.
+    """
+    return ORJSONResponse(
+        status_code=422,
+        content={"detail": [
+            {"type": err["type"], "loc": err["loc"], "msg": err["msg"]}
+            for err in exc.errors()
+        ]}
+    )
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
-    """Global exception handler"""
-    logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return JSONResponse(
-        status_code=500,
-        content={
-            "error": "Internal server error",
-            "detail": str(exc) if settings.LOG_LEVEL.upper() == "DEBUG" else None
-        }
-    )
+    """Global handler for unhandled exceptions
+
+    HTTPException and request validation errors are answered by Starlette's
+    own handlers and never reach this one.
+    """
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
+    if _DEBUG_ERRORS:
+        return ORJSONResponse(
+            status_code=500,
+            content={"error": "Internal server error", "detail": str(exc)}
+        )
+    return Response(content=_INTERNAL_ERROR_BODY, status_code=500, media_type="application/json")
 
 # ----------------------------
 # Include API Routes
 # ----------------------------
+# Email routes are mounted once, under /api/email, by the API router
 app.include_router(api_router)
 
-app.include_router(email_router)
-
 # ----------------------------
 # Root Endpoint
 # ----------------------------
+# Nothing here changes after startup, so serialize it once
+_ROOT_INFO_JSON = StaticJSON({
+    "name": "AegisAI",
+    "version": "2.5.0",
+    "status": "operational",
+    "description": "Autonomous Security & Incident Response Agent",
+    "docs": "/docs",
+    "cors_configured": True,
+    "allowed_origins": cors_origins
+})
+
+
 @app.get("/")
-async def root():
-    return {
-        "name": "AegisAI",
-        "version": "2.5.0",
-        "status": "operational",
-        "description": "Autonomous Security & Incident Response Agent",
-        "docs": "/docs",
-        "cors_configured": True,
-        "allowed_origins": cors_origins
-    }
-
-# ----------------------------
-# CORS Debug Endpoint
-# ----------------------------
-@app.options("/{full_path:path}")
-async def options_handler(full_path: str):
-    """Handle CORS preflight for all paths"""
-    return JSONResponse(
-        content={"message": "OK"},
-        headers={
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "*",
-            "Access-Control-Allow-Headers": "*",
-        }
-    )
+async def root(request: Request):
+    return _ROOT_INFO_JSON.response(request)
 
 # ----------------------------
 # Main Entry Point
@@ -169,7 +230,12 @@ if __name__ == "__main__":
         "main:app",
         host=settings.API_HOST,
         port=settings.API_PORT,
-        reload=True if settings.LOG_LEVEL.upper() == "DEBUG" else False,
+        reload=settings.RELOAD,
+        workers=None if settings.RELOAD else settings.UVICORN_WORKERS,
+        # uvloop event loop and httptools parser (both in requirements.txt);
+        # "auto" falls back to asyncio/h11 where they can't be installed (Windows)
+        loop="auto",
+        http="auto",
         log_level=settings.LOG_LEVEL.lower(),
-        access_log=True
+        access_log=settings.ACCESS_LOG
     )
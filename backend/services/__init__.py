@@ -2,10 +2,13 @@
 
 from .database_service import DatabaseService, db_service
 from .action_executor import ActionExecutor, action_executor
+from .analysis_queue import AnalysisQueue, analysis_queue
 
 __all__ = [
     "DatabaseService",
     "db_service",
     "ActionExecutor", 
-    "action_executor"
+    "action_executor",
+    "AnalysisQueue",
+    "analysis_queue"
 ]
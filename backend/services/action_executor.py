@@ -5,23 +5,414 @@ Executes real-world responses to incidents with comprehensive action support
 
 import logging
 import asyncio
-from typing import Dict, List, Any
-from datetime import datetime
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby, islice
+from operator import itemgetter
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from datetime import datetime, timezone
+from email.message import EmailMessage
 from pathlib import Path
 
-from config.settings import settings
+import aiosmtplib
+import httpx
+
+from config.settings import compile_prompt, settings
 from services.database_service import db_service
 
 logger = logging.getLogger(__name__)
 
+TWILIO_MESSAGES_URL = "https://api.twilio.com/2010-04-01/Accounts/{sid}/Messages.json"
+
+# Execution tiers (immediate > high > medium > low); unknown priorities rank as medium
+_PRIORITY_ORDER = {"immediate": 0, "high": 1, "medium": 2, "low": 3}
+
+# Incident statuses set by response actions; within a plan the highest wins
+_STATUS_RANK = {"logged": 0, "monitoring": 1, "escalated": 2}
+
+# Dispatch queues, one per tier, keyed by the plan's most urgent step rank
+_QUEUE_TIERS = ("high", "normal", "low")
+_RANK_TO_QUEUE = {0: "high", 1: "normal", 2: "normal", 3: "low"}
+
+# Threads reserved for this executor's blocking database calls
+DB_THREADS = 32
+
+# A step's timeout_s may stretch its deadline to at most this multiple of
+# settings.ACTION_TIMEOUT
+MAX_TIMEOUT_FACTOR = 3
+
+# Plain-text body of alert emails
+EMAIL_ALERT_TEMPLATE = """
+=================================================
+AegisAI SECURITY ALERT
+=================================================
+
+INCIDENT DETAILS:
+-------------------------------------------------
+Incident ID:    #{incident_id}
+Type:           {type}
+Severity:       {severity}
+Confidence:     {confidence}%
+Status:         {status}
+Timestamp:      {timestamp}
+
+ANALYSIS:
+-------------------------------------------------
+{reasoning}
+
+SUBJECTS IDENTIFIED:
+-------------------------------------------------
+{subjects}
+
+RESPONSE PLAN:
+-------------------------------------------------
+{plan_steps} action(s) initiated
+
+EVIDENCE:
+-------------------------------------------------
+Evidence Path: {evidence_path}
+
+=================================================
+This is an automated alert from AegisAI Security System.
+Please review the incident details and take appropriate action.
+=================================================
+"""
+render_email_body = compile_prompt(EMAIL_ALERT_TEMPLATE)
+
+
+def _priority_rank(step: Dict[str, Any]) -> int:
+    return _PRIORITY_ORDER.get(step.get("priority", "medium"), 2)
+
+
+class _CircuitBreaker:
+    """Fails fast on an alert channel after repeated consecutive failures"""
+
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.fail_count = 0
+        self.opened_until = 0.0
+
+    def allow(self) -> bool:
+        """Whether a send may be attempted (closed, or cooldown over for a trial)."""
+        return time.monotonic() >= self.opened_until
+
+    def record_success(self):
+        self.fail_count = 0
+        self.opened_until = 0.0
+
+    def record_failure(self):
+        self.fail_count += 1
+        if self.fail_count >= self.threshold:
+            self.opened_until = time.monotonic() + self.cooldown
+
+
+class _PlanContext:
+    """State of one execute_plan() call, shared by its steps and handlers"""
+
+    def __init__(self):
+        # (action type, record) pairs, written in one batch when the plan ends
+        self.records: List[Tuple[str, Dict[str, Any]]] = []
+        # Strongest status requested so far (escalated > monitoring > logged)
+        self.status: Optional[str] = None
+
+    def request_status(self, status: str):
+        """Keeps the requested status if it outranks the current one."""
+        if self.status is None or _STATUS_RANK[status] > _STATUS_RANK[self.status]:
+            self.status = status
+
+
+def _flush_plan(
+    incident_id: int,
+    records: List[Tuple[str, Dict[str, Any]]],
+    status: Optional[str]
+):
+    """Writes a finished plan's action records and final status (blocking).
+
+    executed_at is formatted here, on the database thread, from each record's
+    timestamp_ns rather than on the event loop as each action finishes.
+    """
+    db_service.save_actions_bulk(incident_id, [
+        (action_type, record, datetime.fromtimestamp(record["timestamp_ns"] / 1e9).isoformat())
+        for action_type, record in records
+    ])
+    if status:
+        db_service.update_incident_status(incident_id, status)
+
+
+def _action_deadline(params: Dict[str, Any]) -> float:
+    """Returns the deadline in seconds for one plan step.
+
+    timeout_s comes from planner (LLM) output, so it may be a string, junk or
+    non-positive. Unusable values fall back to settings.ACTION_TIMEOUT, and the
+    result is clamped to (0, ACTION_TIMEOUT * MAX_TIMEOUT_FACTOR].
+    """
+    default = settings.ACTION_TIMEOUT
+    try:
+        deadline = float(params.get("timeout_s", default))
+    except (TypeError, ValueError):
+        return default
+    if not deadline > 0:  # Also rejects NaN
+        return default
+    return min(deadline, default * MAX_TIMEOUT_FACTOR)
+
+
+def _with_timestamp(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns a copy of an action record with its ISO-8601 UTC timestamp filled in."""
+    if "timestamp_ns" not in record:
+        return record
+    ts = datetime.fromtimestamp(record["timestamp_ns"] / 1e9, tz=timezone.utc)
+    return {**record, "timestamp": ts.isoformat()}
+
 
 class ActionExecutor:
     """Executes security response actions with comprehensive error handling"""
 
     def __init__(self):
-        self.executed_actions: List[Dict[str, Any]] = []
+        self.executed_actions: "deque[Dict[str, Any]]" = deque(
+            maxlen=settings.ACTION_HISTORY_CAP
+        )
+        # Map action types to handler methods (built once, reused for every step)
+        self._action_map: Dict[str, Callable] = {
+            "save_evidence": self._save_evidence,
+            "send_alert": self._send_alert,
+            "log_incident": self._log_incident,
+            "lock_door": self._lock_door,
+            "sound_alarm": self._sound_alarm,
+            "contact_authorities": self._contact_authorities,
+            "monitor": self._monitor,
+            "escalate": self._escalate,
+            "notify_staff": self._notify_staff,          # NEW
+            "record_video": self._record_video,          # NEW
+            "capture_snapshot": self._capture_snapshot,  # NEW
+        }
+        self._refresh_capabilities()
+        # Trip per channel during an SMTP/Twilio outage
+        self._email_breaker = _CircuitBreaker()
+        self._sms_breaker = _CircuitBreaker()
+        # Lifetime outcome counts, kept at write time so stats never scan history
+        self._n_success = 0
+        self._n_failed = 0
+        # HTTP client for outbound alert APIs, created on first use
+        self._http: Optional[httpx.AsyncClient] = None
+        # Alert SMTP session, connected on first use and reused across alerts
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+        self._smtp_lock = asyncio.Lock()
+        # Dedicated pool for blocking database calls, created on first use
+        self._db_executor: Optional[ThreadPoolExecutor] = None
+        # Per-tier plan queues and their workers, started by start()
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         logger.info("✅ ActionExecutor initialized")
 
+    def _refresh_capabilities(self):
+        """Records which alert channels are enabled and fully configured.
+
+        Settings are read once at startup; call again if they change.
+        """
+        self._email_ready = settings.ENABLE_EMAIL_ALERTS and all([
+            settings.SMTP_HOST,
+            settings.SMTP_USER,
+            settings.SMTP_PASSWORD,
+            settings.ALERT_EMAIL,
+        ])
+        self._sms_ready = settings.ENABLE_SMS_ALERTS and all([
+            settings.TWILIO_ACCOUNT_SID,
+            settings.TWILIO_AUTH_TOKEN,
+            settings.TWILIO_PHONE,
+            settings.ALERT_PHONE,
+        ])
+
+    @property
+    def running(self) -> bool:
+        """Whether dispatch workers are running on the current event loop."""
+        try:
+            return bool(self._workers) and self._loop is asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+    def start(self):
+        """Starts the dispatch workers on the running event loop (no-op if already running)."""
+        if self.running:
+            return
+
+        # Workers from a previous (closed) loop can't be reused
+        self._workers.clear()
+        self._loop = asyncio.get_running_loop()
+        self._queues = {
+            tier: asyncio.Queue(maxsize=settings.ACTION_QUEUE_SIZE)
+            for tier in _QUEUE_TIERS
+        }
+        self._workers = [
+            asyncio.create_task(self._worker(self._queues[tier]), name=f"action-{tier}-{i}")
+            for tier in _QUEUE_TIERS
+            for i in range(settings.ACTION_WORKERS)
+        ]
+        logger.info(
+            "🧵 Action dispatch started with %s workers per priority queue",
+            settings.ACTION_WORKERS
+        )
+
+    async def stop(self, timeout: float = 10.0):
+        """Waits up to timeout seconds for queued plans to finish, then cancels the workers."""
+        workers, self._workers = self._workers, []
+        if not workers:
+            return
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._queues.values())),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            pending = sum(queue.qsize() for queue in self._queues.values())
+            logger.warning("⚠️ Dropping %s queued response plan(s) on shutdown", pending)
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    async def dispatch_plan(
+        self,
+        plan: List[Dict[str, Any]],
+        incident_id: int,
+        evidence_path: str = ""
+    ):
+        """Queues a response plan for the background workers and returns.
+
+        The plan goes to the queue matching its most urgent step; when that
+        queue is full the caller waits for room (back-pressure). Workers are
+        started lazily if the app lifespan hasn't started them.
+
+        Args:
+            plan: List of action steps from PlannerAgent
+            incident_id: Database ID of the incident
+            evidence_path: Path to saved evidence file
+        """
+        if not plan:
+            logger.warning("⚠️ No plan provided for incident #%s", incident_id)
+            return
+
+        self.start()
+        tier = _RANK_TO_QUEUE[min(map(_priority_rank, plan))]
+        await self._queues[tier].put((plan, incident_id, evidence_path))
+
+    def qsize(self) -> int:
+        """Number of response plans waiting for a worker."""
+        return sum(queue.qsize() for queue in self._queues.values())
+
+    async def _worker(self, queue: asyncio.Queue):
+        """Executes queued plans until cancelled."""
+        while True:
+            plan, incident_id, evidence_path = await queue.get()
+            try:
+                await self.execute_plan(plan, incident_id, evidence_path)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(
+                    "❌ Response plan for incident #%s failed: %s",
+                    incident_id, e, exc_info=True
+                )
+            finally:
+                queue.task_done()
+
+    def _get_http(self) -> httpx.AsyncClient:
+        """Returns the keep-alive HTTP client, creating it on first use."""
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(timeout=httpx.Timeout(10.0))
+        return self._http
+
+    async def _db_call(self, fn: Callable, *args):
+        """Runs a blocking database call on the executor's own thread pool.
+
+        Keeps action bookkeeping from queueing behind (or starving) other work
+        on the event loop's default executor.
+        """
+        if self._db_executor is None:
+            self._db_executor = ThreadPoolExecutor(
+                max_workers=DB_THREADS, thread_name_prefix="action-db"
+            )
+        return await asyncio.get_running_loop().run_in_executor(self._db_executor, fn, *args)
+
+    async def _set_status(
+        self,
+        incident_id: int,
+        status: str,
+        plan_ctx: Optional[_PlanContext] = None
+    ):
+        """Requests an incident status change.
+
+        Inside execute_plan() (plan_ctx given) the change is coalesced with the
+        plan's other status actions (escalated > monitoring > logged) and
+        written once when the plan finishes; otherwise it is written immediately.
+        Each plan has its own context, so concurrent plans for one incident
+        never see each other's state.
+        """
+        if plan_ctx is None:
+            await self._db_call(db_service.update_incident_status, incident_id, status)
+            return
+        plan_ctx.request_status(status)
+
+    async def _get_smtp(self) -> aiosmtplib.SMTP:
+        """Returns the long-lived, authenticated SMTP session for alerts.
+
+        Connects (TCP + TLS + AUTH) on first use or after the server dropped
+        the previous session. Callers must hold self._smtp_lock.
+        """
+        if self._smtp is None or not self._smtp.is_connected:
+            port = settings.SMTP_PORT or 587
+            smtp = aiosmtplib.SMTP(
+                hostname=settings.SMTP_HOST,
+                port=port,
+                username=settings.SMTP_USER,
+                password=settings.SMTP_PASSWORD,
+                # Implicit TLS on the SMTPS port, STARTTLS on submission ports
+                use_tls=port == 465,
+                start_tls=port != 465,
+                timeout=30,
+            )
+            await smtp.connect()
+            self._smtp = smtp
+        return self._smtp
+
+    async def _send_smtp(self, message: EmailMessage):
+        """Sends a message over the shared SMTP session, reconnecting once if it was dropped."""
+        async with self._smtp_lock:
+            for attempt in range(2):
+                smtp = await self._get_smtp()
+                try:
+                    await smtp.send_message(message)
+                    return
+                except aiosmtplib.SMTPServerDisconnected:
+                    self._smtp = None
+                    smtp.close()
+                    if attempt:
+                        raise
+                except (Exception, asyncio.CancelledError):
+                    # Unknown session state (includes a send cut off by the
+                    # action deadline); start fresh next time
+                    self._smtp = None
+                    smtp.close()
+                    raise
+
+    async def close(self):
+        """Drains the dispatch queues, then closes the outbound clients and database pool."""
+        await self.stop()
+        if self._db_executor is not None:
+            self._db_executor.shutdown(wait=False)
+            self._db_executor = None
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        async with self._smtp_lock:
+            if self._smtp is not None:
+                smtp, self._smtp = self._smtp, None
+                try:
+                    await smtp.quit()
+                except Exception:
+                    smtp.close()
+
     async def execute_plan(
         self,
         plan: List[Dict[str, Any]],
@@ -30,124 +421,133 @@ class ActionExecutor:
     ):
         """
         Execute all actions in response plan with priority-based ordering
-        
+
+        Runs inline in the caller; use dispatch_plan() to queue a plan instead.
+
         Args:
             plan: List of action steps from PlannerAgent
             incident_id: Database ID of the incident
             evidence_path: Path to saved evidence file
         """
         if not plan:
-            logger.warning(f"⚠️ No plan provided for incident #{incident_id}")
+            logger.warning("⚠️ No plan provided for incident #%s", incident_id)
             return
 
-        logger.info(f"🚀 Executing {len(plan)}-step response plan for incident #{incident_id}")
+        logger.info("🚀 Executing %s-step response plan for incident #%s", len(plan), incident_id)
 
-        # Sort by priority (immediate > high > medium > low) then by step number
-        priority_order = {"immediate": 0, "high": 1, "medium": 2, "low": 3}
-        sorted_plan = sorted(
-            plan,
-            key=lambda x: (
-                priority_order.get(x.get("priority", "medium"), 2),
-                x.get("step", 999)
-            )
-        )
+        # Sort by priority (immediate > high > medium > low) then by step number;
+        # keys are computed once and the plan index breaks ties so the step
+        # dicts themselves are never compared
+        rank = _PRIORITY_ORDER.get
+        decorated = [
+            (rank(step.get("priority", "medium"), 2), step.get("step", 999), i, step)
+            for i, step in enumerate(plan)
+        ]
+        decorated.sort()
 
-        # Execute each action
-        for step in sorted_plan:
-            action_type = step.get("action")
-            params = step.get("parameters", {})
-            priority = step.get("priority", "medium")
+        # Action records and the incident status are collected per call and
+        # written to the database in one batch at the end
+        plan_ctx = _PlanContext()
 
-            try:
-                # Execute the action
-                await self._execute_action(
-                    action_type,
-                    incident_id,
-                    evidence_path,
-                    params
+        # Tiers run in priority order; steps within a tier run concurrently
+        try:
+            for _, tier in groupby(decorated, key=itemgetter(0)):
+                await asyncio.gather(
+                    *(
+                        self._run_step(entry[3], incident_id, evidence_path, plan_ctx)
+                        for entry in tier
+                    ),
+                    return_exceptions=True
                 )
+        finally:
+            await self._db_call(_flush_plan, incident_id, plan_ctx.records, plan_ctx.status)
 
-                # Record successful execution
-                record = {
-                    "incident_id": incident_id,
-                    "action": action_type,
-                    "status": "completed",
-                    "priority": priority,
-                    "parameters": params,
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-
-                # Save to database
-                await asyncio.to_thread(
-                    db_service.save_action,
-                    incident_id,
-                    action_type,
-                    record
-                )
+        logger.info("✅ Response plan execution completed for incident #%s", incident_id)
 
-                self.executed_actions.append(record)
+    async def _run_step(
+        self,
+        step: Dict[str, Any],
+        incident_id: int,
+        evidence_path: str,
+        plan_ctx: _PlanContext
+    ):
+        """Executes one plan step and buffers its action record (never raises)"""
+        action_type = step.get("action")
+        params = step.get("parameters", {})
+        priority = step.get("priority", "medium")
 
-                logger.info(
-                    f"✅ [{priority.upper()}] Executed '{action_type}' for incident #{incident_id}"
-                )
+        try:
+            # Execute the action
+            await self._execute_action(
+                action_type,
+                incident_id,
+                evidence_path,
+                params,
+                plan_ctx
+            )
 
-            except Exception as e:
-                # Record failed execution
-                error_record = {
-                    "incident_id": incident_id,
-                    "action": action_type,
-                    "status": "failed",
-                    "error": str(e),
-                    "parameters": params,
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-
-                await asyncio.to_thread(
-                    db_service.save_action,
-                    incident_id,
-                    action_type,
-                    error_record
-                )
+            # Record successful execution
+            record = {
+                "incident_id": incident_id,
+                "action": action_type,
+                "status": "completed",
+                "priority": priority,
+                "parameters": params,
+                "timestamp_ns": time.time_ns()
+            }
 
-                self.executed_actions.append(error_record)
+            plan_ctx.records.append((action_type, record))
+            self.executed_actions.append(record)
+            self._n_success += 1
 
-                logger.error(
-                    f"❌ Action '{action_type}' failed for incident #{incident_id}: {e}"
-                )
+            logger.info(
+                "✅ [%s] Executed '%s' for incident #%s",
+                priority.upper(), action_type, incident_id
+            )
 
-        logger.info(f"✅ Response plan execution completed for incident #{incident_id}")
+        except Exception as e:
+            # Record failed execution
+            error_record = {
+                "incident_id": incident_id,
+                "action": action_type,
+                "status": "failed",
+                "error": str(e),
+                "parameters": params,
+                "timestamp_ns": time.time_ns()
+            }
+
+            plan_ctx.records.append((action_type, error_record))
+            self.executed_actions.append(error_record)
+            self._n_failed += 1
+
+            logger.error(
+                "❌ Action '%s' failed for incident #%s: %s",
+                action_type, incident_id, e
+            )
 
     async def _execute_action(
         self,
         action_type: str,
         incident_id: int,
         evidence_path: str,
-        params: Dict[str, Any]
+        params: Dict[str, Any],
+        plan_ctx: Optional[_PlanContext] = None
     ):
         """Execute individual action based on type"""
 
-        # Map action types to handler methods
-        action_map = {
-            "save_evidence": self._save_evidence,
-            "send_alert": self._send_alert,
-            "log_incident": self._log_incident,
-            "lock_door": self._lock_door,
-            "sound_alarm": self._sound_alarm,
-            "contact_authorities": self._contact_authorities,
-            "monitor": self._monitor,
-            "escalate": self._escalate,
-            "notify_staff": self._notify_staff,          # NEW
-            "record_video": self._record_video,          # NEW
-            "capture_snapshot": self._capture_snapshot,  # NEW
-        }
-
-        handler = action_map.get(action_type)
+        handler = self._action_map.get(action_type)
 
         if not handler:
-            logger.warning(f"⚠️ Unknown action type: {action_type}")
+            logger.warning("⚠️ Unknown action type: %s", action_type)
             return
 
-        await handler(incident_id, evidence_path, params)
+        # Deadline per action so a hung SMTP/SMS/IoT endpoint can't stall its tier
+        deadline = _action_deadline(params)
+        try:
+            async with asyncio.timeout(deadline):
+                await handler(incident_id, evidence_path, params, plan_ctx)
+        except TimeoutError:
+            raise TimeoutError(f"Action '{action_type}' exceeded its {deadline}s deadline") from None
 
     # ========================================================================
     # ACTION HANDLERS
@@ -157,48 +557,61 @@ class ActionExecutor:
         self,
         incident_id: int,
         evidence_path: str,
-        params: Dict
+        params: Dict,
+        plan_ctx: Optional[_PlanContext] = None
     ):
         """Save evidence to permanent storage with metadata"""
         
-        if evidence_path and Path(evidence_path).exists():
-            file_size = Path(evidence_path).stat().st_size
+        # A single stat() both checks the file and sizes it
+        try:
+            file_size = Path(evidence_path).stat().st_size if evidence_path else None
+        except OSError:
+            file_size = None
+
+        if file_size is not None:
             logger.info(
-                f"💾 Evidence saved: {evidence_path} ({file_size} bytes)"
+                "💾 Evidence saved: %s (%s bytes)",
+                evidence_path, file_size
             )
         else:
-            logger.warning(f"⚠️ Evidence path not found or invalid: {evidence_path}")
+            logger.warning("⚠️ Evidence path not found or invalid: %s", evidence_path)
 
     async def _send_alert(
         self,
         incident_id: int,
         evidence_path: str,
-        params: Dict
+        params: Dict,
+        plan_ctx: Optional[_PlanContext] = None
     ):
         """Send alert notifications via multiple channels"""
 
         channels = params.get("channels", ["console", "email"])
 
-        # Email alerts
-        if "email" in channels and settings.ENABLE_EMAIL_ALERTS:
-            try:
-                await self._send_email_alert(incident_id)
-            except Exception as e:
-                logger.error(f"❌ Email alert failed: {e}")
-
-        # SMS alerts
-        if "sms" in channels and settings.ENABLE_SMS_ALERTS:
-            try:
-                await self._send_sms_alert(incident_id)
-            except Exception as e:
-                logger.error(f"❌ SMS alert failed: {e}")
+        alerts = []
+        if "email" in channels and self._email_ready:
+            alerts.append(self._send_email_alert)
+        if "sms" in channels and self._sms_ready:
+            alerts.append(self._send_sms_alert)
+
+        if alerts:
+            # One incident lookup shared by every channel; the channels then
+            # deliver concurrently (each logs its own failure)
+            incident = await self._db_call(db_service.get_incident_by_id, incident_id)
+            if incident:
+                await asyncio.gather(
+                    *(send(incident_id, incident) for send in alerts),
+                    return_exceptions=True
+                )
+            else:
+                logger.error("❌ Incident #%s not found for alerts", incident_id)
 
         # Console alert (always active for development)
         logger.warning(
-            f"🚨 [ALERT] SECURITY INCIDENT #{incident_id} | Evidence: {evidence_path}"
+            "🚨 [ALERT] SECURITY INCIDENT #%s | Evidence: %s",
+            incident_id, evidence_path
         )
 
-    async def _send_email_alert(self, incident_id: int):
+    async def _send_email_alert(self, incident_id: int, incident: Optional[Dict] = None):
         """Send email alert via SMTP with detailed incident information"""
 
         if not all([
@@ -210,82 +623,54 @@ class ActionExecutor:
             logger.warning("⚠️ Email configuration incomplete - skipping email alert")
             return
 
-        # Fetch incident details
-        incident = await asyncio.to_thread(
-            db_service.get_incident_by_id,
-            incident_id
-        )
+        # Fetch incident details unless the caller already has them
+        if incident is None:
+            incident = await self._db_call(db_service.get_incident_by_id, incident_id)
 
         if not incident:
-            logger.error(f"❌ Incident #{incident_id} not found for email alert")
+            logger.error("❌ Incident #%s not found for email alert", incident_id)
             return
 
-        try:
-            import aiosmtplib
-            from email.message import EmailMessage
+        breaker = self._email_breaker
+        if not breaker.allow():
+            logger.warning("⚠️ Email alerts failing repeatedly - skipping Email alert")
+            return
 
+        try:
             message = EmailMessage()
             message["From"] = settings.SMTP_USER
             message["To"] = settings.ALERT_EMAIL
             message["Subject"] = f"🚨 AegisAI Alert: {incident['type'].upper()} - Incident #{incident_id}"
 
-            # Create detailed email body
-            subjects_str = ", ".join(incident.get('subjects', [])) or "None identified"
-            
-            message.set_content(
-                f"""
-=================================================
-AegisAI SECURITY ALERT
-=================================================
-
-INCIDENT DETAILS:
--------------------------------------------------
-Incident ID:    #{incident_id}
-Type:           {incident['type'].upper()}
-Severity:       {incident['severity'].upper()}
-Confidence:     {incident['confidence']}%
-Status:         {incident.get('status', 'active').upper()}
-Timestamp:      {incident['timestamp']}
-
-ANALYSIS:
--------------------------------------------------
-{incident['reasoning']}
-
-SUBJECTS IDENTIFIED:
--------------------------------------------------
-{subjects_str}
-
-RESPONSE PLAN:
--------------------------------------------------
-{len(incident.get('response_plan', []))} action(s) initiated
-
-EVIDENCE:
--------------------------------------------------
-Evidence Path: {incident.get('evidence_path', 'N/A')}
-
-=================================================
-This is an automated alert from AegisAI Security System.
-Please review the incident details and take appropriate action.
-=================================================
-"""
-            )
-
-            await aiosmtplib.send(
-                message,
-                hostname=settings.SMTP_HOST,
-                port=settings.SMTP_PORT or 587,
-                username=settings.SMTP_USER,
-                password=settings.SMTP_PASSWORD,
-                use_tls=True,
-            )
-
-            logger.info(f"✅ Email alert sent to {settings.ALERT_EMAIL}")
-
+            # Detailed email body from the pre-parsed template
+            message.set_content(render_email_body(
+                incident_id=incident_id,
+                type=incident['type'].upper(),
+                severity=incident['severity'].upper(),
+                confidence=incident['confidence'],
+                status=incident.get('status', 'active').upper(),
+                timestamp=incident['timestamp'],
+                reasoning=incident['reasoning'],
+                subjects=", ".join(incident.get('subjects', [])) or "None identified",
+                plan_steps=len(incident.get('response_plan', [])),
+                evidence_path=incident.get('evidence_path', 'N/A')
+            ))
+
+            await self._send_smtp(message)
+
+            breaker.record_success()
+            logger.info("✅ Email alert sent to %s", settings.ALERT_EMAIL)
+
+        except asyncio.CancelledError:
+            # Cut off by the action deadline
+            breaker.record_failure()
+            raise
         except Exception as e:
-            logger.error(f"❌ Email alert failed: {e}")
+            breaker.record_failure()
+            logger.error("❌ Email alert failed: %s", e)
             raise
 
-    async def _send_sms_alert(self, incident_id: int):
+    async def _send_sms_alert(self, incident_id: int, incident: Optional[Dict] = None):
         """Send SMS alert via Twilio with incident summary"""
 
         if not all([
@@ -297,24 +682,20 @@ Please review the incident details and take appropriate action.
             logger.warning("⚠️ SMS configuration incomplete - skipping SMS alert")
             return
 
-        # Fetch incident details
-        incident = await asyncio.to_thread(
-            db_service.get_incident_by_id,
-            incident_id
-        )
+        # Fetch incident details unless the caller already has them
+        if incident is None:
+            incident = await self._db_call(db_service.get_incident_by_id, incident_id)
 
         if not incident:
-            logger.error(f"❌ Incident #{incident_id} not found for SMS")
+            logger.error("❌ Incident #%s not found for SMS", incident_id)
             return
 
-        try:
-            from twilio.rest import Client
-
-            client = Client(
-                settings.TWILIO_ACCOUNT_SID,
-                settings.TWILIO_AUTH_TOKEN,
-            )
+        breaker = self._sms_breaker
+        if not breaker.allow():
+            logger.warning("⚠️ SMS alerts failing repeatedly - skipping SMS alert")
+            return
 
+        try:
             # Create concise SMS message
             sms_body = (
                 f"🚨 AegisAI Alert #{incident_id}: "
@@ -324,58 +705,73 @@ Please review the incident details and take appropriate action.
                 f"Time: {incident['timestamp']}"
             )
 
-            message = client.messages.create(
-                body=sms_body,
-                from_=settings.TWILIO_PHONE,
-                to=settings.ALERT_PHONE,
+            # Twilio REST API over the shared keep-alive client (the twilio SDK
+            # would block the event loop for the whole round trip)
+            response = await self._get_http().post(
+                TWILIO_MESSAGES_URL.format(sid=settings.TWILIO_ACCOUNT_SID),
+                auth=(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN),
+                data={
+                    "From": settings.TWILIO_PHONE,
+                    "To": settings.ALERT_PHONE,
+                    "Body": sms_body,
+                },
             )
+            response.raise_for_status()
+            breaker.record_success()
 
-            logger.info(f"✅ SMS alert sent to {settings.ALERT_PHONE} (SID: {message.sid})")
+            logger.info(
+                "✅ SMS alert sent to %s (SID: %s)",
+                settings.ALERT_PHONE, response.json().get('sid')
+            )
 
+        except asyncio.CancelledError:
+            # Cut off by the action deadline
+            breaker.record_failure()
+            raise
         except Exception as e:
-            logger.error(f"❌ SMS alert failed: {e}")
+            breaker.record_failure()
+            logger.error("❌ SMS alert failed: %s", e)
             raise
 
     async def _log_incident(
         self,
         incident_id: int,
         evidence_path: str,
-        params: Dict
+        params: Dict,
+        plan_ctx: Optional[_PlanContext] = None
     ):
         """Confirm incident logging and update status"""
         
         # Update incident status to 'logged' if not already
-        await asyncio.to_thread(
-            db_service.update_incident_status,
-            incident_id,
-            "logged"
-        )
+        await self._set_status(incident_id, "logged", plan_ctx)
         
-        logger.info(f"📝 Incident #{incident_id} formally logged and documented")
+        logger.info("📝 Incident #%s formally logged and documented", incident_id)
 
     async def _lock_door(
         self,
         incident_id: int,
         evidence_path: str,
-        params: Dict
+        params: Dict,
+        plan_ctx: Optional[_PlanContext] = None
     ):
         """Trigger automated door lock via IoT integration"""
         
         door_id = params.get("door_id", "main_entrance")
         
         if not settings.ENABLE_IOT_ACTIONS:
-            logger.info(f"🔒 [SIMULATED] Door locked: {door_id}")
+            logger.info("🔒 [SIMULATED] Door locked: %s", door_id)
             return
 
         # Real IoT integration would go here
         # Example: await iot_service.lock_door(door_id)
-        logger.info(f"🔒 Door locked via IoT: {door_id}")
+        logger.info("🔒 Door locked via IoT: %s", door_id)
 
     async def _sound_alarm(
         self,
         incident_id: int,
         evidence_path: str,
-        params: Dict
+        params: Dict,
+        plan_ctx: Optional[_PlanContext] = None
     ):
         """Activate audible alarm system"""
         
@@ -383,18 +779,19 @@ Please review the incident details and take appropriate action.
         alarm_type = params.get("type", "intrusion")
         
         if not settings.ENABLE_IOT_ACTIONS:
-            logger.info(f"🚨 [SIMULATED] Alarm activated: {alarm_type} ({duration}s)")
+            logger.info("🚨 [SIMULATED] Alarm activated: %s (%ss)", alarm_type, duration)
             return
 
         # Real IoT integration would go here
         # Example: await iot_service.sound_alarm(alarm_type, duration)
-        logger.info(f"🚨 Alarm activated via IoT: {alarm_type} for {duration}s")
+        logger.info("🚨 Alarm activated via IoT: %s for %ss", alarm_type, duration)
 
     async def _contact_authorities(
         self,
         incident_id: int,
         evidence_path: str,
-        params: Dict
+        params: Dict,
+        plan_ctx: Optional[_PlanContext] = None
     ):
         """Simulate contacting law enforcement (requires manual verification in production)"""
         
@@ -402,8 +799,9 @@ Please review the incident details and take appropriate action.
         urgency = params.get("urgency", "high")
         
         logger.warning(
-            f"🚔 [SIMULATED] Authorities contacted: {authority_type} | "
-            f"Urgency: {urgency} | Incident #{incident_id}"
+            "🚔 [SIMULATED] Authorities contacted: %s | "
+            "Urgency: %s | Incident #%s",
+            authority_type, urgency, incident_id
         )
         
         # In production, this would:
@@ -415,7 +813,8 @@ Please review the incident details and take appropriate action.
         self,
         incident_id: int,
         evidence_path: str,
-        params: Dict
+        params: Dict,
+        plan_ctx: Optional[_PlanContext] = None
     ):
         """Continue monitoring the area for specified duration"""
         
@@ -423,22 +822,20 @@ Please review the incident details and take appropriate action.
         area = params.get("area", "incident_location")
         
         logger.info(
-            f"👁️ Enhanced monitoring activated for {duration}s | "
-            f"Area: {area} | Incident #{incident_id}"
+            "👁️ Enhanced monitoring activated for %ss | "
+            "Area: %s | Incident #%s",
+            duration, area, incident_id
         )
         
         # Update incident status to indicate ongoing monitoring
-        await asyncio.to_thread(
-            db_service.update_incident_status,
-            incident_id,
-            "monitoring"
-        )
+        await self._set_status(incident_id, "monitoring", plan_ctx)
 
     async def _escalate(
         self,
         incident_id: int,
         evidence_path: str,
-        params: Dict
+        params: Dict,
+        plan_ctx: Optional[_PlanContext] = None
     ):
         """Escalate incident to human security team"""
         
@@ -446,15 +843,12 @@ Please review the incident details and take appropriate action.
         reason = params.get("reason", "High severity incident requires human intervention")
         
         # Update incident status
-        await asyncio.to_thread(
-            db_service.update_incident_status,
-            incident_id,
-            "escalated"
-        )
+        await self._set_status(incident_id, "escalated", plan_ctx)
         
         logger.warning(
-            f"⬆️ Incident #{incident_id} escalated to {target} | "
-            f"Reason: {reason}"
+            "⬆️ Incident #%s escalated to %s | "
+            "Reason: %s",
+            incident_id, target, reason
         )
         
         # In production, this would trigger:
@@ -466,7 +860,8 @@ Please review the incident details and take appropriate action.
         self,
         incident_id: int,
         evidence_path: str,
-        params: Dict
+        params: Dict,
+        plan_ctx: Optional[_PlanContext] = None
     ):
         """Send notification to on-site staff"""
         
@@ -474,8 +869,9 @@ Please review the incident details and take appropriate action.
         message = params.get("message", f"Security incident #{incident_id} detected")
         
         logger.info(
-            f"👥 Staff notification sent to {staff_group} | "
-            f"Message: {message}"
+            "👥 Staff notification sent to %s | "
+            "Message: %s",
+            staff_group, message
         )
         
         # In production, integrate with:
@@ -487,7 +883,8 @@ Please review the incident details and take appropriate action.
         self,
         incident_id: int,
         evidence_path: str,
-        params: Dict
+        params: Dict,
+        plan_ctx: Optional[_PlanContext] = None
     ):
         """Start continuous video recording"""
         
@@ -495,8 +892,9 @@ Please review the incident details and take appropriate action.
         camera_id = params.get("camera_id", "main_camera")
         
         logger.info(
-            f"🎥 Video recording started: {camera_id} for {duration}s | "
-            f"Incident #{incident_id}"
+            "🎥 Video recording started: %s for %ss | "
+            "Incident #%s",
+            camera_id, duration, incident_id
         )
         
         # In production, this would:
@@ -508,7 +906,8 @@ Please review the incident details and take appropriate action.
         self,
         incident_id: int,
         evidence_path: str,
-        params: Dict
+        params: Dict,
+        plan_ctx: Optional[_PlanContext] = None
     ):
         """Capture high-resolution snapshot"""
         
@@ -516,58 +915,51 @@ Please review the incident details and take appropriate action.
         resolution = params.get("resolution", "high")
         
         logger.info(
-            f"📸 High-res snapshot captured: {camera_id} | "
-            f"Resolution: {resolution} | Incident #{incident_id}"
+            "📸 High-res snapshot captured: %s | "
+            "Resolution: %s | Incident #%s",
+            camera_id, resolution, incident_id
         )
         
         # Evidence already saved by vision_agent, this confirms it
         if evidence_path and Path(evidence_path).exists():
-            logger.info(f"✅ Snapshot confirmed at: {evidence_path}")
+            logger.info("✅ Snapshot confirmed at: %s", evidence_path)
 
     # ========================================================================
     # UTILITY METHODS
     # ========================================================================
 
     def get_execution_history(self, limit: int = 10) -> List[Dict]:
-        """Get recent action execution history"""
-        return self.executed_actions[-limit:]
+        """Get recent action execution history (timestamps formatted on read)"""
+        history = self.executed_actions
+        recent = islice(history, max(0, len(history) - limit), None)
+        return [_with_timestamp(record) for record in recent]
 
     def get_execution_stats(self) -> Dict[str, Any]:
-        """Get statistics about action execution"""
-        
-        if not self.executed_actions:
-            return {
-                "total_actions": 0,
-                "successful": 0,
-                "failed": 0,
-                "success_rate": 0.0
-            }
-        
-        successful = sum(1 for a in self.executed_actions if a.get("status") == "completed")
-        failed = sum(1 for a in self.executed_actions if a.get("status") == "failed")
-        
+        """Get statistics about action execution (lifetime totals)"""
+
+        total = self._n_success + self._n_failed
         return {
-            "total_actions": len(self.executed_actions),
-            "successful": successful,
-            "failed": failed,
-            "success_rate": round((successful / len(self.executed_actions)) * 100, 2)
+            "total_actions": total,
+            "successful": self._n_success,
+            "failed": self._n_failed,
+            "success_rate": round((self._n_success / total) * 100, 2) if total else 0.0
         }
 
     async def test_action(self, action_type: str, params: Dict = None) -> bool:
         """Test a single action without creating an incident"""
         
         try:
-            logger.info(f"🧪 Testing action: {action_type}")
+            logger.info("🧪 Testing action: %s", action_type)
             await self._execute_action(
                 action_type=action_type,
                 incident_id=0,  # Test incident ID
                 evidence_path="",
                 params=params or {}
             )
-            logger.info(f"✅ Action test successful: {action_type}")
+            logger.info("✅ Action test successful: %s", action_type)
             return True
         except Exception as e:
-            logger.error(f"❌ Action test failed: {action_type} - {e}")
+            logger.error("❌ Action test failed: %s - %s", action_type, e)
             return False
 
 
@@ -0,0 +1,128 @@
+"""
+Analysis Queue - Background execution of /api/analyze requests
+Frames are queued and analyzed by a fixed pool of workers; callers poll by task id
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from typing import List, Optional
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisQueue:
+    """Fixed worker pool with a bounded queue that runs VisionAgent analyses off the request path"""
+
+    # Tasks kept for polling; past this the oldest *completed* ones are dropped
+    MAX_TRACKED_TASKS = 1024
+
+    def __init__(self, workers: Optional[int] = None, queue_size: Optional[int] = None):
+        self.num_workers = workers or settings.ANALYZE_WORKERS
+        self.queue_size = queue_size or settings.ANALYZE_QUEUE_SIZE
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: "OrderedDict[str, asyncio.Future]" = OrderedDict()
+
+    @property
+    def running(self) -> bool:
+        """Whether workers are running on the current event loop."""
+        try:
+            return bool(self._workers) and self._loop is asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+    def start(self):
+        """Starts the worker pool on the running event loop (no-op if already running)."""
+        if self.running:
+            return
+
+        # Workers from a previous (closed) loop can't be reused
+        self._workers.clear()
+        self._tasks.clear()
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"analysis-worker-{i}")
+            for i in range(self.num_workers)
+        ]
+        logger.info(f"🧵 Analysis queue started with {self.num_workers} workers")
+
+    async def stop(self):
+        """Cancels the workers and fails any analyses still waiting in the queue."""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        for future in self._tasks.values():
+            if not future.done():
+                future.cancel()
+        self._tasks.clear()
+
+    def submit(self, agent, **process_kwargs) -> str:
+        """Queues an analysis and returns its task id.
+
+        Workers are started lazily if the app lifespan hasn't started them.
+
+        Args:
+            agent: VisionAgent that performs the analysis.
+            **process_kwargs: Arguments for agent.process().
+
+        Returns:
+            str: Task id to pass to get().
+
+        Raises:
+            asyncio.QueueFull: queue_size analyses are already waiting.
+        """
+        self.start()
+
+        task_id = uuid.uuid4().hex
+        self._queue.put_nowait((task_id, agent, process_kwargs))
+        self._tasks[task_id] = self._loop.create_future()
+
+        # Pending tasks are bounded by the queue, so only finished ones need evicting
+        if len(self._tasks) > self.MAX_TRACKED_TASKS:
+            for done_id in [tid for tid, future in self._tasks.items() if future.done()]:
+                del self._tasks[done_id]
+                if len(self._tasks) <= self.MAX_TRACKED_TASKS:
+                    break
+        return task_id
+
+    def get(self, task_id: str) -> Optional[asyncio.Future]:
+        """Returns the future for a task id, or None if unknown or expired."""
+        return self._tasks.get(task_id)
+
+    def qsize(self) -> int:
+        """Number of analyses waiting for a worker."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _worker(self):
+        """Consumes queued analyses until cancelled."""
+        while True:
+            task_id, agent, process_kwargs = await self._queue.get()
+            future = self._tasks.get(task_id)
+            try:
+                # Skip work nobody can collect any more
+                if future is None or future.done():
+                    continue
+                result = await agent.process(**process_kwargs)
+                if not future.done():
+                    future.set_result(result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Queued analysis {task_id} failed: {e}", exc_info=True)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+                    future.exception()  # Reported via get(); don't warn if never polled
+            finally:
+                self._queue.task_done()
+
+
+# Singleton instance
+analysis_queue = AnalysisQueue()
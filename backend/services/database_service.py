@@ -4,39 +4,267 @@ Thread-safe incident tracking with comprehensive querying and analytics
 """
 
 import sqlite3
-import json
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Any, Sequence, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
 from contextlib import contextmanager
 
+import orjson
+
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# orjson for every JSON column; int dict keys are accepted like json.dumps would
+_ORJSON_OPTS = orjson.OPT_NON_STR_KEYS
+_loads = orjson.loads
+
+
+# Per-connection tuning: WAL makes a commit an append without an fsync
+# (synchronous=NORMAL), and a 64 MiB page cache plus mmap keeps reads in memory
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+)
+
+# Reader connections are opened read-only and map more of the file, so hot
+# pages are served from the OS page cache without read() syscalls
+_READ_PRAGMAS = (
+    "PRAGMA query_only=1",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-32768",
+    "PRAGMA mmap_size=536870912",
+)
+
+
+# JSON columns are stored as binary JSONB where SQLite supports it (3.45+) and
+# converted back to JSON text in the SELECT, so readers always get text
+_JSONB = sqlite3.sqlite_version_info >= (3, 45, 0)
+_JSON_IN = "jsonb(?)" if _JSONB else "?"
+
+
+def _json_out(column: str) -> str:
+    """Select-list expression returning a JSON column as text."""
+    return f"json({column}) AS {column}" if _JSONB else column
+
+
+# Hot-path statements, kept as constants so every call reuses the same
+# prepared statement from the connection's cache
+_INSERT_INCIDENT_SQL = f"""
+    INSERT INTO incidents (
+        timestamp, incident_type, severity, confidence,
+        reasoning, subjects, recommended_actions,
+        evidence_path, response_plan, status, created_at, created_ts
+    ) VALUES (?, ?, ?, ?, ?, {_JSON_IN}, {_JSON_IN}, ?, {_JSON_IN}, ?, ?, ?)
+"""
+_INSERT_ACTION_SQL = f"""
+    INSERT INTO actions (
+        incident_id, action_type, action_data,
+        priority, status, executed_at
+    ) VALUES (?, ?, {_JSON_IN}, ?, ?, ?)
+"""
+_UPDATE_STATUS_SQL = "UPDATE incidents SET status = ?, updated_at = ? WHERE id = ?"
+_SELECT_INCIDENT_SQL = f"""
+    SELECT
+        id, timestamp, incident_type, severity, confidence, reasoning,
+        {_json_out('subjects')}, {_json_out('recommended_actions')},
+        evidence_path, {_json_out('response_plan')}, status, created_at, updated_at
+    FROM incidents WHERE id = ?
+"""
+_SELECT_ACTIONS_SQL = f"""
+    SELECT
+        id, incident_id, action_type, {_json_out('action_data')},
+        priority, status, executed_at, created_at
+    FROM actions WHERE incident_id = ? ORDER BY executed_at ASC
+"""
+# Result dict keys in the column order of _SELECT_INCIDENT_SQL,
+# _SELECT_ACTIONS_SQL and _RECENT_INCIDENTS_COLUMNS; rows for those queries
+# are plain tuples zipped onto them
+_INCIDENT_KEYS = (
+    'id', 'timestamp', 'type', 'severity', 'confidence', 'reasoning',
+    'subjects', 'recommended_actions', 'evidence_path', 'response_plan',
+    'status', 'created_at', 'updated_at'
+)
+_ACTION_KEYS = (
+    'id', 'incident_id', 'action_type', 'action_data',
+    'priority', 'status', 'executed_at', 'created_at'
+)
+_RECENT_INCIDENT_KEYS = (
+    'id', 'timestamp', 'type', 'severity', 'confidence', 'reasoning',
+    'subjects', 'recommended_actions', 'evidence_path', 'status', 'created_at'
+)
+_RECENT_INCIDENTS_COLUMNS = f"""
+    id, timestamp, incident_type, severity, confidence,
+    reasoning, {_json_out('subjects')}, {_json_out('recommended_actions')},
+    evidence_path, status, created_at
+"""
+
+# get_recent_incidents_json(): output key -> expression over the listing
+# columns; json() keeps the JSON columns nested (and turns JSONB into text).
+# The route serves this JSON without model validation, so nullable columns
+# fall back to the values save_incidents_bulk() would have written
+_RECENT_INCIDENT_JSON_FIELDS = {
+    'id': 'id',
+    'timestamp': 'timestamp',
+    'type': 'incident_type',
+    'severity': 'severity',
+    'confidence': 'CAST(confidence AS REAL)',
+    'reasoning': 'reasoning',
+    'subjects': "json(COALESCE(NULLIF(subjects, ''), '[]'))",
+    'recommended_actions': "json(COALESCE(NULLIF(recommended_actions, ''), '[]'))",
+    'evidence_path': "COALESCE(evidence_path, '')",
+    'status': "COALESCE(status, 'active')",
+    'created_at': "COALESCE(created_at, '')",
+}
+
+# Aggregate ORDER BY (json_group_array(... ORDER BY ...)) needs SQLite 3.44+;
+# older versions don't guarantee a subquery's order reaches the aggregate
+_AGGREGATE_ORDER_BY = sqlite3.sqlite_version_info >= (3, 44, 0)
+
+# Prepared statements kept per connection (sqlite3's default is 128)
+_CACHED_STATEMENTS = 256
+
+# Most incidents the background writer commits in one transaction
+_WRITE_BATCH = 1000
+
+
+def _dumps(value: Any) -> str:
+    """Serializes a value for a JSON column."""
+    return orjson.dumps(value, option=_ORJSON_OPTS).decode()
+
+
+def _epoch_seconds(created_at: str) -> int:
+    """Unix seconds for an ISO created_at (naive values are local time)."""
+    try:
+        return int(datetime.fromisoformat(created_at).timestamp())
+    except (TypeError, ValueError):
+        return int(time.time())
+
 
 class DatabaseService:
     """Thread-safe database operations for incident tracking with advanced querying"""
+
+    # Seconds a dashboard aggregate is reused when nothing has been written
+    STATS_CACHE_TTL = 5.0
     
     def __init__(self, db_path: Optional[Path] = None):
         self.db_path = db_path or settings.DB_PATH
+        # One long-lived writer and one reader connection per thread, opened on first use
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # Bumped by close() so threads reopen instead of using a closed connection
+        self._generation = 0
+        # Dashboard aggregates: key -> (write version, expires at, result);
+        # every write bumps the version, which invalidates them all
+        self._stats_cache: Dict[Tuple, Tuple[int, float, Any]] = {}
+        self._stats_version = 0
+        # Bumped after every write that changes or removes an existing
+        # incident, so callers caching incidents can tell their copy is stale
+        self.incident_version = 0
+        # Background incident writer (thread, queue), started on first save
+        self._writer: Optional[Tuple[threading.Thread, queue.SimpleQueue]] = None
+        self._writer_lock = threading.Lock()
         self._ensure_database()
         logger.info(f"✅ Database service initialized: {self.db_path}")
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Opens and tunes a connection for the calling thread."""
+        if read_only:
+            database, pragmas = f"{Path(self.db_path).resolve().as_uri()}?mode=ro", _READ_PRAGMAS
+        else:
+            database, pragmas = self.db_path, _CONNECTION_PRAGMAS
+        # check_same_thread=False only so close() can close it from any thread
+        conn = sqlite3.connect(
+            database, uri=read_only, check_same_thread=False, cached_statements=_CACHED_STATEMENTS
+        )
+        conn.row_factory = sqlite3.Row  # Enable dict-like access
+        for pragma in pragmas:
+            conn.execute(pragma)
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    def _thread_connection(self, read_only: bool) -> sqlite3.Connection:
+        """Returns this thread's writer or reader connection, reopening it after close()."""
+        key = "reader" if read_only else "writer"
+        conn, generation = getattr(self._local, key, (None, None))
+        if generation != self._generation:
+            conn = self._connect(read_only)
+            setattr(self._local, key, (conn, self._generation))
+        return conn
     
     @contextmanager
     def _get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Enable dict-like access
+        """Context manager yielding this thread's persistent connection"""
+        conn = self._thread_connection(read_only=False)
         try:
             yield conn
         finally:
-            conn.close()
+            # Never hand the next caller a transaction left open by an error
+            if conn.in_transaction:
+                conn.rollback()
+
+    @contextmanager
+    def _get_read_connection(self):
+        """Context manager yielding this thread's persistent read-only connection"""
+        conn = self._thread_connection(read_only=True)
+        try:
+            yield conn
+        finally:
+            # An open transaction would pin the reader to an old snapshot
+            if conn.in_transaction:
+                conn.rollback()
+
+    def _invalidate_stats(self):
+        """Marks cached aggregates stale after a write."""
+        self._stats_version += 1
+
+    def _cached_stats(self, key: Tuple, compute: Callable[[], Any], what: str, default: Any) -> Any:
+        """Returns a cached aggregate, recomputing it when stale or expired.
+
+        The result is shared between callers and must not be mutated. Failures
+        are logged and answered with default, and are never cached.
+        """
+        version = self._stats_version
+        entry = self._stats_cache.get(key)
+        if entry is not None and entry[0] == version and time.monotonic() < entry[1]:
+            return entry[2]
+
+        try:
+            result = compute()
+        except Exception as e:
+            logger.error(f"❌ Failed to get {what}: {e}")
+            return default
+
+        self._stats_cache[key] = (version, time.monotonic() + self.STATS_CACHE_TTL, result)
+        return result
+
+    def close(self):
+        """Stops the incident writer and closes every thread's connection; later calls reconnect."""
+        self._stop_writer()
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._generation += 1
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Failed to close database connection: {e}")
     
     def _ensure_database(self):
         """Create database and tables if they don't exist"""
         with self._get_connection() as conn:
+            # WAL is persistent in the database file, so set it once here
+            conn.execute("PRAGMA journal_mode=WAL")
+
             cursor = conn.cursor()
             
             # Incidents table with enhanced fields
@@ -54,9 +282,21 @@ class DatabaseService:
                     response_plan TEXT,
                     status TEXT DEFAULT 'active',
                     created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    created_ts INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
                 )
             """)
+
+            # Unix-seconds copy of created_at for time-window filters; older
+            # databases get the column and a one-off backfill (created_at is
+            # local time, hence the 'utc' modifier)
+            columns = {row[1] for row in cursor.execute("PRAGMA table_info(incidents)")}
+            if 'created_ts' not in columns:
+                cursor.execute("ALTER TABLE incidents ADD COLUMN created_ts INTEGER")
+                cursor.execute("""
+                    UPDATE incidents
+                    SET created_ts = CAST(strftime('%s', created_at, 'utc') AS INTEGER)
+                """)
             
             # Actions table with execution details
             cursor.execute("""
@@ -98,6 +338,52 @@ class DatabaseService:
                 )
             """)
             
+            # Hourly per-severity rollup kept current by triggers, so trend
+            # queries read a few rows per hour instead of scanning incidents
+            rollup_exists = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'incident_rollup_hourly'"
+            ).fetchone()
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS incident_rollup_hourly (
+                    hour_ts INTEGER NOT NULL,
+                    severity TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    sum_conf REAL NOT NULL,
+                    PRIMARY KEY (hour_ts, severity)
+                ) WITHOUT ROWID
+            """)
+            if not rollup_exists:
+                cursor.execute("""
+                    INSERT INTO incident_rollup_hourly
+                    SELECT created_ts / 3600 * 3600, severity, COUNT(*), SUM(confidence)
+                    FROM incidents
+                    GROUP BY 1, 2
+                """)
+            
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_incidents_rollup_insert
+                AFTER INSERT ON incidents
+                BEGIN
+                    INSERT INTO incident_rollup_hourly
+                    VALUES (NEW.created_ts / 3600 * 3600, NEW.severity, 1, NEW.confidence)
+                    ON CONFLICT (hour_ts, severity) DO UPDATE
+                    SET count = count + 1, sum_conf = sum_conf + excluded.sum_conf;
+                END
+            """)
+            
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_incidents_rollup_delete
+                AFTER DELETE ON incidents
+                BEGIN
+                    UPDATE incident_rollup_hourly
+                    SET count = count - 1, sum_conf = sum_conf - OLD.confidence
+                    WHERE hour_ts = OLD.created_ts / 3600 * 3600 AND severity = OLD.severity;
+                    DELETE FROM incident_rollup_hourly
+                    WHERE hour_ts = OLD.created_ts / 3600 * 3600 AND severity = OLD.severity
+                      AND count <= 0;
+                END
+            """)
+            
             # Performance indexes
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_incidents_created 
@@ -114,6 +400,20 @@ class DatabaseService:
                 ON incidents(status)
             """)
             
+            # Time-window aggregates: range scan on created_ts, covering the
+            # grouped columns
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_incidents_created_ts
+                ON incidents(created_ts, severity, confidence)
+            """)
+            
+            # Dashboard listing: status/severity equality filters, newest first,
+            # type filter checked in the index before any table lookup
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_incidents_dashboard
+                ON incidents(status, severity, created_at DESC, incident_type)
+            """)
+            
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_actions_incident 
                 ON actions(incident_id)
@@ -141,40 +441,154 @@ class DatabaseService:
         Returns:
             Incident ID or -1 on failure
         """
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
+        incident_id = self.save_incident_async(incident_data).result()
+        if incident_id > 0:
+            logger.info(f"✅ Saved incident #{incident_id}: {incident_data.get('type', 'unknown')}")
+        return incident_id
+
+    def save_incident_async(self, incident_data: Dict[str, Any]) -> Future:
+        """
+        Queue an incident for the background writer without waiting for the commit
+        
+        Incidents queued while the writer is committing are saved together in
+        its next transaction.
+        
+        Args:
+            incident_data: Incident details, as accepted by save_incident
             
+        Returns:
+            Future resolving to the incident ID, or -1 on failure
+        """
+        future: Future = Future()
+        self._writer_queue().put((incident_data, future))
+        return future
+
+    def _writer_queue(self) -> queue.SimpleQueue:
+        """Returns the incident writer's queue, starting the writer on first use."""
+        writer = self._writer
+        if writer is None:
+            with self._writer_lock:
+                writer = self._writer
+                if writer is None:
+                    write_q = queue.SimpleQueue()
+                    thread = threading.Thread(
+                        target=self._write_loop, args=(write_q,), name="db-writer", daemon=True
+                    )
+                    thread.start()
+                    writer = self._writer = (thread, write_q)
+        return writer[1]
+
+    def _stop_writer(self):
+        """Commits whatever is queued, then stops the incident writer."""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is None:
+            return
+
+        thread, write_q = writer
+        write_q.put(None)
+        thread.join()
+
+        # Saves that raced with the stop sentinel
+        leftovers = []
+        while True:
             try:
-                cursor.execute("""
-                    INSERT INTO incidents (
-                        timestamp, incident_type, severity, confidence,
-                        reasoning, subjects, recommended_actions, 
-                        evidence_path, response_plan, status, created_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    incident_data.get('timestamp', datetime.now().isoformat()),
-                    incident_data.get('type', 'unknown'),
-                    incident_data.get('severity', 'low'),
-                    incident_data.get('confidence', 0),
-                    incident_data.get('reasoning', ''),
-                    json.dumps(incident_data.get('subjects', [])),
-                    json.dumps(incident_data.get('recommended_actions', [])),
-                    incident_data.get('evidence_path', ''),
-                    json.dumps(incident_data.get('response_plan', [])),
-                    incident_data.get('status', 'active'),
-                    incident_data.get('created_at', datetime.now().isoformat())
-                ))
-                
-                incident_id = cursor.lastrowid
+                leftovers.append(write_q.get_nowait())
+            except queue.Empty:
+                break
+        self._write_batch([item for item in leftovers if item is not None])
+
+    def _write_loop(self, write_q: queue.SimpleQueue):
+        """Commits queued incidents in batches until the None sentinel arrives."""
+        while True:
+            batch = [write_q.get()]
+            # Everything that queued up during the previous commit goes in this one
+            while len(batch) < _WRITE_BATCH:
+                try:
+                    batch.append(write_q.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            self._write_batch([item for item in batch if item is not None])
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[Tuple[Dict[str, Any], Future]]):
+        """Saves a batch of queued incidents and resolves their futures."""
+        # Incidents whose futures were cancelled while queued are dropped
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        ids = self._save_queued([incident_data for incident_data, _ in batch])
+        for (_, future), incident_id in zip(batch, ids):
+            future.set_result(incident_id)
+
+    def _save_queued(self, incidents: List[Dict[str, Any]]) -> List[int]:
+        """Saves queued incidents, returning -1 for any that could not be saved."""
+        if not incidents:
+            return []
+
+        try:
+            ids = self.save_incidents_bulk(incidents)
+        except Exception as e:
+            logger.error(f"❌ Failed to save incidents: {e}")
+            ids = []
+
+        if ids:
+            return ids
+        if len(incidents) == 1:
+            return [-1]
+        # One bad incident must not sink the rest: retry them one by one
+        return [self._save_queued([incident_data])[0] for incident_data in incidents]
+
+    def save_incidents_bulk(self, incidents: List[Dict[str, Any]]) -> List[int]:
+        """
+        Save several incidents in one transaction
+        
+        Args:
+            incidents: Incident dictionaries, as accepted by save_incident
+            
+        Returns:
+            Incident IDs in input order (empty on failure)
+        """
+        if not incidents:
+            return []
+
+        now_ts = time.time()
+        now = datetime.fromtimestamp(now_ts).isoformat()
+        rows = [
+            (
+                incident_data.get('timestamp', now),
+                incident_data.get('type', 'unknown'),
+                incident_data.get('severity', 'low'),
+                incident_data.get('confidence', 0),
+                incident_data.get('reasoning', ''),
+                _dumps(incident_data.get('subjects', [])),
+                _dumps(incident_data.get('recommended_actions', [])),
+                incident_data.get('evidence_path', ''),
+                _dumps(incident_data.get('response_plan', [])),
+                incident_data.get('status', 'active'),
+                incident_data.get('created_at', now),
+                _epoch_seconds(incident_data['created_at'])
+                if 'created_at' in incident_data else int(now_ts)
+            )
+            for incident_data in incidents
+        ]
+
+        with self._get_connection() as conn:
+            try:
+                conn.executemany(_INSERT_INCIDENT_SQL, rows)
+
+                # AUTOINCREMENT ids are consecutive within one write transaction
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
                 conn.commit()
-                
-                logger.info(f"✅ Saved incident #{incident_id}: {incident_data.get('type', 'unknown')}")
-                return incident_id
+                self._invalidate_stats()
+
+                return list(range(last_id - len(rows) + 1, last_id + 1))
                 
             except Exception as e:
-                logger.error(f"❌ Failed to save incident: {e}")
+                logger.error(f"❌ Failed to save incidents: {e}")
                 conn.rollback()
-                return -1
+                return []
     
     def get_recent_incidents(
         self, 
@@ -195,89 +609,136 @@ class DatabaseService:
         Returns:
             List of incident dictionaries
         """
-        with self._get_connection() as conn:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             
             try:
-                query = """
-                    SELECT 
-                        id, timestamp, incident_type, severity, confidence,
-                        reasoning, subjects, recommended_actions, 
-                        evidence_path, status, created_at
-                    FROM incidents
-                    WHERE 1=1
-                """
-                
-                params = []
-                
-                if severity:
-                    query += " AND severity = ?"
-                    params.append(severity)
-                
-                if status:
-                    query += " AND status = ?"
-                    params.append(status)
-                
-                if incident_type:
-                    query += " AND incident_type = ?"
-                    params.append(incident_type)
-                
-                query += " ORDER BY created_at DESC LIMIT ?"
-                params.append(limit)
-                
+                query, params = self._recent_incidents_query(
+                    _RECENT_INCIDENTS_COLUMNS, limit, severity, status, incident_type
+                )
+                cursor.row_factory = None  # plain tuples
                 cursor.execute(query, params)
-                rows = cursor.fetchall()
-                
+
                 incidents = []
-                for row in rows:
-                    incidents.append({
-                        'id': row['id'],
-                        'timestamp': row['timestamp'],
-                        'type': row['incident_type'],
-                        'severity': row['severity'],
-                        'confidence': row['confidence'],
-                        'reasoning': row['reasoning'],
-                        'subjects': json.loads(row['subjects']) if row['subjects'] else [],
-                        'recommended_actions': json.loads(row['recommended_actions']) if row['recommended_actions'] else [],
-                        'evidence_path': row['evidence_path'],
-                        'status': row['status'],
-                        'created_at': row['created_at']
-                    })
+                for row in cursor.fetchall():
+                    incident = dict(zip(_RECENT_INCIDENT_KEYS, row))
+                    incident['subjects'] = _loads(row[6]) if row[6] else []
+                    incident['recommended_actions'] = _loads(row[7]) if row[7] else []
+                    incidents.append(incident)
                 
                 return incidents
                 
             except Exception as e:
                 logger.error(f"❌ Failed to retrieve incidents: {e}")
                 return []
+
+    def get_recent_incidents_json(
+        self,
+        limit: int = 50,
+        severity: Optional[str] = None,
+        status: Optional[str] = None,
+        incident_type: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> str:
+        """
+        Retrieve recent incidents as a JSON array assembled by SQLite
+        
+        Same records as get_recent_incidents, newest first, serialized in the
+        query with json_object/json_group_array so no Python objects are
+        built per row. Before SQLite 3.44 the ordered json_object texts are
+        joined in Python instead.
+        
+        Args:
+            limit: Maximum number of incidents to return
+            severity: Filter by severity (low/medium/high/critical)
+            status: Filter by status (active/resolved/escalated)
+            incident_type: Filter by incident type
+            fields: Keys to include, in order (default: all of them)
+            
+        Returns:
+            JSON array text ("[]" on failure)
+        """
+        fields = fields or tuple(_RECENT_INCIDENT_JSON_FIELDS)
+        unknown = set(fields) - _RECENT_INCIDENT_JSON_FIELDS.keys()
+        if unknown:
+            raise ValueError(f"Unknown incident fields: {sorted(unknown)}")
+
+        members = ", ".join(f"'{key}', {_RECENT_INCIDENT_JSON_FIELDS[key]}" for key in fields)
+        with self._get_read_connection() as conn:
+            try:
+                listing, params = self._recent_incidents_query(
+                    "id, timestamp, incident_type, severity, confidence, reasoning,"
+                    " subjects, recommended_actions, evidence_path, status, created_at",
+                    limit, severity, status, incident_type
+                )
+                # json_object() runs outside the subquery: JSON subtypes
+                # don't survive a subquery boundary
+                if _AGGREGATE_ORDER_BY:
+                    return conn.execute(
+                        f"SELECT json_group_array(json_object({members}) ORDER BY created_at DESC)"
+                        f" FROM ({listing})",
+                        params
+                    ).fetchone()[0]
+
+                rows = conn.execute(
+                    f"SELECT json_object({members}) FROM ({listing}) ORDER BY created_at DESC",
+                    params
+                ).fetchall()
+                return "[" + ",".join(row[0] for row in rows) + "]"
+
+            except Exception as e:
+                logger.error(f"❌ Failed to retrieve incidents: {e}")
+                return "[]"
+
+    @staticmethod
+    def _recent_incidents_query(
+        columns: str,
+        limit: int,
+        severity: Optional[str],
+        status: Optional[str],
+        incident_type: Optional[str]
+    ) -> Tuple[str, List[Any]]:
+        """Builds the filtered, newest-first incident listing query and its parameters."""
+        query = f"""
+            SELECT {columns}
+            FROM incidents
+            WHERE 1=1
+        """
+        params: List[Any] = []
+        
+        if severity:
+            query += " AND severity = ?"
+            params.append(severity)
+        
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        
+        if incident_type:
+            query += " AND incident_type = ?"
+            params.append(incident_type)
+        
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        return query, params
     
     def get_incident_by_id(self, incident_id: int) -> Optional[Dict]:
         """Get single incident by ID with all details"""
-        with self._get_connection() as conn:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             
             try:
-                cursor.execute("""
-                    SELECT * FROM incidents WHERE id = ?
-                """, (incident_id,))
+                cursor.row_factory = None  # plain tuples
+                cursor.execute(_SELECT_INCIDENT_SQL, (incident_id,))
                 
                 row = cursor.fetchone()
                 
                 if row:
-                    return {
-                        'id': row['id'],
-                        'timestamp': row['timestamp'],
-                        'type': row['incident_type'],
-                        'severity': row['severity'],
-                        'confidence': row['confidence'],
-                        'reasoning': row['reasoning'],
-                        'subjects': json.loads(row['subjects']) if row['subjects'] else [],
-                        'recommended_actions': json.loads(row['recommended_actions']) if row['recommended_actions'] else [],
-                        'evidence_path': row['evidence_path'],
-                        'response_plan': json.loads(row['response_plan']) if row['response_plan'] else [],
-                        'status': row['status'],
-                        'created_at': row['created_at'],
-                        'updated_at': row['updated_at']
-                    }
+                    incident = dict(zip(_INCIDENT_KEYS, row))
+                    incident['subjects'] = _loads(row[6]) if row[6] else []
+                    incident['recommended_actions'] = _loads(row[7]) if row[7] else []
+                    incident['response_plan'] = _loads(row[9]) if row[9] else []
+                    return incident
                 
                 return None
                 
@@ -291,13 +752,13 @@ class DatabaseService:
             cursor = conn.cursor()
             
             try:
-                cursor.execute("""
-                    UPDATE incidents 
-                    SET status = ?, updated_at = ? 
-                    WHERE id = ?
-                """, (status, datetime.now().isoformat(), incident_id))
+                cursor.execute(
+                    _UPDATE_STATUS_SQL, (status, datetime.now().isoformat(), incident_id)
+                )
                 
                 conn.commit()
+                self._invalidate_stats()
+                self.incident_version += 1
                 success = cursor.rowcount > 0
                 
                 if success:
@@ -325,15 +786,10 @@ class DatabaseService:
             cursor = conn.cursor()
             
             try:
-                cursor.execute("""
-                    INSERT INTO actions (
-                        incident_id, action_type, action_data, 
-                        priority, status, executed_at
-                    ) VALUES (?, ?, ?, ?, ?, ?)
-                """, (
+                cursor.execute(_INSERT_ACTION_SQL, (
                     incident_id,
                     action_type,
-                    json.dumps(action_data),
+                    _dumps(action_data),
                     action_data.get('priority', 'medium'),
                     action_data.get('status', 'completed'),
                     datetime.now().isoformat()
@@ -341,6 +797,7 @@ class DatabaseService:
                 
                 action_id = cursor.lastrowid
                 conn.commit()
+                self._invalidate_stats()
                 
                 return action_id
                 
@@ -349,32 +806,60 @@ class DatabaseService:
                 conn.rollback()
                 return -1
     
+    def save_actions_bulk(
+        self,
+        incident_id: int,
+        actions: List[Tuple[str, Dict[str, Any], str]]
+    ) -> int:
+        """
+        Save several executed actions in one transaction
+        
+        Args:
+            incident_id: Incident the actions belong to
+            actions: (action_type, action_data, executed_at) tuples
+            
+        Returns:
+            Number of actions saved (0 on failure)
+        """
+        if not actions:
+            return 0
+
+        with self._get_connection() as conn:
+            try:
+                conn.executemany(_INSERT_ACTION_SQL, [
+                    (
+                        incident_id,
+                        action_type,
+                        _dumps(action_data),
+                        action_data.get('priority', 'medium'),
+                        action_data.get('status', 'completed'),
+                        executed_at
+                    )
+                    for action_type, action_data, executed_at in actions
+                ])
+                conn.commit()
+                self._invalidate_stats()
+                return len(actions)
+                
+            except Exception as e:
+                logger.error(f"❌ Failed to save actions: {e}")
+                conn.rollback()
+                return 0
+    
     def get_actions_for_incident(self, incident_id: int) -> List[Dict]:
         """Get all actions associated with an incident"""
-        with self._get_connection() as conn:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             
             try:
-                cursor.execute("""
-                    SELECT * FROM actions 
-                    WHERE incident_id = ? 
-                    ORDER BY executed_at ASC
-                """, (incident_id,))
-                
-                rows = cursor.fetchall()
-                
+                cursor.row_factory = None  # plain tuples
+                cursor.execute(_SELECT_ACTIONS_SQL, (incident_id,))
+
                 actions = []
-                for row in rows:
-                    actions.append({
-                        'id': row['id'],
-                        'incident_id': row['incident_id'],
-                        'action_type': row['action_type'],
-                        'action_data': json.loads(row['action_data']) if row['action_data'] else {},
-                        'priority': row['priority'],
-                        'status': row['status'],
-                        'executed_at': row['executed_at'],
-                        'created_at': row['created_at']
-                    })
+                for row in cursor.fetchall():
+                    action = dict(zip(_ACTION_KEYS, row))
+                    action['action_data'] = _loads(row[3]) if row[3] else {}
+                    actions.append(action)
                 
                 return actions
                 
@@ -387,153 +872,135 @@ class DatabaseService:
     # ========================================================================
     
     def get_statistics(self) -> Dict[str, Any]:
-        """Get comprehensive system statistics"""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
-            try:
-                stats = {}
-                
-                # Total incidents
-                cursor.execute("SELECT COUNT(*) as count FROM incidents")
-                stats['total_incidents'] = cursor.fetchone()['count']
-                
-                # Active incidents
-                cursor.execute("SELECT COUNT(*) as count FROM incidents WHERE status = 'active'")
-                stats['active_incidents'] = cursor.fetchone()['count']
-                
-                # Severity breakdown
-                cursor.execute("""
-                    SELECT severity, COUNT(*) as count
-                    FROM incidents 
-                    GROUP BY severity
-                """)
-                stats['severity_breakdown'] = {
-                    row['severity']: row['count'] 
-                    for row in cursor.fetchall()
-                }
-                
-                # Recent incidents (last 24h)
-                cursor.execute("""
-                    SELECT COUNT(*) as count
-                    FROM incidents 
-                    WHERE datetime(created_at) > datetime('now', '-1 day')
-                """)
-                stats['recent_24h'] = cursor.fetchone()['count']
-                
-                # Incident type breakdown
-                cursor.execute("""
-                    SELECT incident_type, COUNT(*) as count
-                    FROM incidents 
+        """Get comprehensive system statistics (cached until the next write)"""
+        return self._cached_stats(("statistics",), self._query_statistics, "statistics", {})
+
+    def _query_statistics(self) -> Dict[str, Any]:
+        day_ago = int(time.time()) - 86400
+        with self._get_read_connection() as conn:
+            # Scalar metrics: one pass over incidents (conditional aggregation)
+            # plus the two action aggregates as subqueries
+            totals = conn.execute("""
+                SELECT
+                    COUNT(*) AS total_incidents,
+                    COUNT(CASE WHEN status = 'active' THEN 1 END) AS active_incidents,
+                    COUNT(CASE WHEN created_ts > ? THEN 1 END) AS recent_24h,
+                    AVG(confidence) AS avg_confidence,
+                    (SELECT COUNT(*) FROM actions) AS total_actions,
+                    (SELECT COUNT(CASE WHEN status = 'completed' THEN 1 END)
+                     FROM actions) AS successful_actions
+                FROM incidents
+            """, (day_ago,)).fetchone()
+
+            # Severity breakdown and top 5 incident types in one result set
+            breakdowns = conn.execute("""
+                SELECT 'severity' AS kind, severity AS name, COUNT(*) AS count
+                FROM incidents
+                GROUP BY severity
+                UNION ALL
+                SELECT * FROM (
+                    SELECT 'type', incident_type, COUNT(*) AS count
+                    FROM incidents
                     GROUP BY incident_type
                     ORDER BY count DESC
                     LIMIT 5
-                """)
-                stats['top_incident_types'] = {
-                    row['incident_type']: row['count']
-                    for row in cursor.fetchall()
-                }
-                
-                # Average confidence score
-                cursor.execute("""
-                    SELECT AVG(confidence) as avg_confidence
-                    FROM incidents
-                """)
-                result = cursor.fetchone()
-                stats['avg_confidence'] = round(result['avg_confidence'], 2) if result['avg_confidence'] else 0
-                
-                # Total actions executed
-                cursor.execute("SELECT COUNT(*) as count FROM actions")
-                stats['total_actions'] = cursor.fetchone()['count']
-                
-                # Action success rate
-                cursor.execute("""
-                    SELECT 
-                        SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as successful,
-                        COUNT(*) as total
-                    FROM actions
-                """)
-                result = cursor.fetchone()
-                if result['total'] > 0:
-                    stats['action_success_rate'] = round(
-                        (result['successful'] / result['total']) * 100, 2
-                    )
-                else:
-                    stats['action_success_rate'] = 0
-                
-                return stats
-                
-            except Exception as e:
-                logger.error(f"❌ Failed to get statistics: {e}")
-                return {}
+                )
+                ORDER BY kind, count DESC
+            """).fetchall()
+
+            severity_breakdown = {}
+            top_incident_types = {}
+            for row in breakdowns:
+                target = severity_breakdown if row['kind'] == 'severity' else top_incident_types
+                target[row['name']] = row['count']
+
+            avg_confidence = totals['avg_confidence']
+            total_actions = totals['total_actions']
+            return {
+                'total_incidents': totals['total_incidents'],
+                'active_incidents': totals['active_incidents'],
+                'severity_breakdown': severity_breakdown,
+                'recent_24h': totals['recent_24h'],
+                'top_incident_types': top_incident_types,
+                'avg_confidence': round(avg_confidence, 2) if avg_confidence else 0,
+                'total_actions': total_actions,
+                'action_success_rate': round(
+                    (totals['successful_actions'] / total_actions) * 100, 2
+                ) if total_actions > 0 else 0
+            }
     
     def get_hourly_incident_trend(self, hours: int = 24) -> List[Dict]:
-        """Get incident count per hour for the specified time period"""
-        with self._get_connection() as conn:
+        """Get incident count per hour for the specified time period (cached until the next write)"""
+        return self._cached_stats(
+            ("hourly_trend", hours),
+            lambda: self._query_hourly_incident_trend(hours),
+            "hourly trend", []
+        )
+
+    def _query_hourly_incident_trend(self, hours: int) -> List[Dict]:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             
-            try:
-                cursor.execute("""
-                    SELECT 
-                        strftime('%Y-%m-%d %H:00:00', created_at) as hour,
-                        COUNT(*) as count,
-                        AVG(confidence) as avg_confidence
-                    FROM incidents
-                    WHERE datetime(created_at) > datetime('now', ? || ' hours')
-                    GROUP BY hour
-                    ORDER BY hour DESC
-                """, (f'-{hours}',))
-                
-                return [
-                    {
-                        'hour': row['hour'],
-                        'count': row['count'],
-                        'avg_confidence': round(row['avg_confidence'], 2)
-                    }
-                    for row in cursor.fetchall()
-                ]
-                
-            except Exception as e:
-                logger.error(f"❌ Failed to get hourly trend: {e}")
-                return []
+            # Buckets are whole hours; the oldest one may start before the window
+            cursor.execute("""
+                SELECT 
+                    strftime('%Y-%m-%d %H:00:00', hour_ts, 'unixepoch', 'localtime') as hour,
+                    SUM(count) as count,
+                    SUM(sum_conf) / SUM(count) as avg_confidence
+                FROM incident_rollup_hourly
+                WHERE hour_ts > ?
+                GROUP BY hour
+                ORDER BY hour DESC
+            """, (int(time.time()) - (hours + 1) * 3600,))
+            
+            return [
+                {
+                    'hour': row['hour'],
+                    'count': row['count'],
+                    'avg_confidence': round(row['avg_confidence'], 2)
+                }
+                for row in cursor.fetchall()
+            ]
     
     def get_severity_trends(self, days: int = 7) -> Dict[str, List[int]]:
-        """Get severity distribution over time"""
-        with self._get_connection() as conn:
+        """Get severity distribution over time (cached until the next write)"""
+        return self._cached_stats(
+            ("severity_trends", days),
+            lambda: self._query_severity_trends(days),
+            "severity trends", {}
+        )
+
+    def _query_severity_trends(self, days: int) -> Dict[str, List[int]]:
+        with self._get_read_connection() as conn:
             cursor = conn.cursor()
             
-            try:
-                cursor.execute("""
-                    SELECT 
-                        date(created_at) as date,
-                        severity,
-                        COUNT(*) as count
-                    FROM incidents
-                    WHERE datetime(created_at) > datetime('now', ? || ' days')
-                    GROUP BY date, severity
-                    ORDER BY date DESC
-                """, (f'-{days}',))
-                
-                # Organize by severity
-                trends = {'low': [], 'medium': [], 'high': [], 'critical': []}
-                current_date = None
-                
-                for row in cursor.fetchall():
-                    if current_date != row['date']:
-                        current_date = row['date']
-                    
-                    severity = row['severity']
-                    if severity in trends:
-                        trends[severity].append({
-                            'date': row['date'],
-                            'count': row['count']
-                        })
-                
-                return trends
+            cursor.execute("""
+                SELECT 
+                    date(hour_ts, 'unixepoch', 'localtime') as date,
+                    severity,
+                    SUM(count) as count
+                FROM incident_rollup_hourly
+                WHERE hour_ts > ?
+                GROUP BY date, severity
+                ORDER BY date DESC
+            """, (int(time.time()) - days * 86400 - 3600,))
+            
+            # Organize by severity
+            trends = {'low': [], 'medium': [], 'high': [], 'critical': []}
+            current_date = None
+            
+            for row in cursor.fetchall():
+                if current_date != row['date']:
+                    current_date = row['date']
                 
-            except Exception as e:
-                logger.error(f"❌ Failed to get severity trends: {e}")
-                return {}
+                severity = row['severity']
+                if severity in trends:
+                    trends[severity].append({
+                        'date': row['date'],
+                        'count': row['count']
+                    })
+            
+            return trends
     
     # ========================================================================
     # MAINTENANCE OPERATIONS
@@ -545,14 +1012,16 @@ class DatabaseService:
             cursor = conn.cursor()
             
             try:
-                cutoff_date = datetime.now() - timedelta(days=days)
+                cutoff = int((datetime.now() - timedelta(days=days)).timestamp())
                 cursor.execute("""
                     DELETE FROM incidents 
-                    WHERE datetime(created_at) < ?
-                """, (cutoff_date.isoformat(),))
+                    WHERE created_ts < ?
+                """, (cutoff,))
                 
                 deleted_count = cursor.rowcount
                 conn.commit()
+                self._invalidate_stats()
+                self.incident_version += 1
                 
                 logger.info(f"🧹 Cleaned up {deleted_count} incidents older than {days} days")
                 return deleted_count
@@ -574,8 +1043,13 @@ class DatabaseService:
     def backup_database(self, backup_path: Path) -> bool:
         """Create a backup of the database"""
         try:
-            import shutil
-            shutil.copy2(self.db_path, backup_path)
+            # Online backup API: a plain file copy would miss pages still in the WAL
+            with self._get_connection() as conn:
+                target = sqlite3.connect(backup_path)
+                try:
+                    conn.backup(target)
+                finally:
+                    target.close()
             logger.info(f"✅ Database backed up to: {backup_path}")
             return True
         except Exception as e:
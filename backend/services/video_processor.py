@@ -15,7 +15,7 @@ import cv2
 import numpy as np
 
 # Internal AegisAI imports
-from config.settings import settings
+from config.settings import settings, ensure_dir
 from agents.vision_agent import VisionAgent
 from agents.planner_agent import PlannerAgent
 from services.action_executor import action_executor
@@ -207,12 +207,20 @@ class VideoProcessor:
             evidence_filename = f"incident_{self.incident_count}_{timestamp}.jpg"
             evidence_path = settings.EVIDENCE_DIR / evidence_filename
             
-            # Ensure evidence directory exists
-            settings.EVIDENCE_DIR.mkdir(exist_ok=True, parents=True)
+            # Ensure evidence directory exists (checked once per process)
+            ensure_dir(settings.EVIDENCE_DIR)
             
-            # Save high-quality evidence
-            cv2.imwrite(str(evidence_path), frame, [cv2.IMWRITE_JPEG_QUALITY, 95])
-            logger.info(f"💾 Evidence saved: {evidence_path}")
+            # Save high-quality evidence. A failed write may mean the directory
+            # was removed after the first check, so recreate it and retry once
+            jpeg_params = [cv2.IMWRITE_JPEG_QUALITY, 95]
+            saved = cv2.imwrite(str(evidence_path), frame, jpeg_params)
+            if not saved:
+                ensure_dir(settings.EVIDENCE_DIR, force=True)
+                saved = cv2.imwrite(str(evidence_path), frame, jpeg_params)
+            if saved:
+                logger.info(f"💾 Evidence saved: {evidence_path}")
+            else:
+                logger.error(f"❌ Could not write evidence frame: {evidence_path}")
             
             # Generate response plan
             plan = await self.planner_agent._safe_process(analysis)
@@ -232,16 +240,17 @@ class VideoProcessor:
                 "created_at": datetime.now().isoformat()
             }
             
-            incident_id = db_service.save_incident(incident_data)
+            # Committed by the database writer thread; the event loop keeps running
+            incident_id = await asyncio.wrap_future(db_service.save_incident_async(incident_data))
             
             if incident_id <= 0:
                 logger.error(f"❌ Failed to save incident to database")
                 return
             
-            # Execute response plan
+            # Queue response plan; detection resumes without waiting on alerts/IoT
             if plan:
-                logger.info(f"🚀 Executing response plan for incident #{incident_id}")
-                await action_executor.execute_plan(plan, incident_id, str(evidence_path))
+                logger.info(f"🚀 Dispatching response plan for incident #{incident_id}")
+                await action_executor.dispatch_plan(plan, incident_id, str(evidence_path))
             
             self.last_incident_time = time.time()
             
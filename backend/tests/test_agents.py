@@ -8,6 +8,7 @@ import asyncio
 from unittest.mock import Mock, patch, AsyncMock
 from datetime import datetime
 import json
+import numpy as np
 
 # Import agents
 import sys
@@ -16,7 +17,7 @@ sys.path.insert(0, '/app')  # Adjust path as needed
 from agents.vision_agent import VisionAgent
 from agents.planner_agent import PlannerAgent
 from agents.base_agent import BaseAgent
-from services.action_executor import ActionExecutor
+from services.action_executor import ActionExecutor, _PlanContext
 from config.settings import settings
 
 
@@ -106,6 +107,57 @@ class TestBaseAgent:
         assert "success_rate" in stats
         assert stats["total_calls"] == 0
     
+    @pytest.mark.asyncio
+    async def test_shared_client(self):
+        """Test agents share one pooled client, closed only by the last agent"""
+        vision = VisionAgent(api_key="shared-key")
+        planner = PlannerAgent(api_key="shared-key")
+        shared = vision.client
+        assert planner.client is shared
+        
+        with patch.object(shared.aio, "aclose", new_callable=AsyncMock) as mock_aclose:
+            await vision.close()
+            mock_aclose.assert_not_awaited()
+            await planner.close()
+            mock_aclose.assert_awaited_once()
+        
+        assert VisionAgent(api_key="shared-key").client is not shared
+    
+    @pytest.mark.asyncio
+    async def test_injected_http_client(self):
+        """Test agents send through an injected HTTP client and never close it"""
+        from agents._client import create_http_client
+        http = create_http_client()
+        vision = VisionAgent(api_key="inject-key", http_client=http)
+        planner = PlannerAgent(api_key="inject-key", http_client=http)
+        
+        assert planner.client is vision.client
+        standalone = VisionAgent(api_key="inject-key")
+        assert vision.client is not standalone.client
+        await standalone.close()
+        assert vision.client._api_client._async_httpx_client is http
+        
+        await vision.close()
+        await planner.close()
+        assert not http.is_closed
+        await http.aclose()
+    
+    @pytest.mark.asyncio
+    async def test_safe_process_fallbacks(self, sample_incident):
+        """Test _safe_process returns each agent's fallback on failure"""
+        vision = VisionAgent()
+        vision.process = AsyncMock(side_effect=RuntimeError("boom"))
+        planner = PlannerAgent()
+        planner.process = AsyncMock(side_effect=RuntimeError("boom"))
+        
+        vision_result = await vision._safe_process(frame=None)
+        plan = await planner._safe_process(incident=sample_incident)
+        
+        assert vision_result["type"] == "error"
+        assert vision_result["reasoning"] == "boom"
+        assert plan[0]["action"] == "save_evidence"
+        assert vision.total_errors == planner.total_errors == 1
+    
     def test_json_parsing_clean(self):
         """Test JSON parsing with clean input"""
         agent = VisionAgent()
@@ -127,6 +179,13 @@ class TestBaseAgent:
         assert result is not None
         assert result["incident"] is True
     
+    def test_json_parsing_markdown_variants(self):
+        """Test JSON parsing with bare and unterminated code fences"""
+        agent = VisionAgent()
+        
+        assert agent._parse_json_response('```\n[1, 2]\n```') == [1, 2]
+        assert agent._parse_json_response('```json {"incident": false}') == {"incident": False}
+    
     def test_json_parsing_invalid(self):
         """Test JSON parsing with invalid input"""
         agent = VisionAgent()
@@ -155,6 +214,16 @@ class TestVisionAgent:
         
         assert agent.max_history == 10
         assert len(agent.frame_history) == 0
+
+    def test_system_instruction_prebuilt(self):
+        """System prompt is handed to the SDK as ready-made Content"""
+        from google.genai import _transformers
+        from config.settings import VISION_AGENT_PROMPT
+        agent = VisionAgent()
+        instruction = agent._gen_config.system_instruction
+
+        assert _transformers.t_content(instruction) is instruction
+        assert instruction.model_dump() == _transformers.t_content(VISION_AGENT_PROMPT).model_dump()
     
     def test_default_result(self):
         """Test default result generation"""
@@ -219,6 +288,27 @@ class TestVisionAgent:
         assert isinstance(validated["subjects"], list)
         assert isinstance(validated["recommended_actions"], list)
     
+    def test_validate_result_coerces_bad_values(self):
+        """Test malformed fields fall back to safe values"""
+        agent = VisionAgent()
+        
+        validated = agent._validate_result({
+            "incident": 1,
+            "severity": "CRITICAL",
+            "confidence": "n/a",
+            "subjects": "Person 1",
+            "unexpected": "ignored"
+        })
+        
+        assert validated["severity"] == "critical"
+        assert validated["confidence"] == 0
+        assert validated["incident"] is False  # Below confidence threshold
+        assert validated["subjects"] == []
+        assert "unexpected" not in validated
+        
+        validated["recommended_actions"].append("alert")
+        assert agent._validate_result({})["recommended_actions"] == []
+    
     def test_build_context_empty(self):
         """Test context building with no history"""
         agent = VisionAgent()
@@ -230,13 +320,14 @@ class TestVisionAgent:
         """Test context building with frame history"""
         agent = VisionAgent()
         
-        agent.frame_history.append("Frame 1: normal")
-        agent.frame_history.append("Frame 2: suspicious")
+        agent._update_history(1, {"type": "normal", "severity": "low", "confidence": 90})
+        assert agent._build_context() == "Frame 1: normal (low, 90% conf)"
         
+        agent._update_history(2, {"type": "suspicious_behavior", "severity": "medium", "confidence": 75})
         context = agent._build_context()
         
         assert "Frame 1" in context
-        assert "Frame 2" in context
+        assert "Frame 2: suspicious_behavior (medium, 75% conf)" in context
     
     def test_update_history(self):
         """Test frame history updates"""
@@ -251,8 +342,8 @@ class TestVisionAgent:
         agent._update_history(42, result)
         
         assert len(agent.frame_history) == 1
-        assert "Frame 42" in agent.frame_history[0]
-        assert "intrusion" in agent.frame_history[0]
+        assert agent.frame_history[0] == (42, "intrusion", "high", 85)
+        assert "Frame 42: intrusion" in agent._build_context()
     
     def test_prepare_image_bytes_base64(self, sample_base64_image):
         """Test image bytes preparation from base64"""
@@ -262,6 +353,25 @@ class TestVisionAgent:
         image_bytes = agent._prepare_image_bytes(None, sample_base64_image)
         assert isinstance(image_bytes, bytes)
     
+    def test_prepare_image_bytes_raw(self, sample_base64_image):
+        """Test pre-decoded uploads pass through without another base64 decode"""
+        agent = VisionAgent()
+        raw = VisionAgent.decode_base64_image(sample_base64_image)
+        
+        assert agent._prepare_image_bytes(None, None, raw) is raw
+        assert agent._prepare_image_bytes(None, sample_base64_image) == raw
+    
+    def test_prepare_image_bytes_downscales(self, sample_frame):
+        """Test large frames are resized to VISION_MAX_SIDE before encoding"""
+        import cv2
+        agent = VisionAgent()
+        
+        image_bytes = agent._prepare_image_bytes(sample_frame, None)
+        decoded = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        
+        assert max(decoded.shape[:2]) == settings.VISION_MAX_SIDE
+        assert decoded.shape[1] / decoded.shape[0] == pytest.approx(1280 / 720, rel=0.01)
+    
     def test_prepare_image_bytes_invalid(self):
         """Test image bytes preparation with invalid input"""
         agent = VisionAgent()
@@ -269,6 +379,160 @@ class TestVisionAgent:
         with pytest.raises(ValueError):
             agent._prepare_image_bytes(None, None)
 
+    @pytest.mark.asyncio
+    async def test_process_reuses_cached_analysis(self, sample_frame):
+        """Test identical frames are answered from the result cache"""
+        agent = VisionAgent()
+        agent.client = Mock()
+        agent.client.aio.models.generate_content = AsyncMock(return_value=Mock(text=json.dumps(
+            {"incident": False, "type": "normal", "severity": "low", "confidence": 90}
+        )))
+        
+        first = await agent.process(frame=sample_frame, frame_number=1)
+        second = await agent.process(frame=sample_frame.copy(), frame_number=2)
+        
+        assert agent.client.aio.models.generate_content.await_count == 1
+        assert second == first
+        assert agent.cache_hits == 1
+        assert agent.frame_history[-1][0] == 2
+
+    def test_fingerprint_distinguishes_small_changes(self, sample_frame):
+        """Test a small localized change never shares the empty scene's cache key"""
+        agent = VisionAgent()
+        intruder = sample_frame.copy()
+        intruder[300:308, 600:608] = 100  # Small, dim figure far from the camera
+
+        assert agent._fingerprint(sample_frame.copy(), None) == agent._fingerprint(sample_frame, None)
+        assert agent._fingerprint(intruder, None) != agent._fingerprint(sample_frame, None)
+
+    @pytest.mark.asyncio
+    async def test_process_motion_gate(self, sample_frame):
+        """Test frames without significant motion skip the API call"""
+        agent = VisionAgent()
+        agent.client = Mock()
+        agent.client.aio.models.generate_content = AsyncMock(return_value=Mock(text=json.dumps(
+            {"incident": False, "type": "normal", "severity": "low", "confidence": 90}
+        )))
+        
+        still = sample_frame + 1  # Sensor noise: new fingerprint, negligible motion
+        moved = sample_frame.copy()
+        moved[:, :640] = 255  # Half the scene changed
+        
+        await agent.process(frame=sample_frame, frame_number=1)
+        await agent.process(frame=still, frame_number=2)
+        assert agent.client.aio.models.generate_content.await_count == 1
+        assert agent.motion_skips == 1
+        
+        await agent.process(frame=moved, frame_number=3)
+        assert agent.client.aio.models.generate_content.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_process_motion_gate_sees_small_intruder(self, sample_frame):
+        """Test a small localized change is analyzed rather than diluted by the still scene"""
+        agent = VisionAgent()
+        agent.client = Mock()
+        agent.client.aio.models.generate_content = AsyncMock(return_value=Mock(text=json.dumps(
+            {"incident": False, "type": "normal", "severity": "low", "confidence": 90}
+        )))
+
+        intruder = sample_frame.copy()
+        intruder[300:380, 600:640] = 180  # ~0.3% of the frame, far below the global mean threshold
+
+        await agent.process(frame=sample_frame, frame_number=1)
+        await agent.process(frame=intruder, frame_number=2)
+
+        assert agent.client.aio.models.generate_content.await_count == 2
+        assert agent.motion_skips == 0
+    
+    @pytest.mark.asyncio
+    async def test_process_does_not_cache_errors(self, sample_frame):
+        """Test failed analyses are not cached"""
+        agent = VisionAgent()
+        agent.client = Mock()
+        agent.client.aio.models.generate_content = AsyncMock(side_effect=Exception("API Error"))
+        
+        await agent.process(frame=sample_frame)
+        await agent.process(frame=sample_frame)
+        
+        assert agent.client.aio.models.generate_content.await_count == 2
+        assert agent.cache_hits == 0
+    
+    @pytest.mark.asyncio
+    async def test_process_stream_partial_then_final(self, sample_frame):
+        """Test streaming yields type/severity early, then the full result"""
+        agent = VisionAgent()
+        chunks = ['{"incident": true, "type": "intrusion", ', '"severity": "HIGH", "confid',
+                  'ence": 92, "reasoning": "Forced entry"}']
+        
+        async def fake_stream():
+            for text in chunks:
+                yield Mock(text=text)
+        
+        agent.client = Mock()
+        agent.client.aio.models.generate_content_stream = AsyncMock(return_value=fake_stream())
+        
+        results = [r async for r in agent.process_stream(frame=sample_frame, frame_number=3)]
+        
+        assert results[0] == {"partial": True, "type": "intrusion", "severity": "high"}
+        assert results[-1]["confidence"] == 92
+        assert results[-1]["reasoning"] == "Forced entry"
+        assert agent.frame_history[-1] == (3, "intrusion", "high", 92)
+    
+    @pytest.mark.asyncio
+    async def test_process_batch_single_call(self, sample_frame, sample_base64_image):
+        """Test batch analysis issues one API call and splits the array"""
+        agent = VisionAgent()
+        agent.client = Mock()
+        agent.client.aio.models.generate_content = AsyncMock(return_value=Mock(text=json.dumps([
+            {"incident": False, "type": "normal", "severity": "low", "confidence": 90},
+            {"incident": True, "type": "intrusion", "severity": "high", "confidence": 95}
+        ])))
+        
+        results = await agent.process_batch([sample_frame, sample_base64_image], start_frame=5)
+        
+        assert agent.client.aio.models.generate_content.await_count == 1
+        assert [r["type"] for r in results] == ["normal", "intrusion"]
+        assert agent.frame_history[-1][0] == 6
+    
+    @pytest.mark.asyncio
+    async def test_process_many_bounded(self, sample_frame):
+        """Test concurrent analysis respects the concurrency ceiling"""
+        agent = VisionAgent()
+        in_flight = 0
+        peak = 0
+        
+        async def fake_process(frame=None, base64_image=None, frame_number=0):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return {"frame_number": frame_number}
+        
+        agent.process = fake_process
+        
+        results = await agent.process_many([sample_frame] * 6, start_frame=10, max_concurrency=2)
+        
+        assert [r["frame_number"] for r in results] == list(range(10, 16))
+        assert peak == 2
+        assert agent.total_calls == 6
+    
+    @pytest.mark.asyncio
+    async def test_process_batch_short_response(self, sample_frame):
+        """Test frames missing from the batch response get default results"""
+        agent = VisionAgent()
+        agent.client = Mock()
+        agent.client.aio.models.generate_content = AsyncMock(return_value=Mock(text=json.dumps([
+            {"incident": False, "type": "normal", "severity": "low", "confidence": 90}
+        ])))
+        
+        results = await agent.process_batch([sample_frame, sample_frame, None])
+        
+        assert len(results) == 3
+        assert results[0]["type"] == "normal"
+        assert results[1]["type"] == "error"
+        assert results[2]["type"] == "error"
+
 
 # ============================================================================
 # PLANNER AGENT TESTS
@@ -285,6 +549,21 @@ class TestPlannerAgent:
         assert 'save_evidence' in agent.VALID_ACTIONS
         assert 'send_alert' in agent.VALID_ACTIONS
     
+    @pytest.mark.asyncio
+    async def test_process_uses_async_client(self, sample_incident, sample_action_plan):
+        """Test plan generation awaits the async Gemini client"""
+        agent = PlannerAgent()
+        agent.client = Mock()
+        agent.client.aio.models.generate_content = AsyncMock(
+            return_value=Mock(text=json.dumps(sample_action_plan))
+        )
+        
+        plan = await agent.process(sample_incident)
+        
+        agent.client.aio.models.generate_content.assert_awaited_once()
+        agent.client.models.generate_content.assert_not_called()
+        assert [s["action"] for s in plan] == ["save_evidence", "send_alert"]
+    
     def test_validate_plan(self, sample_action_plan):
         """Test action plan validation"""
         agent = PlannerAgent()
@@ -338,6 +617,19 @@ class TestPlannerAgent:
         # Should default to medium
         assert validated[0]["priority"] == "medium"
     
+    def test_validate_plan_normalizes_names(self):
+        """Test action and priority names are normalized"""
+        agent = PlannerAgent()
+        
+        validated = agent._validate_plan([
+            {"action": "Sound Alarm", "priority": "HIGH"},
+            {"action": "Sound Alarm", "priority": "low"}
+        ])
+        
+        assert [s["action"] for s in validated] == ["sound_alarm", "sound_alarm"]
+        assert [s["priority"] for s in validated] == ["high", "low"]
+        assert PlannerAgent._NORM_CACHE["Sound Alarm"] == "sound_alarm"
+    
     def test_create_fallback_plan_low(self):
         """Test fallback plan for low severity"""
         agent = PlannerAgent()
@@ -371,6 +663,35 @@ class TestPlannerAgent:
         assert "send_alert" in [step["action"] for step in plan]
         assert "escalate" in [step["action"] for step in plan]
     
+    def test_create_fallback_plan_uses_fresh_steps(self):
+        """Test fallback steps are numbered in order and never share template dicts"""
+        agent = PlannerAgent()
+        
+        plan = agent._create_fallback_plan({"type": "theft", "severity": "critical", "confidence": 90})
+        
+        assert [step["step"] for step in plan] == [1, 2, 3, 4, 5]
+        assert plan[-1]["action"] == "monitor"
+        assert plan[0] is not PlannerAgent._FALLBACK_SAVE_EVIDENCE
+        assert PlannerAgent._FALLBACK_SAVE_EVIDENCE["step"] is None
+    
+    @pytest.mark.asyncio
+    async def test_process_batch(self, sample_incident, sample_action_plan):
+        """Test batch planning packs incidents and falls back per missing plan"""
+        agent = PlannerAgent()
+        agent.client = Mock()
+        agent.client.aio.models.generate_content = AsyncMock(
+            return_value=Mock(text=json.dumps([sample_action_plan]))
+        )
+        
+        plans = await agent.process_batch([sample_incident] * 3, batch_size=2)
+        
+        assert agent.client.aio.models.generate_content.await_count == 2
+        assert len(plans) == 3
+        assert [s["action"] for s in plans[0]] == ["save_evidence", "send_alert"]
+        # Second incident was missing from the response - fallback plan used
+        assert plans[1][0]["action"] == "save_evidence"
+        assert "log_incident" in [s["action"] for s in plans[1]]
+    
     def test_get_action_description(self):
         """Test action description retrieval"""
         agent = PlannerAgent()
@@ -379,6 +700,16 @@ class TestPlannerAgent:
         assert isinstance(desc, str)
         assert len(desc) > 0
 
+    def test_compiled_prompts_match_str_format(self):
+        """Pre-parsed prompt renderers produce the same text as str.format"""
+        from config.settings import (
+            PLANNER_AGENT_PROMPT, PLANNER_BATCH_PROMPT,
+            render_planner_prompt, render_planner_batch_prompt
+        )
+        fields = dict(incident_type="theft", severity="high", reasoning="Bag taken {x}", confidence=85)
+        assert render_planner_prompt(**fields) == PLANNER_AGENT_PROMPT.format(**fields)
+        assert render_planner_batch_prompt(count=2, incidents="a\nb") == PLANNER_BATCH_PROMPT.format(count=2, incidents="a\nb")
+
 
 # ============================================================================
 # ACTION EXECUTOR TESTS
@@ -446,13 +777,17 @@ class TestActionExecutor:
         assert stats["total_actions"] == 0
         assert stats["success_rate"] == 0.0
     
-    def test_get_execution_stats_with_data(self, executor):
+    @pytest.mark.asyncio
+    async def test_get_execution_stats_with_data(self, executor):
         """Test stats with execution data"""
-        executor.executed_actions = [
-            {"status": "completed"},
-            {"status": "completed"},
-            {"status": "failed"}
-        ]
+        async def run(action, incident_id, evidence_path, params, plan_ctx):
+            if action == "fail":
+                raise RuntimeError("boom")
+
+        plan_ctx = _PlanContext()
+        with patch.object(executor, "_execute_action", side_effect=run):
+            for action in ("ok", "ok", "fail"):
+                await executor._run_step({"action": action}, 1, "", plan_ctx)
         
         stats = executor.get_execution_stats()
         
@@ -3,11 +3,14 @@ API Endpoint Tests for AegisAI
 Run with: pytest tests/test_api.py -v
 """
 
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
 from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from main import app
+from api import email_routes
 from services.database_service import db_service
 
 
@@ -70,6 +73,131 @@ class TestRootEndpoints:
         for key in ['database', 'vision_agent', 'planner_agent']:
             assert key in data['components']
 
+    def test_static_payloads_are_preserialized(self, client):
+        from api import routes
+        response = client.get("/api/agents/architecture")
+        assert response.headers["content-type"] == "application/json"
+        assert response.content == routes._ARCHITECTURE_INFO_JSON.body
+        assert response.json()["vision_agent"]["layer"] == "Sensory Intelligence Layer"
+
+        for path, payload in [
+            ("/api/system/info", routes._SYSTEM_INFO_JSON.body),
+            ("/api/meta/white-paper", routes._WHITE_PAPER_INFO_JSON.body),
+        ]:
+            response = client.get(path)
+            assert response.status_code == 200
+            assert response.content == payload
+
+    def test_static_payloads_revalidate_with_etag(self, client):
+        response = client.get("/api/system/info")
+        etag = response.headers["etag"]
+        assert "max-age" in response.headers["cache-control"]
+
+        cached = client.get("/api/system/info", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert client.get("/", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+    def test_static_payloads_are_precompressed(self, client):
+        from api import routes
+        gzipped = client.get("/api/system/info", headers={"Accept-Encoding": "gzip"})
+        assert gzipped.headers["content-encoding"] == "gzip"
+        assert gzipped.content == routes._SYSTEM_INFO_JSON.body
+
+        plain = client.get("/api/system/info", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.headers["etag"] != gzipped.headers["etag"]
+
+    def test_health_check_caches_database_probe(self, client):
+        from api import routes
+        routes._health_cache.clear()
+        with patch.object(routes.db_service, "get_statistics", side_effect=RuntimeError("locked")) as stats:
+            first = client.get("/api/health").json()
+            second = client.get("/api/health").json()
+        routes._health_cache.clear()
+
+        assert first["status"] == second["status"] == "degraded"
+        assert first["components"]["database_persistence"] == "degraded: locked"
+        stats.assert_called_once()
+
+
+# ============================================================================
+# Analyze Endpoint
+# ============================================================================
+
+class TestAnalyzeEndpoint:
+    """Test frame analysis"""
+
+    def test_analyze_decodes_image_once(self, client):
+        from api import routes
+        result = {
+            "incident": False, "type": "normal", "severity": "low", "confidence": 90,
+            "reasoning": "Empty room", "subjects": [], "recommended_actions": []
+        }
+        agent = MagicMock(process=AsyncMock(return_value=result))
+        app.dependency_overrides[routes.get_vision_agent] = lambda: agent
+        try:
+            response = client.post("/api/analyze", json={"image": "data:image/jpeg;base64,aGVsbG8"})
+        finally:
+            app.dependency_overrides.clear()
+        process = agent.process
+
+        assert response.status_code == 200
+        assert response.json()["type"] == "normal"
+        assert process.await_args.kwargs["image_bytes"] == b"hello"
+
+    def test_analyze_invalid_base64_is_422_without_echo(self, client):
+        from api import routes
+        agent = MagicMock(process=AsyncMock())
+        app.dependency_overrides[routes.get_vision_agent] = lambda: agent
+        try:
+            # 100009 base64 characters can't be a whole number of bytes
+            response = client.post("/api/analyze", json={"image": "!!!notbase64" + "A" * 100000})
+        finally:
+            app.dependency_overrides.clear()
+
+        agent.process.assert_not_awaited()
+        assert response.status_code == 422
+        (error,) = response.json()["detail"]
+        assert error["loc"] == ["body", "image"]
+        assert "invalid base64 image" in error["msg"]
+        assert "notbase64" not in response.text
+
+    def test_analyze_queued_and_polled(self):
+        from api import routes
+        result = {
+            "incident": True, "type": "intrusion", "severity": "high", "confidence": 88,
+            "reasoning": "Forced entry", "subjects": ["person"], "recommended_actions": ["alert"]
+        }
+        agent = MagicMock(process=AsyncMock(return_value=result))
+        app.dependency_overrides[routes.get_vision_agent] = lambda: agent
+        try:
+            with TestClient(app) as client:
+                response = client.post("/api/analyze?wait=false", json={"image": "aGVsbG8="})
+                assert response.status_code == 202
+                task_id = response.json()["task_id"]
+
+                polled = client.get(f"/api/analyze/{task_id}", params={"timeout": 5})
+                assert polled.status_code == 200
+                assert polled.json()["type"] == "intrusion"
+
+                assert client.get("/api/analyze/unknown").status_code == 404
+        finally:
+            app.dependency_overrides.clear()
+
+    def test_analyze_queue_full_answers_503(self):
+        from api import routes
+        app.dependency_overrides[routes.get_vision_agent] = lambda: MagicMock()
+        try:
+            with TestClient(app) as client, \
+                    patch.object(routes.analysis_queue, "submit", side_effect=asyncio.QueueFull):
+                response = client.post("/api/analyze?wait=false", json={"image": "aGVsbG8="})
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
 
 # ============================================================================
 # Incident Endpoints
@@ -86,6 +214,13 @@ class TestIncidentEndpoints:
         assert isinstance(incidents, list)
         assert any(inc['id'] == sample_incident for inc in incidents)
 
+    def test_get_incidents_matches_response_model(self, client, sample_incident):
+        from api.routes import IncidentResponse
+        incidents = client.get("/api/incidents").json()
+        assert incidents
+        for inc in incidents:
+            assert set(inc) == set(IncidentResponse.model_fields)
+
     def test_get_incidents_with_limit(self, client):
         response = client.get("/api/incidents?limit=5")
         assert response.status_code == 200
@@ -124,6 +259,28 @@ class TestIncidentEndpoints:
         assert data.get('success') is True
         assert data.get('status') == 'resolved'
 
+    def test_get_incident_is_cached_until_status_update(self, client, sample_incident):
+        from api import routes
+        routes._incident_cache.clear()
+        with patch.object(routes.db_service, "get_incident_by_id", wraps=db_service.get_incident_by_id) as fetch:
+            client.get(f"/api/incidents/{sample_incident}")
+            client.get(f"/api/incidents/{sample_incident}")
+            assert fetch.call_count == 1
+
+            client.post(f"/api/incidents/{sample_incident}/status?status=dismissed")
+            data = client.get(f"/api/incidents/{sample_incident}").json()
+            assert fetch.call_count == 2
+            assert data["status"] == "dismissed"
+
+    def test_get_incident_cache_sees_writes_outside_routes(self, client, sample_incident):
+        from api import routes
+        routes._incident_cache.clear()
+        client.get(f"/api/incidents/{sample_incident}")
+
+        # e.g. the action executor flushing a plan's status
+        db_service.update_incident_status(sample_incident, "escalated")
+        assert client.get(f"/api/incidents/{sample_incident}").json()["status"] == "escalated"
+
     def test_update_incident_invalid_status(self, client, sample_incident):
         response = client.post(f"/api/incidents/{sample_incident}/status?status=invalid")
         assert response.status_code == 422
@@ -170,6 +327,210 @@ class TestCleanupEndpoint:
         assert response.status_code == 422
 
 
+# ============================================================================
+# Email Endpoints
+# ============================================================================
+
+@pytest.fixture
+def smtp_mock():
+    """Patch aiosmtplib.SMTP with a connected mock and reset the session pool"""
+    email_routes._smtp_pool.clear()
+    email_routes._smtp_connecting.clear()
+    email_routes._smtp_validation_cache.clear()
+    email_routes._mime_cache.clear()
+    email_routes._send_buckets.clear()
+    conn = MagicMock(is_connected=True)
+    conn.connect = AsyncMock()
+    conn.sendmail = AsyncMock()
+    conn.quit = AsyncMock()
+    with patch("api.email_routes.aiosmtplib.SMTP", return_value=conn) as smtp_cls:
+        yield smtp_cls, conn
+    email_routes._smtp_pool.clear()
+    email_routes._smtp_validation_cache.clear()
+
+
+EMAIL_PAYLOAD = {
+    "to": "guard@example.com",
+    "from": "aegis@example.com",
+    "subject": "Alert",
+    "html": "<p>Incident detected</p>",
+    "smtpConfig": {"host": "smtp.example.com", "port": 587, "user": "aegis", "pass_": "secret"}
+}
+
+
+class TestEmailEndpoints:
+    """Test email sending"""
+
+    def test_send_email_reuses_smtp_session(self, client, smtp_mock):
+        smtp_cls, conn = smtp_mock
+
+        for _ in range(2):
+            response = client.post("/api/email/send", json=EMAIL_PAYLOAD)
+            assert response.status_code == 200
+            assert response.json()["queued"] is True
+
+        assert smtp_cls.call_count == 1
+        conn.connect.assert_awaited_once()
+        assert conn.sendmail.await_count == 2
+
+    def test_send_email_reuses_mime_body(self, client, smtp_mock):
+        smtp_cls, conn = smtp_mock
+
+        client.post("/api/email/send", json=EMAIL_PAYLOAD)
+        client.post("/api/email/send", json={**EMAIL_PAYLOAD, "to": "ops@example.com"})
+
+        assert len(email_routes._mime_cache) == 1
+        (_, to_1, raw_1), (_, to_2, raw_2) = [c.args for c in conn.sendmail.await_args_list]
+        assert (to_1, to_2) == (["guard@example.com"], ["ops@example.com"])
+        assert raw_1.startswith(b"To: guard@example.com\r\n")
+        assert raw_1.split(b"\r\n", 1)[1] == raw_2.split(b"\r\n", 1)[1]
+        assert b"Subject: Alert\r\n" in raw_1
+
+    def test_send_email_raw_message_parses(self, client, smtp_mock):
+        import email.policy
+        smtp_cls, conn = smtp_mock
+        html = "<p>Intrusión detectada</p>\n.\n" + "x" * 2000
+
+        client.post("/api/email/send", json={**EMAIL_PAYLOAD, "subject": "Alerta — zona 3", "html": html})
+
+        raw = conn.sendmail.await_args.args[2]
+        message = email.message_from_bytes(raw, policy=email.policy.default)
+        assert message["To"] == "guard@example.com"
+        assert message["Subject"] == "Alerta — zona 3"
+        assert message.get_body(("html",)).get_content() == html
+        assert message.get_body(("plain",)).get_content().strip() == "Please view this email in HTML mode"
+
+    def test_send_email_rate_limited_per_account(self, client, smtp_mock):
+        for _ in range(email_routes.SEND_BURST):
+            assert client.post("/api/email/send", json=EMAIL_PAYLOAD).status_code == 200
+
+        response = client.post("/api/email/send", json=EMAIL_PAYLOAD)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+
+        other = {**EMAIL_PAYLOAD, "smtpConfig": {**EMAIL_PAYLOAD["smtpConfig"], "user": "backup"}}
+        assert client.post("/api/email/send", json=other).status_code == 200
+
+    def test_send_email_rejects_oversized_payload(self, client, smtp_mock):
+        smtp_cls, conn = smtp_mock
+        html = "x" * (email_routes.EMAIL_HTML_MAX_LENGTH + 1)
+
+        assert client.post("/api/email/send", json={**EMAIL_PAYLOAD, "html": html}).status_code == 422
+        assert client.post("/api/email/send", json={**EMAIL_PAYLOAD, "subject": "s" * 999}).status_code == 422
+        conn.sendmail.assert_not_awaited()
+
+    def test_send_email_reconnects_after_disconnect(self, client, smtp_mock):
+        smtp_cls, conn = smtp_mock
+        conn.sendmail.side_effect = [
+            email_routes.aiosmtplib.SMTPServerDisconnected("idle timeout"),
+            None
+        ]
+
+        response = client.post("/api/email/send", json=EMAIL_PAYLOAD)
+
+        assert response.status_code == 200
+        assert smtp_cls.call_count == 2
+
+    def test_send_email_failure_does_not_reach_caller(self, client, smtp_mock):
+        smtp_cls, conn = smtp_mock
+        conn.sendmail.side_effect = email_routes.aiosmtplib.SMTPException("rejected")
+
+        response = client.post("/api/email/send", json=EMAIL_PAYLOAD)
+
+        assert response.status_code == 200
+        conn.sendmail.assert_awaited_once()
+        assert not email_routes._smtp_pool  # Broken session was dropped
+
+    @pytest.mark.asyncio
+    async def test_slow_smtp_connect_does_not_block_other_accounts(self, smtp_mock):
+        smtp_cls, _ = smtp_mock
+        release = asyncio.Event()
+        conns = {}
+
+        def make_conn(hostname, **kwargs):
+            conn = MagicMock(is_connected=True)
+            conn.connect = AsyncMock(side_effect=release.wait if hostname == "slow.example.com" else None)
+            conns.setdefault(hostname, []).append(conn)
+            return conn
+
+        smtp_cls.side_effect = make_conn
+        slow = email_routes.SMTPConfig(host="slow.example.com", user="a", pass_="x")
+        fast = email_routes.SMTPConfig(host="fast.example.com", user="b", pass_="y")
+
+        slow_sends = [asyncio.create_task(email_routes._get_smtp(slow)) for _ in range(2)]
+        await asyncio.sleep(0)
+        _, fast_conn, _ = await asyncio.wait_for(email_routes._get_smtp(fast), timeout=1)
+        assert fast_conn is conns["fast.example.com"][0]
+        assert not any(task.done() for task in slow_sends)
+
+        release.set()
+        (_, first, _), (_, second, _) = await asyncio.gather(*slow_sends)
+        assert first is second is conns["slow.example.com"][0]
+        assert len(conns["slow.example.com"]) == 1  # One login shared by both callers
+        assert not email_routes._smtp_connecting
+
+    @pytest.mark.asyncio
+    async def test_smtp_pool_evicts_least_recently_used(self, smtp_mock):
+        smtp_cls, _ = smtp_mock
+        conns = []
+
+        def make_conn(**kwargs):
+            conn = MagicMock(is_connected=True)
+            conn.connect = AsyncMock()
+            conn.quit = AsyncMock()
+            conns.append(conn)
+            return conn
+
+        smtp_cls.side_effect = make_conn
+        configs = [
+            email_routes.SMTPConfig(host=f"smtp{i}.example.com", user="a", pass_="x")
+            for i in range(3)
+        ]
+
+        with patch.object(email_routes, "SMTP_POOL_MAX", 2):
+            await email_routes._get_smtp(configs[0])
+            await email_routes._get_smtp(configs[1])
+            await email_routes._get_smtp(configs[0])  # Now the most recently used
+            await email_routes._get_smtp(configs[2])
+
+        assert len(email_routes._smtp_pool) == 2
+        conns[1].quit.assert_awaited_once()  # Evicted session was closed
+        conns[0].quit.assert_not_awaited()
+
+    def test_email_config_probe_is_cached(self, client, smtp_mock):
+        smtp_cls, conn = smtp_mock
+        conn.__aenter__ = AsyncMock(return_value=conn)
+        conn.__aexit__ = AsyncMock(return_value=False)
+        config = EMAIL_PAYLOAD["smtpConfig"]
+
+        first = client.post("/api/email/test", json=config).json()
+        second = client.post("/api/email/test", json=config).json()
+        assert first == second == {"success": True, "message": "SMTP configuration is valid"}
+        assert smtp_cls.call_count == 1
+
+        client.post("/api/email/test", params={"refresh": True}, json=config)
+        assert smtp_cls.call_count == 2
+
+        client.post("/api/email/test", json={**config, "pass_": "other"})
+        assert smtp_cls.call_count == 3
+
+    def test_email_config_cache_is_bounded(self, client, smtp_mock):
+        smtp_cls, conn = smtp_mock
+        conn.__aenter__ = AsyncMock(return_value=conn)
+        conn.__aexit__ = AsyncMock(return_value=False)
+        config = EMAIL_PAYLOAD["smtpConfig"]
+
+        with patch.object(email_routes, "SMTP_VALIDATION_CACHE_SIZE", 2):
+            for password in ("a", "b", "c"):
+                client.post("/api/email/test", json={**config, "pass_": password})
+            assert len(email_routes._smtp_validation_cache) == 2
+
+            # Expired entries are dropped when the next result is stored
+            with patch.object(email_routes, "SMTP_VALIDATION_TTL", 0):
+                client.post("/api/email/test", json={**config, "pass_": "d"})
+            assert len(email_routes._smtp_validation_cache) == 1
+
+
 # ============================================================================
 # CORS Tests
 # ============================================================================
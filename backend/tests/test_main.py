@@ -9,7 +9,10 @@ from unittest.mock import patch, MagicMock
 from pathlib import Path
 
 # Import the app instance from main
+import main
 from main import app
+from agents.vision_agent import VisionAgent
+from agents.planner_agent import PlannerAgent
 
 @pytest.fixture
 def client():
@@ -28,6 +31,8 @@ def test_root_endpoint(client):
     assert data["name"] == "AegisAI"
     assert data["status"] == "operational"
     assert "version" in data
+    assert data["allowed_origins"] == main.cors_origins
+    assert response.content == main._ROOT_INFO_JSON.body
 
 def test_docs_accessible(client):
     """Test that API documentation is available"""
@@ -53,10 +58,34 @@ def test_lifespan_startup_shutdown(mock_settings, mock_db_service):
         mock_settings.EVIDENCE_DIR.mkdir.assert_called_once_with(
             exist_ok=True, parents=True
         )
+        assert isinstance(app.state.vision_agent, VisionAgent)
+        assert isinstance(app.state.planner_agent, PlannerAgent)
     
     # Shutdown checks (after 'with' block ends)
     mock_db_service.cleanup_old_incidents.assert_called_once_with(30)
 
+def test_large_responses_are_gzipped(client):
+    """Test that JSON payloads above the threshold are compressed"""
+    response = client.get("/api/agents/architecture", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["architecture"]
+
+    small = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+def test_gzip_refused_with_zero_qvalue(client):
+    """gzip;q=0 is a refusal, for middleware-compressed and precompressed payloads alike"""
+    for path in ("/api/agents/architecture", "/api/system/info"):
+        response = client.get(path, headers={"Accept-Encoding": "gzip;q=0, identity"})
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        assert "Accept-Encoding" in response.headers["vary"]
+
+    wildcard = client.get("/api/system/info", headers={"Accept-Encoding": "*;q=0.5"})
+    assert wildcard.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in wildcard.headers["vary"]
+
 def test_cors_headers(client):
     """Test that CORS middleware is active"""
     response = client.options(
@@ -69,4 +98,34 @@ def test_cors_headers(client):
     )
     # If the origin is allowed in settings, this should be 200
     assert response.status_code == 200
-    assert "access-control-allow-origin" in response.headers
\ No newline at end of file
+    assert "access-control-allow-origin" in response.headers
+
+def test_cors_origins_parsed_by_settings():
+    """CORS origins are always a list, whether given as JSON or a single origin"""
+    from config.settings import Settings
+    assert Settings(CORS_ORIGINS='["https://a.example", "https://b.example"]').CORS_ORIGINS == [
+        "https://a.example", "https://b.example"
+    ]
+    assert Settings(CORS_ORIGINS="https://a.example").CORS_ORIGINS == ["https://a.example"]
+
+def test_settings_singleton_is_cached():
+    """get_settings() parses the environment once and returns the module singleton"""
+    from config.settings import get_settings, settings
+    assert get_settings() is get_settings() is settings
+
+def test_unhandled_exception_returns_constant_body():
+    """Unhandled errors get the pre-serialized 500 body without exception details"""
+    import asyncio
+    response = asyncio.run(main.global_exception_handler(None, RuntimeError("secret")))
+    assert response.status_code == 500
+    assert response.body == main._INTERNAL_ERROR_BODY
+    assert b"secret" not in response.body
+
+def test_ensure_dir_creates_once(tmp_path):
+    """ensure_dir() only issues mkdir the first time a path is seen"""
+    from config.settings import ensure_dir
+    target = tmp_path / "evidence" / "nested"
+    with patch.object(Path, "mkdir", autospec=True) as mkdir:
+        assert ensure_dir(target) == target
+        ensure_dir(target)
+    mkdir.assert_called_once_with(target, parents=True, exist_ok=True)
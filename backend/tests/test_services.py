@@ -7,10 +7,14 @@ import pytest
 import asyncio
 from datetime import datetime, timedelta
 from pathlib import Path
+import sqlite3
 import tempfile
+import threading
+import time
+from unittest.mock import ANY, call, patch
 
 from services.database_service import DatabaseService
-from services.action_executor import ActionExecutor
+from services.action_executor import ActionExecutor, _PlanContext
 
 
 class TestDatabaseService:
@@ -27,6 +31,7 @@ class TestDatabaseService:
         yield db
         
         # Cleanup
+        db.close()
         db_path.unlink(missing_ok=True)
     
     def test_database_initialization(self, temp_db):
@@ -78,6 +83,101 @@ class TestDatabaseService:
         assert retrieved['severity'] == 'high'
         assert retrieved['confidence'] == 85
     
+    def test_save_incidents_bulk(self, temp_db):
+        """Test saving a burst of incidents in one transaction"""
+        first = temp_db.save_incident({'type': 'loitering', 'reasoning': 'Before'})
+        
+        ids = temp_db.save_incidents_bulk([
+            {'type': 'theft', 'severity': 'high', 'subjects': ['person']},
+            {'type': 'vandalism', 'severity': 'medium'},
+            {'type': 'intrusion', 'severity': 'critical'},
+        ])
+        
+        assert ids == [first + 1, first + 2, first + 3]
+        assert [temp_db.get_incident_by_id(i)['type'] for i in ids] == ['theft', 'vandalism', 'intrusion']
+        assert temp_db.get_incident_by_id(ids[0])['subjects'] == ['person']
+        assert temp_db.save_incidents_bulk([]) == []
+    
+    def test_save_incident_async_uses_writer_thread(self, temp_db):
+        """Queued incidents are committed by the writer thread; bad ones fail alone"""
+        threads = []
+        bulk = temp_db.save_incidents_bulk
+
+        def record_thread(incidents):
+            threads.append(threading.current_thread().name)
+            return bulk(incidents)
+
+        with patch.object(temp_db, "save_incidents_bulk", side_effect=record_thread):
+            futures = [
+                temp_db.save_incident_async({'type': 'theft'}),
+                temp_db.save_incident_async({'type': 'bad', 'subjects': [object()]}),
+                temp_db.save_incident_async({'type': 'intrusion'}),
+            ]
+            ids = [future.result(timeout=5) for future in futures]
+
+        assert set(threads) == {'db-writer'}
+        assert ids[1] == -1
+        assert [temp_db.get_incident_by_id(i)['type'] for i in (ids[0], ids[2])] == ['theft', 'intrusion']
+
+        # close() drains the queue and stops the writer; the next save restarts it
+        writer = temp_db._writer[0]
+        temp_db.close()
+        assert not writer.is_alive() and temp_db._writer is None
+        assert temp_db.save_incident({'type': 'theft'}) > 0
+    
+    def test_json_columns_storage(self, temp_db):
+        """JSON columns use JSONB where SQLite supports it and always read back as lists"""
+        import services.database_service as database_service
+        incident_id = temp_db.save_incident({'type': 'theft', 'subjects': ['person', 'van']})
+
+        with temp_db._get_connection() as conn:
+            stored = conn.execute(
+                "SELECT typeof(subjects) FROM incidents WHERE id = ?", (incident_id,)
+            ).fetchone()[0]
+        assert stored == ('blob' if database_service._JSONB else 'text')
+        assert temp_db.get_incident_by_id(incident_id)['subjects'] == ['person', 'van']
+        assert temp_db.get_recent_incidents(limit=1)[0]['subjects'] == ['person', 'van']
+    
+    def test_dashboard_filter_uses_index_order(self, temp_db):
+        """Filtered dashboard listing walks idx_incidents_dashboard without a sort"""
+        with temp_db._get_connection() as conn:
+            plan = " ".join(row[3] for row in conn.execute("""
+                EXPLAIN QUERY PLAN
+                SELECT id FROM incidents
+                WHERE status = 'active' AND severity = 'high'
+                ORDER BY created_at DESC LIMIT 10
+            """))
+        assert 'idx_incidents_dashboard' in plan
+        assert 'TEMP B-TREE' not in plan
+    
+    def test_incident_rows_map_to_fields(self, temp_db):
+        """Tuple rows land on the right dictionary keys"""
+        incident_id = temp_db.save_incident({
+            'timestamp': '2024-05-01T12:00:00', 'type': 'theft', 'severity': 'high',
+            'confidence': 91, 'reasoning': 'Bag taken', 'subjects': ['person'],
+            'recommended_actions': ['alert'], 'evidence_path': '/e.jpg',
+            'response_plan': [{'action': 'save_evidence'}], 'created_at': '2024-05-01T12:00:01'
+        })
+        temp_db.save_action(incident_id, 'save_evidence', {'priority': 'high', 'status': 'failed'})
+
+        incident = temp_db.get_incident_by_id(incident_id)
+        assert {k: incident[k] for k in ('timestamp', 'type', 'severity', 'confidence', 'reasoning',
+                                         'evidence_path', 'status', 'created_at')} == {
+            'timestamp': '2024-05-01T12:00:00', 'type': 'theft', 'severity': 'high',
+            'confidence': 91, 'reasoning': 'Bag taken', 'evidence_path': '/e.jpg',
+            'status': 'active', 'created_at': '2024-05-01T12:00:01'
+        }
+        assert incident['recommended_actions'] == ['alert']
+        assert incident['response_plan'] == [{'action': 'save_evidence'}]
+
+        recent = temp_db.get_recent_incidents(limit=1)[0]
+        assert recent == {k: v for k, v in incident.items() if k not in ('response_plan', 'updated_at')}
+
+        action = temp_db.get_actions_for_incident(incident_id)[0]
+        assert (action['incident_id'], action['action_type'], action['priority'], action['status']) == \
+            (incident_id, 'save_evidence', 'high', 'failed')
+        assert action['action_data'] == {'priority': 'high', 'status': 'failed'}
+    
     def test_get_recent_incidents(self, temp_db):
         """Test retrieving recent incidents in reverse chronological order"""
         # Save multiple incidents with increasing timestamps
@@ -102,6 +202,54 @@ class TestDatabaseService:
         expected_order = ['type_4', 'type_3', 'type_2', 'type_1', 'type_0']
         assert actual_order == expected_order
     
+    def test_get_recent_incidents_json(self, temp_db):
+        """SQLite-assembled JSON matches the dict listing and projects fields"""
+        import orjson
+        assert temp_db.get_recent_incidents_json() == "[]"
+
+        temp_db.save_incidents_bulk([
+            {'type': 'theft', 'severity': 'high', 'confidence': 91.5, 'reasoning': 'Bag "taken"',
+             'subjects': ['person', 'bag'], 'recommended_actions': ['alert']},
+            {'type': 'loitering', 'severity': 'low', 'confidence': 40},
+        ])
+
+        assert orjson.loads(temp_db.get_recent_incidents_json()) == temp_db.get_recent_incidents()
+        assert orjson.loads(temp_db.get_recent_incidents_json(severity='high', fields=('type', 'subjects'))) == [
+            {'type': 'theft', 'subjects': ['person', 'bag']}
+        ]
+        with pytest.raises(ValueError):
+            temp_db.get_recent_incidents_json(fields=('response_plan',))
+
+    def test_get_recent_incidents_json_newest_first(self, temp_db):
+        """The JSON listing is ordered by created_at, not by insertion"""
+        import orjson
+        from services import database_service
+        temp_db.save_incidents_bulk([
+            {'type': f'event_{day}', 'created_at': f'2024-01-0{day}T12:00:00'}
+            for day in (3, 1, 4, 2)
+        ])
+
+        for aggregate_order_by in {False, database_service._AGGREGATE_ORDER_BY}:
+            with patch.object(database_service, "_AGGREGATE_ORDER_BY", aggregate_order_by):
+                listing = orjson.loads(temp_db.get_recent_incidents_json(fields=('type',)))
+            assert [row['type'] for row in listing] == ['event_4', 'event_3', 'event_2', 'event_1']
+
+    def test_get_recent_incidents_json_fills_nullable_columns(self, temp_db):
+        """NULLs in nullable columns don't break the IncidentResponse contract"""
+        import orjson
+        from api.routes import IncidentResponse, _INCIDENT_FIELDS
+        incident_id = temp_db.save_incident({'type': 'legacy', 'evidence_path': None})
+        with temp_db._get_connection() as conn:
+            conn.execute(
+                "UPDATE incidents SET subjects = NULL, status = NULL, created_at = NULL WHERE id = ?",
+                (incident_id,)
+            )
+            conn.commit()
+
+        [record] = orjson.loads(temp_db.get_recent_incidents_json(fields=_INCIDENT_FIELDS))
+        incident = IncidentResponse.model_validate(record, strict=True)
+        assert (incident.subjects, incident.evidence_path, incident.status) == ([], '', 'active')
+    
     def test_severity_filter(self, temp_db):
         """Test filtering incidents by severity"""
         # Save incidents with different severities
@@ -154,6 +302,96 @@ class TestDatabaseService:
         )
         
         assert action_id > 0
+
+    def test_persistent_wal_connection(self, temp_db):
+        """Each thread reuses one WAL-mode connection until close()"""
+        import threading
+        with temp_db._get_connection() as first, temp_db._get_connection() as second:
+            assert first is second
+            assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert first.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(temp_db.get_statistics()))
+        thread.start()
+        thread.join()
+        assert other[0]['total_incidents'] == 0
+        assert len(temp_db._connections) == 2
+
+        temp_db.close()
+        assert temp_db._connections == []
+        assert temp_db.get_statistics()['total_incidents'] == 0
+
+    def test_reads_use_read_only_connection(self, temp_db):
+        """Query methods run on a per-thread query_only connection that sees new commits"""
+        with temp_db._get_read_connection() as reader, temp_db._get_connection() as writer:
+            assert reader is not writer
+            assert reader.execute("PRAGMA query_only").fetchone()[0] == 1
+            with pytest.raises(sqlite3.OperationalError):
+                reader.execute("DELETE FROM incidents")
+
+        assert temp_db.get_recent_incidents() == []
+        incident_id = temp_db.save_incident({'type': 'theft'})
+        assert temp_db.get_incident_by_id(incident_id)['type'] == 'theft'
+        assert temp_db.get_statistics()['total_incidents'] == 1
+
+    def test_backup_includes_wal_pages(self, temp_db, tmp_path):
+        """Backups contain commits that have not been checkpointed yet"""
+        import sqlite3
+        temp_db.save_incident({'type': 'theft', 'reasoning': 'Test'})
+        backup = tmp_path / "backup.db"
+
+        assert temp_db.backup_database(backup)
+
+        conn = sqlite3.connect(backup)
+        assert conn.execute("SELECT COUNT(*) FROM incidents").fetchone()[0] == 1
+        conn.close()
+
+    def test_save_actions_bulk(self, temp_db):
+        """Test saving several actions in one transaction"""
+        incident_id = temp_db.save_incident({
+            'timestamp': datetime.now().isoformat(),
+            'type': 'test',
+            'severity': 'low',
+            'confidence': 70,
+            'reasoning': 'Test',
+            'subjects': [],
+            'evidence_path': '',
+            'response_plan': []
+        })
+        now = datetime.now().isoformat()
+        
+        saved = temp_db.save_actions_bulk(incident_id, [
+            ('save_evidence', {'status': 'completed', 'priority': 'immediate'}, now),
+            ('send_alert', {'status': 'failed', 'priority': 'high'}, now),
+        ])
+        
+        assert saved == 2
+        actions = temp_db.get_actions_for_incident(incident_id)
+        assert [a['action_type'] for a in actions] == ['save_evidence', 'send_alert']
+        assert temp_db.save_actions_bulk(incident_id, []) == 0
+
+    def test_action_data_round_trip(self, temp_db):
+        """Action records keep their data, including int timestamps and datetimes"""
+        incident_id = temp_db.save_incident({
+            'timestamp': datetime.now().isoformat(),
+            'type': 'test',
+            'severity': 'low',
+            'confidence': 70,
+            'reasoning': 'Test',
+            'subjects': [],
+            'evidence_path': '',
+            'response_plan': []
+        })
+        stamp = datetime(2024, 5, 1, 12, 30)
+        record = {'status': 'completed', 'timestamp_ns': 1714566600123456789,
+                  'parameters': {'door_id': 'rear', 'at': stamp}}
+
+        temp_db.save_actions_bulk(incident_id, [('lock_door', record, stamp.isoformat())])
+
+        data = temp_db.get_actions_for_incident(incident_id)[0]['action_data']
+        assert data['timestamp_ns'] == 1714566600123456789
+        assert data['parameters'] == {'door_id': 'rear', 'at': '2024-05-01T12:30:00'}
     
     def test_get_statistics(self, temp_db):
         """Test statistics retrieval"""
@@ -176,6 +414,100 @@ class TestDatabaseService:
         assert stats['severity_breakdown']['high'] == 1
         assert stats['severity_breakdown']['low'] == 2
     
+    def test_statistics_cached_until_write(self, temp_db):
+        """Aggregates are reused until a write or the TTL invalidates them"""
+        temp_db.save_incident({'type': 'theft', 'severity': 'high'})
+        first = temp_db.get_statistics()
+
+        with patch.object(temp_db, "_query_statistics") as query:
+            assert temp_db.get_statistics() is first
+            query.assert_not_called()
+
+        assert temp_db.get_hourly_incident_trend(24) is temp_db.get_hourly_incident_trend(24)
+        temp_db.save_incident({'type': 'theft', 'severity': 'low'})
+        assert temp_db.get_statistics()['total_incidents'] == 2
+
+        # Failures are reported but not cached
+        temp_db.update_incident_status(1, 'resolved')
+        with patch.object(temp_db, "_query_statistics", side_effect=RuntimeError("locked")):
+            assert temp_db.get_statistics() == {}
+        assert temp_db.get_statistics()['active_incidents'] == 1
+    
+    def test_time_windows_use_created_ts(self, temp_db):
+        """Window filters compare integer created_ts, set from created_at"""
+        old_time = datetime.now() - timedelta(days=3)
+        temp_db.save_incidents_bulk([
+            {'type': 'theft', 'severity': 'high', 'confidence': 80},
+            {'type': 'theft', 'severity': 'low', 'confidence': 60,
+             'created_at': old_time.isoformat()},
+        ])
+
+        with temp_db._get_connection() as conn:
+            stored = [row[0] for row in conn.execute("SELECT created_ts FROM incidents ORDER BY id")]
+        assert stored[1] == int(old_time.timestamp())
+
+        assert temp_db.get_statistics()['recent_24h'] == 1
+        assert [h['count'] for h in temp_db.get_hourly_incident_trend(24)] == [1]
+        trends = temp_db.get_severity_trends(7)
+        assert len(trends['high']) == 1 and len(trends['low']) == 1
+        assert temp_db.cleanup_old_incidents(days=2) == 1
+
+    def test_hourly_rollup_follows_inserts_and_deletes(self, temp_db):
+        """Triggers keep incident_rollup_hourly in step with incidents"""
+        old_time = datetime.now() - timedelta(days=3)
+        temp_db.save_incidents_bulk([
+            {'type': 'theft', 'severity': 'high', 'confidence': 80},
+            {'type': 'theft', 'severity': 'high', 'confidence': 60},
+            {'type': 'theft', 'severity': 'low', 'confidence': 50,
+             'created_at': old_time.isoformat()},
+        ])
+
+        with temp_db._get_connection() as conn:
+            rows = conn.execute(
+                "SELECT severity, count, sum_conf FROM incident_rollup_hourly ORDER BY hour_ts DESC"
+            ).fetchall()
+        assert [tuple(row) for row in rows] == [('high', 2, 140.0), ('low', 1, 50.0)]
+        assert temp_db.get_hourly_incident_trend(24) == [
+            {'hour': ANY, 'count': 2, 'avg_confidence': 70.0}
+        ]
+
+        temp_db.cleanup_old_incidents(days=2)
+        with temp_db._get_connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM incident_rollup_hourly").fetchone()[0] == 1
+        assert temp_db.get_severity_trends(7)['low'] == []
+
+    def test_created_ts_backfilled_on_old_schema(self, tmp_path):
+        """Databases created before created_ts get the column filled in"""
+        db_path = tmp_path / 'old.db'
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+            CREATE TABLE incidents (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL,
+                incident_type TEXT NOT NULL, severity TEXT NOT NULL, confidence REAL NOT NULL,
+                reasoning TEXT NOT NULL, subjects TEXT, recommended_actions TEXT,
+                evidence_path TEXT, response_plan TEXT, status TEXT DEFAULT 'active',
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP, updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        created_at = datetime(2024, 5, 1, 12, 0, 0)
+        conn.execute(
+            "INSERT INTO incidents (timestamp, incident_type, severity, confidence, reasoning, created_at)"
+            " VALUES ('t', 'theft', 'high', 90, 'r', ?)", (created_at.isoformat(),)
+        )
+        conn.commit()
+        conn.close()
+
+        db = DatabaseService(db_path)
+        try:
+            with db._get_connection() as conn:
+                assert conn.execute("SELECT created_ts FROM incidents").fetchone()[0] == \
+                    int(created_at.timestamp())
+                assert tuple(conn.execute(
+                    "SELECT severity, count, sum_conf FROM incident_rollup_hourly"
+                ).fetchone()) == ('high', 1, 90.0)
+        finally:
+            db.close()
+    
     def test_update_incident_status(self, temp_db):
         """Test updating incident status"""
         incident_id = temp_db.save_incident({
@@ -217,6 +549,41 @@ class TestDatabaseService:
         assert deleted >= 1
 
 
+class TestAnalysisQueue:
+    """Test AnalysisQueue bounds"""
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects_and_pending_tasks_survive(self):
+        """Submissions past queue_size raise QueueFull; eviction skips pending tasks"""
+        from services.analysis_queue import AnalysisQueue
+        release = asyncio.Event()
+
+        async def process(**kwargs):
+            await release.wait()
+            return {'frame': kwargs['frame_number']}
+
+        agent = type('Agent', (), {'process': staticmethod(process)})()
+        queue = AnalysisQueue(workers=1, queue_size=1)
+        queue.MAX_TRACKED_TASKS = 1
+        try:
+            running = queue.submit(agent, frame_number=1)
+            await asyncio.sleep(0)  # Worker picks it up
+            waiting = queue.submit(agent, frame_number=2)
+            with pytest.raises(asyncio.QueueFull):
+                queue.submit(agent, frame_number=3)
+
+            # Over MAX_TRACKED_TASKS, but nothing has finished yet
+            assert queue.get(running) is not None and queue.get(waiting) is not None
+
+            release.set()
+            assert await queue.get(waiting) == {'frame': 2}
+            latest = queue.submit(agent, frame_number=4)
+            assert queue.get(running) is None and queue.get(waiting) is None
+            assert await queue.get(latest) == {'frame': 4}
+        finally:
+            await queue.stop()
+
+
 class TestActionExecutor:
     """Test ActionExecutor functionality"""
     
@@ -237,6 +604,7 @@ class TestActionExecutor:
         
         yield db
         
+        db.close()
         db_path.unlink(missing_ok=True)
     
     @pytest.mark.asyncio
@@ -282,6 +650,20 @@ class TestActionExecutor:
         """Test save_evidence action"""
         await executor._save_evidence(1, '/test/evidence.jpg', {})
         assert True
+
+    @pytest.mark.asyncio
+    async def test_save_evidence_stats_file_once(self, executor, tmp_path, caplog):
+        """Existing evidence is checked and sized with a single stat call"""
+        import logging
+        evidence = tmp_path / "evidence.jpg"
+        evidence.write_bytes(b"x" * 42)
+
+        with patch.object(Path, "stat", autospec=True, side_effect=Path.stat) as stat, \
+                caplog.at_level(logging.INFO, logger="services.action_executor"):
+            await executor._save_evidence(1, str(evidence), {})
+
+        assert stat.call_count == 1
+        assert "(42 bytes)" in caplog.text
     
     @pytest.mark.asyncio
     async def test_log_incident_action(self, executor):
@@ -327,5 +709,349 @@ class TestActionExecutor:
         assert True
 
 
+    @pytest.mark.asyncio
+    async def test_same_priority_actions_run_concurrently(self, executor):
+        """Steps in one tier overlap; tiers stay ordered"""
+        order = []
+
+        async def fake_action(action_type, incident_id, evidence_path, params, plan_ctx):
+            order.append(("start", action_type))
+            await asyncio.sleep(0.1)
+            order.append(("end", action_type))
+
+        plan = [
+            {'step': 1, 'action': 'notify_staff', 'priority': 'high', 'parameters': {}},
+            {'step': 2, 'action': 'escalate', 'priority': 'high', 'parameters': {}},
+            {'step': 3, 'action': 'sound_alarm', 'priority': 'high', 'parameters': {}},
+            {'step': 4, 'action': 'record_video', 'priority': 'low', 'parameters': {}},
+        ]
+
+        with patch.object(executor, "_execute_action", side_effect=fake_action), \
+                patch("services.action_executor.db_service") as db:
+            started = time.perf_counter()
+            await executor.execute_plan(plan, 1)
+            elapsed = time.perf_counter() - started
+
+        # The high tier overlaps, then the low tier
+        assert elapsed < 0.25
+        assert order[:3] == [
+            ("start", "notify_staff"), ("start", "escalate"), ("start", "sound_alarm")
+        ]
+        assert order[6:] == [("start", "record_video"), ("end", "record_video")]
+        db.save_actions_bulk.assert_called_once()
+        rows = db.save_actions_bulk.call_args.args[1]
+        assert len(rows) == 4
+        # executed_at is derived from the record's own timestamp at flush time
+        for _, record, executed_at in rows:
+            assert executed_at == datetime.fromtimestamp(record['timestamp_ns'] / 1e9).isoformat()
+        assert len(executor.executed_actions) == 4
+
+
+    @pytest.mark.asyncio
+    async def test_sms_alert_posts_to_twilio_rest_api(self, executor):
+        """SMS alerts go through the async HTTP client, not the blocking SDK"""
+        import httpx
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(201, json={"sid": "SM123"})
+
+        executor._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        incident = {'type': 'intrusion', 'severity': 'high', 'confidence': 90, 'timestamp': 'now'}
+
+        with patch("services.action_executor.settings") as settings, \
+                patch("services.action_executor.db_service") as db:
+            settings.TWILIO_ACCOUNT_SID = "AC1"
+            settings.TWILIO_AUTH_TOKEN = "token"
+            settings.TWILIO_PHONE = "+15550001"
+            settings.ALERT_PHONE = "+15550002"
+            db.get_incident_by_id.return_value = incident
+            await executor._send_sms_alert(7)
+        await executor.close()
+
+        (request,) = requests
+        assert request.url.path == "/2010-04-01/Accounts/AC1/Messages.json"
+        assert b"To=%2B15550002" in request.content
+        assert request.headers["authorization"].startswith("Basic ")
+
+
+    @pytest.mark.asyncio
+    async def test_email_alerts_reuse_smtp_session(self, executor):
+        """Alert emails share one SMTP session and reconnect if it was dropped"""
+        from unittest.mock import AsyncMock, MagicMock
+        import aiosmtplib
+        conn = MagicMock(is_connected=True)
+        conn.connect = AsyncMock()
+        conn.send_message = AsyncMock()
+        conn.quit = AsyncMock()
+        incident = {'type': 'intrusion', 'severity': 'high', 'confidence': 90,
+                    'timestamp': 'now', 'reasoning': 'Test'}
+
+        with patch("services.action_executor.aiosmtplib.SMTP", return_value=conn) as smtp_cls, \
+                patch("services.action_executor.settings") as settings, \
+                patch("services.action_executor.db_service") as db:
+            settings.SMTP_HOST = "smtp.example.com"
+            settings.SMTP_PORT = 587
+            settings.SMTP_USER = "aegis@example.com"
+            settings.SMTP_PASSWORD = "secret"
+            settings.ALERT_EMAIL = "guard@example.com"
+            db.get_incident_by_id.return_value = incident
+
+            await executor._send_email_alert(1)
+            await executor._send_email_alert(2)
+            assert smtp_cls.call_count == 1
+            assert conn.send_message.await_count == 2
+            body = conn.send_message.await_args.args[0].get_content()
+            assert "Incident ID:    #2" in body
+            assert "Type:           INTRUSION" in body
+            assert "SUBJECTS IDENTIFIED:\n" + "-" * 49 + "\nNone identified" in body
+
+            conn.send_message.side_effect = [aiosmtplib.SMTPServerDisconnected("idle"), None]
+            await executor._send_email_alert(3)
+            assert smtp_cls.call_count == 2
+
+        await executor.close()
+        conn.quit.assert_awaited_once()
+
+
+    @pytest.mark.asyncio
+    async def test_dispatch_plan_queues_by_priority(self, executor):
+        """Dispatched plans return immediately and run on the background workers"""
+        done = asyncio.Event()
+
+        async def slow_plan(plan, incident_id, evidence_path=""):
+            await asyncio.sleep(0.05)
+            done.set()
+
+        with patch.object(executor, "execute_plan", side_effect=slow_plan) as execute:
+            await executor.dispatch_plan(
+                [{"step": 1, "action": "sound_alarm", "priority": "immediate"}], 7, "/e.jpg"
+            )
+            assert executor.running
+            assert not done.is_set()
+            assert executor._queues["high"].qsize() + execute.await_count == 1
+
+            await asyncio.wait_for(done.wait(), 1)
+            await executor.stop()
+
+        execute.assert_awaited_once()
+        assert execute.await_args.args[1:] == (7, "/e.jpg")
+        assert not executor.running
+
+
+    @pytest.mark.asyncio
+    async def test_db_calls_use_dedicated_pool(self, executor):
+        """Database calls run on the executor's own thread pool"""
+        import threading
+        with patch("services.action_executor.db_service") as db:
+            db.update_incident_status.side_effect = lambda *a: threading.current_thread().name
+            await executor._log_incident(1, "", {})
+            thread_name = await executor._db_call(db.update_incident_status, 1, "logged")
+
+        assert thread_name.startswith("action-db")
+        await executor.close()
+        assert executor._db_executor is None
+
+
+    @pytest.mark.asyncio
+    async def test_action_timestamps_formatted_on_read(self, executor):
+        """Action records keep an integer timestamp; history formats it as ISO-8601 UTC"""
+        with patch("services.action_executor.db_service"):
+            await executor.execute_plan([{"step": 1, "action": "save_evidence"}], 1)
+
+        record = executor.executed_actions[-1]
+        assert isinstance(record["timestamp_ns"], int)
+        assert "timestamp" not in record
+
+        entry = executor.get_execution_history(limit=1)[0]
+        parsed = datetime.fromisoformat(entry["timestamp"])
+        assert parsed.utcoffset() == timedelta(0)
+        assert abs(parsed.timestamp() - record["timestamp_ns"] / 1e9) < 1e-3
+
+
+    @pytest.mark.asyncio
+    async def test_execution_stats_outlive_history(self, executor):
+        """Stats count every action even after old records leave the bounded history"""
+        cap = executor.executed_actions.maxlen
+        plan_ctx = _PlanContext()
+        with patch.object(executor, "_execute_action"):
+            for i in range(cap + 5):
+                await executor._run_step({"action": "monitor", "parameters": {"n": i}}, 1, "", plan_ctx)
+
+        assert len(executor.executed_actions) == cap
+        history = executor.get_execution_history(limit=3)
+        assert [entry["parameters"]["n"] for entry in history] == [cap + 2, cap + 3, cap + 4]
+        stats = executor.get_execution_stats()
+        assert stats["total_actions"] == cap + 5
+        assert stats["success_rate"] == 100.0
+
+
+    @pytest.mark.asyncio
+    async def test_send_alert_fetches_incident_once(self, executor):
+        """Email and SMS alerts share one incident lookup"""
+        from unittest.mock import AsyncMock
+        incident = {'type': 'theft'}
+        executor._email_ready = executor._sms_ready = True
+        with patch("services.action_executor.db_service") as db, \
+                patch.object(executor, "_send_email_alert", new_callable=AsyncMock) as email, \
+                patch.object(executor, "_send_sms_alert", new_callable=AsyncMock) as sms:
+            db.get_incident_by_id.return_value = incident
+            email.side_effect = RuntimeError("smtp down")
+
+            await executor._send_alert(5, "", {"channels": ["email", "sms"]})
+
+        db.get_incident_by_id.assert_called_once_with(5)
+        email.assert_awaited_once_with(5, incident)
+        sms.assert_awaited_once_with(5, incident)
+
+
+    @pytest.mark.asyncio
+    async def test_send_alert_delivers_channels_concurrently(self, executor):
+        """Email and SMS deliveries overlap instead of running back to back"""
+        sms_started = asyncio.Event()
+        delivered = []
+
+        async def email(incident_id, incident):
+            # Only finishes if SMS delivery starts while email is in flight
+            await asyncio.wait_for(sms_started.wait(), timeout=1)
+            delivered.append("email")
+
+        async def sms(incident_id, incident):
+            sms_started.set()
+            delivered.append("sms")
+
+        executor._email_ready = executor._sms_ready = True
+        with patch("services.action_executor.db_service") as db, \
+                patch.object(executor, "_send_email_alert", email), \
+                patch.object(executor, "_send_sms_alert", sms):
+            db.get_incident_by_id.return_value = {'type': 'theft'}
+            await executor._send_alert(5, "", {"channels": ["email", "sms"]})
+
+        assert delivered == ["sms", "email"]
+
+
+    @pytest.mark.asyncio
+    async def test_hung_action_fails_at_deadline(self, executor):
+        """A stuck action is recorded as failed and later steps still run"""
+        async def hang(*args):
+            await asyncio.sleep(10)
+
+        executor._action_map["lock_door"] = hang
+        plan = [
+            {"step": 1, "action": "lock_door", "priority": "immediate",
+             "parameters": {"timeout_s": 0.05}},
+            {"step": 2, "action": "save_evidence", "priority": "high"},
+        ]
+        with patch("services.action_executor.db_service"):
+            await asyncio.wait_for(executor.execute_plan(plan, 1), 1)
+
+        failed, done = executor.executed_actions
+        assert failed["status"] == "failed"
+        assert "deadline" in failed["error"]
+        assert done["action"] == "save_evidence" and done["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_action_timeout_is_coerced_and_clamped(self, executor):
+        """timeout_s from the planner is parsed, defaulted and capped"""
+        from services.action_executor import MAX_TIMEOUT_FACTOR, _action_deadline
+        from config.settings import settings
+        default = settings.ACTION_TIMEOUT
+
+        assert _action_deadline({"timeout_s": "30"}) == min(30.0, default * MAX_TIMEOUT_FACTOR)
+        assert _action_deadline({"timeout_s": "soon"}) == default
+        assert _action_deadline({"timeout_s": None}) == default
+        assert _action_deadline({"timeout_s": -1}) == default
+        assert _action_deadline({"timeout_s": float("nan")}) == default
+        assert _action_deadline({"timeout_s": 1e9}) == default * MAX_TIMEOUT_FACTOR
+
+        plan = [{"step": 1, "action": "log_incident", "priority": "low",
+                 "parameters": {"timeout_s": "30"}}]
+        with patch("services.action_executor.db_service"):
+            await executor.execute_plan(plan, 1)
+        assert executor.executed_actions[-1]["status"] == "completed"
+
+
+    @pytest.mark.asyncio
+    async def test_plan_status_updates_coalesced(self, executor):
+        """A plan writes its strongest status once, after its actions"""
+        plan = [
+            {"step": 1, "action": "escalate", "priority": "immediate"},
+            {"step": 2, "action": "monitor", "priority": "high"},
+            {"step": 3, "action": "log_incident", "priority": "low"},
+        ]
+        with patch("services.action_executor.db_service") as db:
+            await executor.execute_plan(plan, 9)
+            db.update_incident_status.assert_called_once_with(9, "escalated")
+            assert db.mock_calls.index(call.save_actions_bulk(9, ANY)) < \
+                db.mock_calls.index(call.update_incident_status(9, "escalated"))
+
+            # Outside a plan the status is written straight away
+            await executor._monitor(9, "", {})
+            db.update_incident_status.assert_called_with(9, "monitoring")
+
+
+    @pytest.mark.asyncio
+    async def test_concurrent_plans_keep_their_own_status(self, executor):
+        """Overlapping plans for one incident each write the status they requested"""
+        escalating = [
+            {"step": 1, "action": "escalate", "priority": "immediate"},
+            {"step": 2, "action": "record_video", "priority": "low"},
+        ]
+        logging_only = [{"step": 1, "action": "log_incident", "priority": "immediate"}]
+        with patch("services.action_executor.db_service") as db:
+            await asyncio.gather(
+                executor.execute_plan(escalating, 4),
+                executor.execute_plan(logging_only, 4),
+            )
+        assert sorted(db.update_incident_status.call_args_list) == [
+            call(4, "escalated"), call(4, "logged")
+        ]
+
+
+    @pytest.mark.asyncio
+    async def test_send_alert_skips_unconfigured_channels(self, executor):
+        """Channels that are disabled or missing credentials cost no incident lookup"""
+        with patch("services.action_executor.settings") as settings:
+            settings.ENABLE_EMAIL_ALERTS = True
+            settings.SMTP_HOST = "smtp.example.com"
+            settings.SMTP_USER = settings.SMTP_PASSWORD = settings.ALERT_EMAIL = ""
+            settings.ENABLE_SMS_ALERTS = False
+            executor._refresh_capabilities()
+
+        assert not executor._email_ready and not executor._sms_ready
+        with patch("services.action_executor.db_service") as db:
+            await executor._send_alert(5, "", {"channels": ["email", "sms"]})
+        db.get_incident_by_id.assert_not_called()
+
+
+    @pytest.mark.asyncio
+    async def test_failing_channel_trips_circuit_breaker(self, executor):
+        """After repeated failures a channel is skipped until its cooldown ends"""
+        from unittest.mock import AsyncMock
+        incident = {'type': 'intrusion', 'severity': 'high', 'confidence': 90,
+                    'timestamp': 'now', 'reasoning': 'Test'}
+        breaker = executor._email_breaker
+
+        with patch("services.action_executor.settings") as settings, \
+                patch.object(executor, "_send_smtp", new_callable=AsyncMock) as send:
+            settings.SMTP_HOST = settings.SMTP_USER = "x"
+            settings.SMTP_PASSWORD = settings.ALERT_EMAIL = "x"
+            send.side_effect = OSError("connection refused")
+
+            for _ in range(breaker.threshold):
+                with pytest.raises(OSError):
+                    await executor._send_email_alert(1, incident)
+            await executor._send_email_alert(1, incident)
+            assert send.await_count == breaker.threshold
+
+            # Cooldown over: one trial send, which closes the breaker on success
+            breaker.opened_until = 0.0
+            send.side_effect = None
+            await executor._send_email_alert(1, incident)
+            assert send.await_count == breaker.threshold + 1
+            assert breaker.fail_count == 0
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -1,5 +1,6 @@
 import pytest
 import numpy as np
+from concurrent.futures import Future
 from unittest.mock import MagicMock, patch, AsyncMock
 from services.video_processor import VideoProcessor, DemoScenarioRunner
 
@@ -25,6 +26,11 @@ async def test_video_processor_full_loop(mock_frame):
          patch("services.video_processor.db_service") as mock_db, \
          patch("services.video_processor.action_executor", new_callable=AsyncMock) as mock_executor:
         
+        # The writer thread's result arrives through a concurrent Future
+        saved = Future()
+        saved.set_result(1)
+        mock_db.save_incident_async.return_value = saved
+
         mock_cap = MagicMock()
         mock_cap.isOpened.return_value = True
         mock_cap.read.return_value = (True, mock_frame)
@@ -40,9 +46,9 @@ async def test_video_processor_full_loop(mock_frame):
         await processor.process_stream(display=True)
         
         assert mock_cv2.imshow.called
-        assert mock_db.save_incident.called
+        assert mock_db.save_incident_async.called
         # Now this will pass because mock_executor is an AsyncMock
-        assert mock_executor.execute_plan.called
+        assert mock_executor.dispatch_plan.called
 
 @pytest.mark.asyncio
 async def test_demo_scenario_runner():
@@ -53,4 +59,28 @@ async def test_demo_scenario_runner():
     with patch("builtins.print"), \
          patch.object(runner.vision_agent, 'close', new_callable=AsyncMock), \
          patch.object(runner.planner_agent, 'close', new_callable=AsyncMock):
-        await runner._run_scenario("Test", "Test Desc", (255, 0, 0))
\ No newline at end of file
+        await runner._run_scenario("Test", "Test Desc", (255, 0, 0))
+
+@pytest.mark.asyncio
+async def test_handle_incident_recreates_removed_evidence_dir(mock_frame, tmp_path):
+    import shutil
+    from config.settings import ensure_dir
+
+    # Removed after the once-per-process existence check
+    evidence_dir = ensure_dir(tmp_path / "evidence")
+    shutil.rmtree(evidence_dir)
+
+    processor = VideoProcessor(source=0)
+    processor.planner_agent._safe_process = AsyncMock(return_value=[])
+
+    with patch("services.video_processor.settings") as mock_settings, \
+         patch("services.video_processor.db_service") as mock_db, \
+         patch("services.video_processor.action_executor", new_callable=AsyncMock):
+        mock_settings.EVIDENCE_DIR = evidence_dir
+        saved = Future()
+        saved.set_result(1)
+        mock_db.save_incident_async.return_value = saved
+
+        await processor._handle_incident(mock_frame, {"incident": True, "type": "theft", "severity": "high"})
+
+    assert len(list(evidence_dir.glob("*.jpg"))) == 1
@@ -1,5 +1,7 @@
 """Utility functions and helpers"""
 
 from .logger import setup_logging
+from .compression import NegotiatedGZipMiddleware, accepts_gzip
+from .static_response import StaticJSON
 
-__all__ = ["setup_logging"]
+__all__ = ["setup_logging", "NegotiatedGZipMiddleware", "accepts_gzip", "StaticJSON"]
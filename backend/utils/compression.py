@@ -0,0 +1,62 @@
+"""
+Response Compression
+Accept-Encoding negotiation that honours q-values, shared by StaticJSON and
+the app-wide gzip middleware
+"""
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder, IdentityResponder
+from starlette.types import Receive, Scope, Send
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding header value allows a gzip response.
+
+    "gzip;q=0" refuses gzip, and "*" covers it unless gzip is listed
+    explicitly (RFC 9110, section 12.5.3).
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header value ("" if absent).
+
+    Returns:
+        bool: True if gzip (or x-gzip) is acceptable with a non-zero q-value.
+    """
+    wildcard = False
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if coding not in ("gzip", "x-gzip", "*"):
+            continue
+
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding == "*":
+            wildcard = q > 0
+        else:
+            return q > 0
+    return wildcard
+
+
+class NegotiatedGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that only compresses when accepts_gzip() allows it
+
+    Starlette's own check is a substring match, so "gzip;q=0" would still get
+    a gzipped body.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if accepts_gzip(Headers(scope=scope).get("accept-encoding", "")):
+            responder = GZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
@@ -0,0 +1,76 @@
+"""
+Static JSON Responses
+Pre-serialized (and pre-compressed) payloads served with a strong ETag and
+HTTP caching headers
+"""
+
+import gzip
+import hashlib
+from typing import Any, Dict
+
+import orjson
+from starlette.requests import Request
+from starlette.responses import Response
+
+from utils.compression import accepts_gzip
+
+
+class StaticJSON:
+    """JSON payload serialized once, answered with 304 on a matching If-None-Match
+
+    Payloads large enough to benefit are also gzipped once at maximum level and
+    served with Content-Encoding set, which GZipMiddleware passes through as-is.
+    """
+
+    # Smaller payloads aren't worth a Content-Encoding (matches GZipMiddleware)
+    GZIP_MINIMUM_SIZE = 1024
+
+    def __init__(self, payload: Any, max_age: int = 3600):
+        self.body = orjson.dumps(payload)
+        self.etag = '"' + hashlib.blake2b(self.body, digest_size=16).hexdigest() + '"'
+        self.headers = self._headers(self.etag, max_age)
+
+        self.gzip_body = None
+        if len(self.body) >= self.GZIP_MINIMUM_SIZE:
+            self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+            # Each encoding is a distinct representation with its own strong ETag
+            self.gzip_headers = self._headers(self.etag[:-1] + '-gzip"', max_age)
+            self.gzip_headers["Content-Encoding"] = "gzip"
+
+    @staticmethod
+    def _headers(etag: str, max_age: int) -> Dict[str, str]:
+        return {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={max_age}",
+            "Vary": "Accept-Encoding",
+        }
+
+    def not_modified(self, request: Request) -> bool:
+        """Whether the client already holds the current payload (in either encoding)."""
+        if_none_match = request.headers.get("if-none-match")
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or self.etag in tags or (
+            self.gzip_body is not None and self.gzip_headers["ETag"] in tags
+        )
+
+    def response(self, request: Request) -> Response:
+        """Builds the response for a request.
+
+        Args:
+            request: Incoming request, checked for If-None-Match and Accept-Encoding.
+
+        Returns:
+            Response: 304 with no body if the client's copy is current,
+                otherwise the pre-serialized JSON (gzipped if accepted).
+        """
+        use_gzip = self.gzip_body is not None and accepts_gzip(request.headers.get("accept-encoding", ""))
+        headers = self.gzip_headers if use_gzip else self.headers
+        if self.not_modified(request):
+            return Response(
+                status_code=304,
+                headers={k: v for k, v in headers.items() if k != "Content-Encoding"}
+            )
+        body = self.gzip_body if use_gzip else self.body
+        return Response(content=body, media_type="application/json", headers=headers)